@@ -0,0 +1,115 @@
+# -----------------------------------------------------------------------------
+# benchmarks/alimentacao.py
+#
+# Compilação de partidas do tatico.py que chegam aos poucos, como as linhas
+# do modo interativo ou as leituras de um socket:
+#
+#     por linha     compile_text(linha, reiniciar=False) para cada linha, como
+#                   o modo interativo fazia (uma análise nova por linha)
+#     alimentar     Compilador.alimentar(linha, fim_de_linha=True) para cada
+#                   linha (o parser guarda o estado entre as linhas)
+#     socket        Compilador.alimentar(pedaço) com pedaços de 1500
+#                   caracteres, cortados no meio das linhas e dos tokens
+#
+# As mensagens das três formas devem ser as mesmas da compilação do texto
+# inteiro.  Mostra o tempo por partida (mediana das repetições) e o pico de
+# memória alocada (tracemalloc) durante a compilação de 1x e 10x partidas:
+# nem o texto nem os resultados são guardados, e o que cresce com a entrada é
+# só o índice das linhas do lexer (8 bytes por linha, para position()).
+#
+# Uso:  python benchmarks/alimentacao.py [partidas] [repetições]
+# -----------------------------------------------------------------------------
+
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import tatico
+from incremental import PARTIDA
+
+SOCKET = 1500
+
+def por_linha(linhas):
+    for linha in linhas:
+        yield tatico.compile_text(linha, reiniciar=False)
+
+def alimentar(linhas):
+    for linha in linhas:
+        yield tatico.compilador.alimentar(linha, fim_de_linha=True)
+    yield tatico.compilador.terminar()
+
+def socket(linhas):
+    pendente = ''
+    for linha in linhas:
+        pendente += linha
+        if len(pendente) >= SOCKET:
+            yield tatico.compilador.alimentar(pendente[:SOCKET])
+            pendente = pendente[SOCKET:]
+    yield tatico.compilador.alimentar(pendente)
+    yield tatico.compilador.terminar()
+
+FORMAS = {'por linha': por_linha, 'alimentar': alimentar, 'socket': socket}
+
+# As linhas das partidas, geradas sob demanda
+def linhas(partidas):
+    uma = PARTIDA.splitlines(keepends=True)
+    for _ in range(partidas):
+        yield from uma
+
+# Compila as partidas, sem o coletor de lixo; devolve o tempo e as mensagens
+def compilar(forma, partidas):
+    tatico.limpar_dados()
+    mensagens = []
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        for resultado in FORMAS[forma](linhas(partidas)):
+            assert not resultado['erros']
+            mensagens.extend(resultado['mensagens'])
+        tempo = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    return tempo, mensagens
+
+# Pico de memória alocada durante a compilação (com o coletor de lixo, que
+# libera os ciclos criados por json.dumps())
+def pico(forma, partidas):
+    tatico.limpar_dados()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for resultado in FORMAS[forma](linhas(partidas)):
+            assert not resultado['erros']
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main():
+    partidas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    tatico.compilador.construir()
+
+    esperado = tatico.compile_text(PARTIDA * partidas)['mensagens']
+    tempos = {forma: [] for forma in FORMAS}
+    for _ in range(repeticoes):
+        for forma in FORMAS:
+            tempo, mensagens = compilar(forma, partidas)
+            assert mensagens == esperado
+            tempos[forma].append(tempo)
+
+    print(f'{partidas} partidas')
+    print(f'{"forma":<12}{"µs/partida":>12}{"pico (KB)":>12}{f"pico {10 * partidas}":>14}')
+    for forma in FORMAS:
+        tempo = statistics.median(tempos[forma]) / partidas
+        print(f'{forma:<12}{tempo * 1e6:>12.1f}{pico(forma, partidas) / 1024:>12.0f}'
+              f'{pico(forma, 10 * partidas) / 1024:>14.0f}')
+
+if __name__ == '__main__':
+    main()
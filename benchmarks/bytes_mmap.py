@@ -0,0 +1,101 @@
+# -----------------------------------------------------------------------------
+# benchmarks/bytes_mmap.py
+#
+# Tokenização de um arquivo grande de campeonato (em Latin-1) lido como texto
+# (f.read() decodificado e Lexer.input()) ou mapeado com mmap e passado como
+# bytes ao lexer, que casa padrões de bytes e só decodifica os valores dos
+# tokens que são lidos:
+#
+#     tokens       conta os tokens com Lexer.token()
+#     colunas      Lexer.tokenize_all()
+#     compilacao   tatico.compile_text()
+#
+# Cada medida é feita em um processo separado, que informa o tempo e a
+# memória privada (RssAnon) acima da memória do processo antes da leitura,
+# medida com a entrada ainda em uso.  As páginas do mmap são do arquivo (cache
+# de páginas, compartilhadas) e não entram nessa conta.
+#
+# Uso:  python benchmarks/bytes_mmap.py [megabytes ...]
+# -----------------------------------------------------------------------------
+
+import json
+import mmap
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+MODOS = ('texto', 'mmap')
+MEDIDAS = ('tokens', 'colunas', 'compilacao')
+
+def gerar_arquivo(caminho, megabytes):
+    from tabelas_int import EXEMPLO
+    bloco = (EXEMPLO * 1000).encode('latin-1')
+    with open(caminho, 'wb') as f:
+        for _ in range(max(1, int(megabytes * 2**20 / len(bloco)))):
+            f.write(bloco)
+
+# Memória privada residente do processo, em kB
+def privada_kb():
+    with open('/proc/self/status') as f:
+        for linha in f:
+            if linha.startswith('RssAnon:'):
+                return int(linha.split()[1])
+    return 0
+
+# Medida feita no processo filho
+def medir_processo(caminho, modo, medida):
+    import tatico
+
+    lexer, _ = tatico.compilador.construir()
+    base = privada_kb()
+    t0 = time.perf_counter()
+    with open(caminho, 'rb') as f:
+        if modo == 'texto':
+            fonte = f.read().decode('latin-1')
+        else:
+            fonte = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if medida == 'tokens':
+            lexer.input(fonte)
+            for _ in lexer:
+                pass
+            memoria = privada_kb()
+        elif medida == 'colunas':
+            colunas = lexer.tokenize_all(fonte)
+            memoria = privada_kb()
+            del colunas
+        else:
+            tatico.compile_text(fonte)
+            memoria = privada_kb()
+        lexer.input('')
+        del fonte
+    return {'tempo_s': round(time.perf_counter() - t0, 3), 'privada_mb': round((memoria - base) / 1024, 1)}
+
+def main():
+    if sys.argv[1:2] == ['--filho']:
+        print(json.dumps(medir_processo(*sys.argv[2:5])))
+        return
+
+    tamanhos = [float(n) for n in sys.argv[1:]] or [10, 50]
+    print(f'{"arquivo (MB)":>12}  {"medida":<10}' + ''.join(f'{m + " (s)":>12}{m + " (MB)":>14}' for m in MODOS))
+    with tempfile.TemporaryDirectory() as diretorio:
+        for megabytes in tamanhos:
+            caminho = os.path.join(diretorio, 'campeonato.txt')
+            gerar_arquivo(caminho, megabytes)
+            tamanho = os.path.getsize(caminho) / 2**20
+            for medida in MEDIDAS:
+                linha = f'{tamanho:>12.0f}  {medida:<10}'
+                for modo in MODOS:
+                    saida = subprocess.run([sys.executable, os.path.abspath(__file__), '--filho',
+                                            caminho, modo, medida],
+                                           capture_output=True, text=True, check=True).stdout
+                    r = json.loads(saida)
+                    linha += f'{r["tempo_s"]:>12.2f}{r["privada_mb"]:>14.1f}'
+                print(linha)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+# -----------------------------------------------------------------------------
+# benchmarks/concorrencia.py
+#
+# Análises simultâneas com um mesmo parser (um só conjunto de tabelas) em um
+# pool de threads, cada thread com o seu lexer (um clone, Lexer.clone()).
+# A gramática é a do tatico.py com regras puras no lugar das que guardam a
+# memória semântica (que é global): cada regra devolve o seu nome e os
+# valores do lado direito, e o resultado da análise é a árvore inteira.
+# Algumas partidas têm linhas malformadas (as de recuperacao.py), para que a
+# recuperação de erros (p.parser.errok() na regra 'command : error') e o
+# p_error() rodem também em paralelo; p_error() guarda o token, o estado e a
+# altura da pilha lidos do parser compartilhado (parser.state,
+# parser.symstack), que devem ser os da análise da sua thread.
+#
+#     LRParser       parser.parse(texto, lexer)
+#     rastreamento   parser.parse(texto, lexer, tracking=True) (parsedebug())
+#     LRIntParser    o parser com as tabelas de inteiros (tables='array')
+#     modulo         o Parser do módulo gerado por write_module()
+#     alimentar      os pedaços do texto dados a parser.push_parse(lexer),
+#                    com um clone do lexer para cada texto
+#
+# Os resultados das análises no pool devem ser iguais aos da análise de cada
+# texto em sequência.  As threads trocam de vez a cada microssegundo
+# (sys.setswitchinterval()), para que as análises se intercalem o máximo
+# possível.  Mostra o tempo das duas formas (com o GIL as threads não
+# ganham tempo; o que se mede é que o parser pode ser compartilhado).
+#
+# Uso:  python benchmarks/concorrencia.py [textos] [threads]
+# -----------------------------------------------------------------------------
+
+import concurrent.futures
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import types
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+from incremental import PARTIDA
+from recuperacao import MALFORMADAS
+
+PEDACO = 100
+
+# O lexer, o parser e os erros de sintaxe da análise em curso em cada thread
+por_thread = threading.local()
+
+# Regra pura no lugar de uma regra do tatico.py
+def pura(regra):
+    nome = regra.__name__
+    def funcao(p):
+        if nome == 'p_command_error':
+            p.parser.errok()
+            p[0] = ('erro',)
+        else:
+            p[0] = (nome, *p[1:])
+    # A linha de cada regra é mantida: a primeira define o símbolo inicial
+    funcao.__code__ = funcao.__code__.replace(co_firstlineno=regra.__code__.co_firstlineno)
+    funcao.__doc__ = regra.__doc__
+    funcao.__name__ = nome
+    return funcao
+
+def p_error(p):
+    parser = por_thread.parser
+    por_thread.erros.append((p and p.value, p and p.lexpos, parser.state, len(parser.symstack)))
+
+# Módulo com a gramática do tatico.py e as regras puras (as regras @direct
+# do tatico.py já são)
+def gramatica():
+    modulo = types.ModuleType('concorrencia_gramatica')
+    modulo.__file__ = tatico.__file__
+    for nome in dir(tatico):
+        valor = getattr(tatico, nome)
+        if nome.startswith('p_') and nome != 'p_error':
+            if not getattr(valor, 'direct', False):
+                valor = pura(valor)
+        elif nome not in ('tokens', 'precedence'):
+            continue
+        setattr(modulo, nome, valor)
+    modulo.p_error = p_error
+    return modulo
+
+# O Parser do módulo gerado para a gramática (o módulo fica em diretorio)
+def gerar_modulo(parser, modulo, diretorio):
+    caminho = os.path.join(diretorio, 'concorrencia_parser.py')
+    yacc.write_module(parser, caminho, modulo.__name__)
+    spec = importlib.util.spec_from_file_location('concorrencia_parser', caminho)
+    gerado = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gerado)
+    return gerado.Parser(modulo)
+
+def alimentar(parser, texto, lexer):
+    analise = parser.push_parse(lexer)
+    for i in range(0, len(texto), PEDACO):
+        analise.feed(texto[i:i + PEDACO])
+    return analise.end()
+
+# Uma análise com o lexer da thread; devolve a árvore e os erros de sintaxe
+def analisar(forma, parser, lexer_base, texto):
+    if getattr(por_thread, 'lexer', None) is None:
+        por_thread.lexer = lexer_base.clone()
+    lexer = por_thread.lexer
+    lexer.lineno = 1
+    por_thread.parser = parser
+    por_thread.erros = []
+    if forma == 'alimentar':
+        arvore = alimentar(parser, texto, lexer_base.clone())
+    elif forma == 'rastreamento':
+        arvore = parser.parse(texto, lexer, tracking=True)
+    else:
+        arvore = parser.parse(texto, lexer)
+    return arvore, por_thread.erros
+
+# Textos de 1 a 5 partidas, um terço delas com uma linha malformada
+def gerar_textos(quantos):
+    aleatorio = random.Random(1)
+    textos = []
+    for _ in range(quantos):
+        partes = []
+        for _ in range(aleatorio.randint(1, 5)):
+            partida = PARTIDA
+            if aleatorio.random() < 1 / 3:
+                partida = partida.replace(*aleatorio.choice(MALFORMADAS))
+            partes.append(partida)
+        textos.append(''.join(partes))
+    return textos
+
+def main():
+    quantos = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    log = yacc.NullLogger()
+    modulo = gramatica()
+    lexer = lex.lex(module=tatico, lextab=None, errorlog=log)
+    parser = yacc.yacc(module=modulo, tabfile=None, errorlog=log)
+    textos = gerar_textos(quantos)
+    with tempfile.TemporaryDirectory() as diretorio:
+        formas = {
+            'LRParser': parser,
+            'rastreamento': parser,
+            'LRIntParser': yacc.yacc(module=modulo, tabfile=None, errorlog=log, tables='array'),
+            'modulo': gerar_modulo(parser, modulo, diretorio),
+            'alimentar': parser,
+        }
+    print(f'{quantos} textos, {threads} threads')
+
+    print(f'{"forma":<14}{"sequencial (s)":>16}{"threads (s)":>14}{"erros":>8}')
+    intervalo = sys.getswitchinterval()
+    for forma, analisador in formas.items():
+        t0 = time.perf_counter()
+        esperado = [analisar(forma, analisador, lexer, texto) for texto in textos]
+        sequencial = time.perf_counter() - t0
+
+        sys.setswitchinterval(1e-6)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+                t0 = time.perf_counter()
+                obtido = list(pool.map(lambda texto: analisar(forma, analisador, lexer, texto), textos))
+                paralelo = time.perf_counter() - t0
+        finally:
+            sys.setswitchinterval(intervalo)
+
+        assert obtido == esperado, forma
+        erros = sum(len(erros) for _, erros in esperado)
+        print(f'{forma:<14}{sequencial:>16.3f}{paralelo:>14.3f}{erros:>8}')
+        if forma == 'LRParser':
+            referencia = esperado
+        assert esperado == referencia, forma
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# -----------------------------------------------------------------------------
+# benchmarks/erros_lexicos.py
+#
+# Compilação (tatico.compile_text(), com as mensagens impressas) de um arquivo
+# de campeonato corrompido: uma parte das linhas começa com uma sequência de
+# caracteres de lixo (só erros léxicos; os tokens da linha continuam lá).
+# Três maneiras de tratar os erros léxicos:
+#
+#     caractere   um erro (e uma linha impressa) por caractere ilegal, com
+#                 t.lexer.skip(1), como o t_error() dos compiladores fazia
+#     sequencia   Compilador.erro_lexico(): um erro por sequência de
+#                 caracteres ilegais, sem limite de erros
+#     limite      o mesmo, com o limite de erros padrão do Compilador, que
+#                 interrompe a compilação
+#
+# As mensagens são impressas em /dev/null.  Mostra o tempo, o número de erros
+# e se a compilação foi interrompida.
+#
+# Uso:  python benchmarks/erros_lexicos.py [megabytes] [fração das linhas]
+# -----------------------------------------------------------------------------
+
+import contextlib
+import os
+import random
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import tatico
+from tabelas_int import EXEMPLO
+
+LIXO = '$%&@#!?*{}[]<>|~^"\'`=+/\\'
+
+def corromper(texto, fracao, aleatorio):
+    linhas = texto.splitlines(keepends=True)
+    for i in range(len(linhas)):
+        if aleatorio.random() < fracao:
+            linhas[i] = ''.join(aleatorio.choice(LIXO) for _ in range(len(linhas[i]))) + linhas[i]
+    return ''.join(linhas)
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    fracao = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    texto = EXEMPLO * max(1, int(megabytes * 2**20 / len(EXEMPLO)))
+    texto = corromper(texto, fracao, random.Random(1))
+    compilador = tatico.compilador
+    compilador.construir()
+    print(f'{len(texto) / 2**20:.1f} MB, {fracao:.0%} das linhas corrompidas')
+
+    erro_lexico = compilador.erro_lexico
+    limite = compilador.limite_erros
+
+    def por_caractere(t):
+        compilador.erro(f"Caractere ilegal '{t.value[0]}'", t.lexpos)
+        t.lexer.skip(1)
+
+    modos = {
+        'caractere': (por_caractere, None),
+        'sequencia': (erro_lexico, None),
+        'limite': (erro_lexico, limite),
+    }
+    print(f'{"modo":<12}{"tempo (s)":>10}{"erros":>10}{"interrompida":>14}')
+    with open(os.devnull, 'w') as nulo:
+        for nome, (funcao, limite_erros) in modos.items():
+            compilador.erro_lexico = funcao
+            compilador.limite_erros = limite_erros
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(nulo):
+                resultado = tatico.compile_text(texto, eco=True)
+            tempo = time.perf_counter() - t0
+            print(f'{nome:<12}{tempo:>10.2f}{len(resultado["erros"]):>10}'
+                  f'{"sim" if resultado["abortado"] else "não":>14}')
+    compilador.erro_lexico = erro_lexico
+    compilador.limite_erros = limite
+
+if __name__ == '__main__':
+    main()
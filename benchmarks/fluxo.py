@@ -0,0 +1,86 @@
+# -----------------------------------------------------------------------------
+# benchmarks/fluxo.py
+#
+# Memória da tokenização de arquivos grandes de campeonato, lendo o arquivo
+# inteiro (f.read() e Lexer.input()) ou em blocos (Lexer.input_stream()):
+#
+#     tokens       conta os tokens com Lexer.token()
+#     compilacao   tatico.compile_text() (o resultado guarda as saídas de
+#                  todas as partidas, que também ocupam memória)
+#
+# Cada medida é feita em um processo separado, que informa o tempo e o pico
+# de memória residente (ru_maxrss) acima da memória do processo logo antes
+# da tokenização.  Com a leitura em blocos o pico deve ficar constante quando
+# o arquivo cresce.
+#
+# Uso:  python benchmarks/fluxo.py [megabytes ...]
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+MODOS = ('texto', 'fluxo')
+MEDIDAS = ('tokens', 'compilacao')
+
+def gerar_arquivo(caminho, megabytes):
+    from tabelas_int import EXEMPLO
+    bloco = EXEMPLO * 1000
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for _ in range(max(1, int(megabytes * 2**20 / len(bloco)))):
+            f.write(bloco)
+
+def pico_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+# Medida feita no processo filho
+def medir_processo(caminho, modo, medida):
+    import tatico
+
+    lexer, _ = tatico.compilador.construir()
+    base = pico_kb()
+    t0 = time.perf_counter()
+    with open(caminho, encoding='utf-8') as f:
+        fonte = f.read() if modo == 'texto' else f
+        if medida == 'tokens':
+            if modo == 'texto':
+                lexer.input(fonte)
+            else:
+                lexer.input_stream(fonte)
+            for _ in lexer:
+                pass
+        else:
+            tatico.compile_text(fonte)
+    return {'tempo_s': round(time.perf_counter() - t0, 3), 'pico_mb': round((pico_kb() - base) / 1024, 1)}
+
+def main():
+    if sys.argv[1:2] == ['--filho']:
+        print(json.dumps(medir_processo(*sys.argv[2:5])))
+        return
+
+    tamanhos = [float(n) for n in sys.argv[1:]] or [10, 50]
+    print(f'{"arquivo (MB)":>12}  {"medida":<8}' + ''.join(f'{m + " (s)":>12}{m + " (MB)":>14}' for m in MODOS))
+    with tempfile.TemporaryDirectory() as diretorio:
+        for megabytes in tamanhos:
+            caminho = os.path.join(diretorio, 'campeonato.txt')
+            gerar_arquivo(caminho, megabytes)
+            tamanho = os.path.getsize(caminho) / 2**20
+            for medida in MEDIDAS:
+                linha = f'{tamanho:>12.0f}  {medida:<8}'
+                for modo in MODOS:
+                    saida = subprocess.run([sys.executable, os.path.abspath(__file__), '--filho',
+                                            caminho, modo, medida],
+                                           capture_output=True, text=True, check=True).stdout
+                    r = json.loads(saida)
+                    linha += f'{r["tempo_s"]:>12.2f}{r["pico_mb"]:>14.1f}'
+                print(linha)
+
+if __name__ == '__main__':
+    main()
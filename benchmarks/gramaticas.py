@@ -0,0 +1,165 @@
+# -----------------------------------------------------------------------------
+# benchmarks/gramaticas.py
+#
+# Gramáticas sintéticas para os benchmarks.  gerar_fonte(n) produz o código
+# de um módulo com regras t_ e p_ no estilo do tatico.py, com cerca de n
+# produções.  A gramática é formada por blocos de comandos:
+#
+#     command   : CMDi lista_i
+#     lista_i   : lista_i VIRGULA item_i
+#               | item_i
+#     item_i    : NUMERO opcao_i
+#               | NOME
+#               | CMDj lista_j          (j = i - 1, liga os blocos)
+#     opcao_i   : ABRE_PAR lista_i FECHA_PAR
+#               | <empty>
+#
+# e de um comando CALC com expressões resolvidas por precedência, de modo que
+# o cálculo dos lookaheads LALR tenha trabalho de verdade (regras vazias,
+# recursão e conflitos).
+# -----------------------------------------------------------------------------
+
+import importlib.util
+import os
+import sys
+
+PRODUCOES_BASE = 7       # statement (2), CALC (1) e expr (4)
+PRODUCOES_BLOCO = 8
+
+CABECALHO = '''\
+# Gramática sintética com {blocos} blocos de comandos (gerada por gramaticas.py)
+
+tokens = {tokens!r}
+
+reserved = {reserved!r}
+
+t_VIRGULA = r','
+t_ABRE_PAR = r'\\('
+t_FECHA_PAR = r'\\)'
+t_MAIS = r'\\+'
+t_VEZES = r'\\*'
+t_ignore = ' \\t'
+
+def t_NOME(t):
+    r'[a-zA-Z_][a-zA-Z0-9_]*'
+    t.type = reserved.get(t.value, 'NOME')
+    return t
+
+def t_NUMERO(t):
+    r'\\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\\n+'
+    t.lexer.lineno += t.value.count('\\n')
+
+def t_error(t):
+    t.lexer.skip(1)
+
+precedence = (
+    ('left', 'MAIS'),
+    ('left', 'VEZES'),
+)
+
+def p_statement(p):
+    \'\'\'statement : statement command
+                 | command\'\'\'
+    p[0] = p[len(p) - 1]
+
+def p_command_calc(p):
+    'command : CALC expr'
+    p[0] = p[2]
+
+def p_expr_binop(p):
+    \'\'\'expr : expr MAIS expr
+            | expr VEZES expr\'\'\'
+    p[0] = p[1] + p[3] if p[2] == '+' else p[1] * p[3]
+
+def p_expr_group(p):
+    'expr : ABRE_PAR expr FECHA_PAR'
+    p[0] = p[2]
+
+def p_expr_numero(p):
+    'expr : NUMERO'
+    p[0] = p[1]
+
+def p_error(p):
+    pass
+'''
+
+BLOCO = '''
+def p_command_{i}(p):
+    'command : CMD{i} lista_{i}'
+    p[0] = p[2]
+
+def p_lista_{i}_mais(p):
+    'lista_{i} : lista_{i} VIRGULA item_{i}'
+    p[0] = p[1] + [p[3]]
+
+def p_lista_{i}_um(p):
+    'lista_{i} : item_{i}'
+    p[0] = [p[1]]
+
+def p_item_{i}_numero(p):
+    'item_{i} : NUMERO opcao_{i}'
+    p[0] = (p[1], p[2])
+
+def p_item_{i}_nome(p):
+    'item_{i} : NOME'
+    p[0] = p[1]
+
+def p_item_{i}_comando(p):
+    'item_{i} : CMD{j} lista_{j}'
+    p[0] = p[2]
+
+def p_opcao_{i}_lista(p):
+    'opcao_{i} : ABRE_PAR lista_{i} FECHA_PAR'
+    p[0] = p[2]
+
+def p_opcao_{i}_vazia(p):
+    'opcao_{i} :'
+    p[0] = None
+'''
+
+# Número de blocos de comandos para uma gramática de cerca de n produções
+def numero_blocos(n):
+    return max(1, (n - PRODUCOES_BASE) // PRODUCOES_BLOCO)
+
+# Código fonte do módulo da gramática
+def gerar_fonte(n):
+    blocos = numero_blocos(n)
+    comandos = ['CMD%d' % i for i in range(blocos)]
+    tokens = tuple(comandos) + ('CALC', 'NUMERO', 'NOME', 'VIRGULA',
+                                'ABRE_PAR', 'FECHA_PAR', 'MAIS', 'VEZES')
+    reserved = {c.lower(): c for c in comandos + ['CALC']}
+    partes = [CABECALHO.format(blocos=blocos, tokens=tokens, reserved=reserved)]
+    for i in range(blocos):
+        # O primeiro bloco aponta para o último, fechando o ciclo
+        partes.append(BLOCO.format(i=i, j=(i - 1) % blocos))
+    return ''.join(partes)
+
+# Texto de entrada para o parser de uma gramática com n produções
+def gerar_entrada(n, comandos=1000):
+    blocos = numero_blocos(n)
+    linhas = []
+    for k in range(comandos):
+        i = k % blocos
+        j = (i - 1) % blocos
+        if k % 10 == 9:
+            linhas.append('calc 1 + 2 * (3 + %d)' % k)
+        else:
+            linhas.append('cmd%d %d, nome%d, %d (%d, 7), cmd%d 8' % (i, k, k, k + 1, k + 2, j))
+    return '\n'.join(linhas) + '\n'
+
+# Grava o módulo da gramática em diretorio e o importa
+def carregar(n, diretorio):
+    nome = 'gramatica_%d' % n
+    caminho = os.path.join(diretorio, nome + '.py')
+    with open(caminho, 'w') as f:
+        f.write(gerar_fonte(n))
+    spec = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nome] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
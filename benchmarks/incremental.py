@@ -0,0 +1,70 @@
+# -----------------------------------------------------------------------------
+# benchmarks/incremental.py
+#
+# Latência da compilação de um documento do tatico.py editado tecla a tecla,
+# para documentos de tamanhos diferentes:
+#
+#     completa      tatico.compile_text() do texto inteiro a cada edição
+#     incremental   CompilacaoIncremental.editar(): tokeniza as linhas
+#                   atingidas e compila os blocos TIME...VALIDAR que as contêm
+#
+# A edição é a digitação de um nome de jogador no meio do documento, uma
+# tecla por vez (mediana do tempo por tecla).  O resultado das duas é
+# comparado a cada tecla.
+#
+# Uso:  python benchmarks/incremental.py [partidas ...]
+# -----------------------------------------------------------------------------
+
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import tatico
+
+# Uma partida válida para o tatico.py
+PARTIDA = '''TIME Flamengo
+FORMACAO 4-4-2
+GOL: 1(Rossi)
+DEF: 2(Varela), 3(Leo), 4(Ortiz), 6(Ayrton)
+MEI: 5(Pulgar), 8(Gerson), 7(Luiz), 14(Arrascaeta)
+ATA: 9(Pedro), 27(BH)
+VALIDAR
+'''
+
+NOME = ', 99(Adriano)'
+
+def medir(partidas):
+    texto = PARTIDA * partidas
+    # Fim da linha DEF da partida do meio
+    meio = len(PARTIDA) * (partidas // 2)
+    pos = texto.index('\n', texto.index('DEF:', meio))
+
+    doc = tatico.incremental(texto)
+    completa = []
+    incremental = []
+    for n, tecla in enumerate(NOME):
+        t0 = time.perf_counter()
+        resultado = doc.editar(pos + n, pos + n, tecla)
+        incremental.append(time.perf_counter() - t0)
+
+        texto = texto[:pos + n] + tecla + texto[pos + n:]
+        t0 = time.perf_counter()
+        esperado = tatico.compile_text(texto)
+        completa.append(time.perf_counter() - t0)
+        assert resultado == esperado
+    return statistics.median(completa), statistics.median(incremental)
+
+def main():
+    tamanhos = [int(n) for n in sys.argv[1:]] or [100, 1000, 5000]
+    tatico.compilador.construir()
+    print(f'{"partidas":>10}{"completa (ms)":>16}{"incremental (ms)":>19}')
+    for partidas in tamanhos:
+        completa, incremental = medir(partidas)
+        print(f'{partidas:>10}{completa * 1e3:>16.1f}{incremental * 1e3:>19.2f}')
+
+if __name__ == '__main__':
+    main()
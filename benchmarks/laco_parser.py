@@ -0,0 +1,106 @@
+# -----------------------------------------------------------------------------
+# benchmarks/laco_parser.py
+#
+# Vazão do LRParser (tabelas 'dict') na gramática do tatico.py, com cerca de
+# um milhão de tokens de partidas válidas, nos dois laços de análise:
+#
+#     parsedebug         o laço com as opções debug e tracking (desligadas)
+#     parseopt_notrack   o laço especializado que parse() usa sem as opções
+#
+# Os tokens vêm do lexer (texto) ou já tokenizados, de um TokenColumns
+# (colunas), que mede só o parser e as regras da gramática.  Em "vazias" as
+# regras da gramática não fazem nada, o que deixa só o custo do laço (e da
+# leitura das colunas).  Os laços são medidos intercalados (mediana das
+# repetições) e devem dar o mesmo resultado.
+#
+# Uso:  python benchmarks/laco_parser.py [tokens] [repetições]
+# -----------------------------------------------------------------------------
+
+import gc
+import os
+import statistics
+import sys
+import time
+import types
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+from compilador import novo_resultado
+from incremental import PARTIDA
+
+# Módulo com a gramática do tatico.py e regras que não fazem nada
+def regras_vazias():
+    modulo = types.ModuleType('vazias')
+    modulo.__file__ = tatico.__file__
+    for nome in dir(tatico):
+        valor = getattr(tatico, nome)
+        if nome.startswith('p_') and nome != 'p_error' and callable(valor):
+            def regra(p):
+                pass
+            # A linha de cada regra é mantida: a primeira define o símbolo inicial
+            regra.__code__ = regra.__code__.replace(co_firstlineno=valor.__code__.co_firstlineno)
+            regra.__doc__ = valor.__doc__
+            valor = regra
+        elif nome not in ('tokens', 'precedence', 'start', 'p_error'):
+            continue
+        setattr(modulo, nome, valor)
+    return modulo
+
+# Uma análise, sem o coletor de lixo; devolve o tempo e o resultado
+def analisar(parse, entrada, lexer):
+    tatico.limpar_dados()
+    tatico.compilador.resultado = novo_resultado()
+    lexer.lineno = 1
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        parse(entrada, lexer)
+        tempo = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    return tempo, tatico.compilador.resultado
+
+def main():
+    tokens = int(float(sys.argv[1])) if len(sys.argv) > 1 else 1000000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    log = yacc.NullLogger()
+    lexer = lex.lex(module=tatico, lextab=None, errorlog=log)
+    parser = yacc.yacc(module=tatico, tabfile=None, errorlog=log)
+    por_partida = len(lexer.tokenize_all(PARTIDA))
+    texto = PARTIDA * -(-tokens // por_partida)
+    colunas = lexer.tokenize_all(texto)
+    print(f'{len(colunas)} tokens, {len(texto) / 2**20:.1f} MB')
+
+    vazias = yacc.yacc(module=regras_vazias(), tabfile=None, errorlog=log, optimize=True)
+
+    lacos = ('parsedebug', 'parseopt_notrack')
+    entradas = {'texto': (parser, texto), 'colunas': (parser, colunas), 'vazias': (vazias, colunas)}
+    tempos = {(entrada, laco): [] for entrada in entradas for laco in lacos}
+    resultados = []
+    for _ in range(repeticoes):
+        for entrada, (analisador, valor) in entradas.items():
+            for laco in lacos:
+                tempo, resultado = analisar(getattr(analisador, laco), valor, lexer)
+                tempos[entrada, laco].append(tempo)
+                if analisador is parser:
+                    resultados.append(resultado)
+                else:
+                    assert not resultado['erros']
+    assert all(resultado == resultados[0] for resultado in resultados)
+
+    print(f'{"entrada":<10}{"laço":<20}{"tempo (s)":>10}{"tokens/s":>12}')
+    for entrada in entradas:
+        base = statistics.median(tempos[entrada, 'parsedebug'])
+        for laco in lacos:
+            tempo = statistics.median(tempos[entrada, laco])
+            print(f'{entrada:<10}{laco:<20}{tempo:>10.3f}{len(colunas) / tempo:>12.0f}'
+                  f'   ({base / tempo:.2f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# -----------------------------------------------------------------------------
+# benchmarks/lexer_dfa.py
+#
+# Valida o backend DFA do lexer (lex.lex(backend='dfa')) contra o backend de
+# expressões regulares e compara a vazão dos dois.
+#
+# Para tatico.py, taticoinfinito.py, calc.py e uma gramática sintética de
+# gramaticas.py, os dois lexers tokenizam as mesmas entradas (o exemplo de
+# partida repetido e textos aleatórios com nomes acentuados, formações,
+# números, pontuação e caracteres ilegais) e as sequências de tokens (tipo,
+# valor, linha e posição) e as mensagens de erro léxico devem ser idênticas.
+#
+# Uso:  python benchmarks/lexer_dfa.py [entradas_aleatorias]
+# -----------------------------------------------------------------------------
+
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+import gramaticas
+from compilador import novo_resultado
+from tabelas_int import EXEMPLO
+
+BACKENDS = ('regex', 'dfa')
+REPETICOES = 5
+
+# Pedaços usados para montar as entradas aleatórias
+PEDACOS = [
+    'TIME', 'FORMACAO', 'GOL', 'DEF', 'MEI', 'ATA', 'VALIDAR', 'STOP', 'calc', 'cmd1',
+    'Flamengo', 'São', 'João', 'Ávila-Neto', 'Müller', 'x_1', '_', 'a-', 'Ç9',
+    '4-4-2', '4-2-3-1', '10-0-0', '4-4', '4-4-', '1', '27', '007', '12345678901234567890',
+    ':', ',', ';', '(', ')', '=', '+', '-', '*', '/',
+    ' ', ' ', ' ', '\t', '\n', '\n\n',
+    '@', '#', '€', '!', '.', '¿', 'Ā', 'ß',
+]
+
+def entrada_aleatoria(gerador, tamanho):
+    return ''.join(gerador.choice(PEDACOS) for _ in range(tamanho))
+
+# Tokens e mensagens de erro produzidos por um lexer para um texto
+def tokenizar(modulo, lexer, texto):
+    compilador = getattr(modulo, 'compilador', None)
+    if compilador:
+        compilador.resultado = novo_resultado()
+    lexer.input(texto)
+    lexer.lineno = 1
+    with contextlib.redirect_stdout(io.StringIO()) as saida:
+        tokens = [(t.type, t.value, t.lineno, t.lexpos) for t in lexer]
+    erros = compilador.resultado['erros'] if compilador else saida.getvalue()
+    return tokens, erros
+
+# Tokens por segundo (mediana), descartando os tokens
+def vazao(lexer, texto):
+    tempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(REPETICOES):
+            lexer.input(texto)
+            token = lexer.token
+            n = 0
+            t0 = time.perf_counter()
+            while token():
+                n += 1
+            tempos.append(time.perf_counter() - t0)
+    return n / statistics.median(tempos)
+
+def validar(nome, modulo, texto, aleatorias):
+    log = yacc.NullLogger()
+    lexers = [lex.lex(module=modulo, optimize=True, errorlog=log, backend=b) for b in BACKENDS]
+    gerador = random.Random(nome)
+    entradas = [texto] + [entrada_aleatoria(gerador, gerador.randint(1, 400)) for _ in range(aleatorias)]
+
+    ok = True
+    for i, entrada in enumerate(entradas):
+        resultados = [tokenizar(modulo, lexer, entrada) for lexer in lexers]
+        if resultados[0] != resultados[1]:
+            print(f'{nome}: tokens diferentes na entrada {i}: {entrada!r}')
+            ok = False
+            break
+
+    vazoes = [vazao(lexer, texto) for lexer in lexers]
+    print(f'{nome:<18}{"ok" if ok else "ERRO":>6}{len(entradas):>10}' +
+          ''.join(f'{v:>14.0f}' for v in vazoes) + f'{vazoes[1] / vazoes[0]:>9.2f}x')
+    return ok
+
+def main():
+    aleatorias = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    import calc
+    import tatico
+    import taticoinfinito
+
+    print(f'{"gramática":<18}{"tokens":>6}{"entradas":>10}' +
+          ''.join(f'{b + " tok/s":>14}' for b in BACKENDS) + f'{"dfa/regex":>10}')
+    ok = validar('tatico', tatico, EXEMPLO * 2000, aleatorias)
+    ok = validar('taticoinfinito', taticoinfinito, EXEMPLO * 2000, aleatorias) and ok
+    ok = validar('calc', calc, 'x = 3 + 4 * (2 - 1) / -(7 - 5)\n' * 5000, aleatorias) and ok
+    with tempfile.TemporaryDirectory() as diretorio:
+        modulo = gramaticas.carregar(100, diretorio)
+        ok = validar('sintética 100', modulo, gramaticas.gerar_entrada(100, 5000), aleatorias) and ok
+    if not ok:
+        sys.exit('Os backends do lexer produziram tokens diferentes')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# -----------------------------------------------------------------------------
+# benchmarks/objetos.py
+#
+# Memória e vazão dos objetos criados por token e por redução (LexToken,
+# YaccSymbol) em uma entrada do tatico.py com 100 mil jogadores:
+#
+#     tokens     list(lexer): todos os LexToken da entrada
+#     parse      compilação completa (lexer + parser + ações semânticas)
+#
+# Para cada medida mostra o tempo (mediana) e o pico de memória alocada
+# (tracemalloc).  As medidas são feitas em processos separados, com o ply da
+# árvore atual (com e sem o pool de símbolos) e, com --revisao, com o ply de
+# outra revisão do git, para comparação:
+#
+#     python benchmarks/objetos.py --revisao HEAD~1
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+JOGADORES_POR_PARTIDA = 22
+REPETICOES = 5
+
+# Entrada com (pelo menos) n jogadores
+def gerar_entrada(jogadores):
+    # Importado aqui: tabelas_int importa o ply, que no processo filho deve
+    # vir do diretório indicado
+    from tabelas_int import EXEMPLO
+    return EXEMPLO * -(-jogadores // JOGADORES_POR_PARTIDA)
+
+def medir(funcao):
+    tempos = []
+    for _ in range(REPETICOES):
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'tempo_s': round(statistics.median(tempos), 4), 'pico_mb': round(pico / 2**20, 2)}
+
+# Medidas feitas no processo filho, com o ply de sys.path[0]
+def medir_processo(jogadores, pool):
+    import ply.lex as lex
+    import ply.yacc as yacc
+    import tatico
+
+    texto = gerar_entrada(jogadores)
+    log = yacc.NullLogger()
+    lexer = lex.lex(module=tatico, optimize=True, errorlog=log)
+    parser = yacc.yacc(module=tatico, optimize=True, tabfile=None, errorlog=log)
+    if pool:
+        parser.enable_symbol_pool()
+    tatico.compilador.lexer = lexer
+    tatico.compilador.parser = parser
+
+    def tokens():
+        lexer.input(texto)
+        lexer.lineno = 1
+        return list(lexer)
+
+    def parse():
+        tatico.compile_text(texto)
+
+    return {'tokens': medir(tokens), 'parse': medir(parse)}
+
+def executar(jogadores, diretorio_ply, pool=False):
+    comando = [sys.executable, os.path.abspath(__file__), '--filho', diretorio_ply, '-j', str(jogadores)]
+    if pool:
+        comando.append('--pool')
+    saida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+    return json.loads(saida)
+
+def main():
+    opcoes = argparse.ArgumentParser()
+    opcoes.add_argument('-j', '--jogadores', type=int, default=100000)
+    opcoes.add_argument('--revisao', help='revisão do git com o ply de comparação')
+    opcoes.add_argument('--filho', help=argparse.SUPPRESS)
+    opcoes.add_argument('--pool', action='store_true', help=argparse.SUPPRESS)
+    args = opcoes.parse_args()
+
+    if args.filho:
+        sys.path.insert(0, args.filho)
+        print(json.dumps(medir_processo(args.jogadores, args.pool)))
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        casos = []
+        if args.revisao:
+            arquivo = subprocess.run(['git', 'archive', args.revisao, 'ply'], cwd=RAIZ,
+                                     capture_output=True, check=True).stdout
+            subprocess.run(['tar', '-x', '-C', diretorio], input=arquivo, check=True)
+            casos.append((args.revisao, diretorio, False))
+        casos.append(('atual', RAIZ, False))
+        casos.append(('atual + pool', RAIZ, True))
+
+        print(f'{args.jogadores} jogadores, {len(gerar_entrada(args.jogadores)) / 2**20:.1f} MB')
+        print(f'{"ply":<16}{"medida":<8}{"tempo (s)":>10}{"pico (MB)":>11}')
+        for nome, caminho, pool in casos:
+            resultado = executar(args.jogadores, caminho, pool)
+            for medida, valores in resultado.items():
+                print(f'{nome:<16}{medida:<8}{valores["tempo_s"]:>10.3f}{valores["pico_mb"]:>11.1f}')
+
+if __name__ == '__main__':
+    main()
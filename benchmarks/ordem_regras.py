@@ -0,0 +1,90 @@
+# -----------------------------------------------------------------------------
+# benchmarks/ordem_regras.py
+#
+# Vazão do lexer do tatico.py em um arquivo de campeonato, com as regras na
+# ordem normal do PLY (funções pela linha, strings pelo tamanho da regex) e na
+# ordem dada por lex(profile=...), que tenta primeiro as regras que mais casam
+# em uma amostra (aqui, uma cópia de EXEMPLO) sem mudar os tokens:
+#
+#     normal     lex()
+#     perfil     lex(profile=EXEMPLO)
+#
+# Mostra o número médio de alternativas da regex mestre tentadas por token
+# (a regra que casa e as que falham antes dela, contadas com Lexer.profile())
+# e a vazão de token() (iteração sobre o lexer) e de tokenize_all(); a vazão
+# é a mediana de muitas medidas intercaladas.  Confere que os tokens das duas
+# ordens são os mesmos.
+#
+# Uso:  python benchmarks/ordem_regras.py [partidas] [repetições]
+# -----------------------------------------------------------------------------
+
+import gc
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+from tabelas_int import EXEMPLO
+
+# Sem o coletor de lixo, que roda em momentos diferentes em cada medida
+def tempo(funcao):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        funcao()
+        return time.perf_counter() - t0
+    finally:
+        gc.enable()
+
+def main():
+    partidas = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    texto = EXEMPLO * partidas
+    megabytes = len(texto) / 2**20
+    print(f'{partidas} partidas, {megabytes:.1f} MB')
+
+    lexers = {
+        'normal': lex.lex(module=tatico, lextab=None, errorlog=yacc.NullLogger()),
+        'perfil': lex.lex(module=tatico, lextab=None, errorlog=yacc.NullLogger(), profile=EXEMPLO),
+    }
+    contagens = lexers['normal'].profile(texto)
+    print(f'{"":<8}{"alternativas/token":>20}  ordem')
+    for nome, lexer in lexers.items():
+        regras = [r for nomes in lexer.lexstaterenames['INITIAL'] for r in nomes if r]
+        tentadas = sum(contagens.get(r, 0) * (n + 1) for n, r in enumerate(regras))
+        print(f'{nome:<8}{tentadas / sum(contagens.values()):>20.2f}  {" ".join(r[2:] for r in regras)}')
+
+    def tokens(lexer):
+        lexer.input(texto)
+        return [(t.type, t.value) for t in lexer]
+    assert tokens(lexers['normal']) == tokens(lexers['perfil'])
+
+    def iterar(lexer):
+        lexer.input(texto)
+        for _ in lexer:
+            pass
+
+    # As ordens são medidas intercaladas, por causa do ruído da máquina;
+    # vale a mediana dos tempos de cada uma
+    modos = {'token()': iterar, 'tokenize_all()': lambda lexer: lexer.tokenize_all(texto)}
+    tempos = {(modo, nome): [] for modo in modos for nome in lexers}
+    for _ in range(repeticoes):
+        for modo, funcao in modos.items():
+            for nome, lexer in lexers.items():
+                tempos[modo, nome].append(tempo(lambda: funcao(lexer)))
+
+    print(f'{"":<16}{"normal (MB/s)":>15}{"perfil (MB/s)":>15}{"ganho":>8}')
+    for modo in modos:
+        normal = megabytes / statistics.median(tempos[modo, 'normal'])
+        perfil = megabytes / statistics.median(tempos[modo, 'perfil'])
+        print(f'{modo:<16}{normal:>15.2f}{perfil:>15.2f}{perfil / normal - 1:>8.1%}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# -----------------------------------------------------------------------------
+# benchmarks/posicoes.py
+#
+# Custo de saber a linha dos tokens no lexer do tatico.py, com três maneiras
+# de tratar as quebras de linha:
+#
+#     funcao      def t_newline(t) que soma as linhas em lexer.lineno (uma
+#                 chamada de função Python por sequência de quebras)
+#     tokenrule   TokenRule(r'\n+', newlines=True), que conta as linhas sem
+#                 chamar função
+#     indice      '\n' em t_ignore: nada é contado durante a análise; a
+#                 linha e a coluna saem de Lexer.position() (LineIndex)
+#
+# Para o índice também mostra o tempo da primeira consulta de posição no fim
+# da entrada (que encontra todas as quebras de linha) e o tempo médio das
+# consultas seguintes.
+#
+# Uso:  python benchmarks/posicoes.py [partidas]
+# -----------------------------------------------------------------------------
+
+import os
+import random
+import sys
+import time
+import types
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+from tabelas_int import EXEMPLO
+
+REPETICOES = 15
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += t.value.count('\n')
+
+# Módulo com as regras de tokens do tatico.py e o tratamento de linhas dado
+def regras(nome, **extras):
+    modulo = types.ModuleType(nome)
+    modulo.__file__ = tatico.__file__
+    for chave, valor in vars(tatico).items():
+        if chave.startswith('t_') or chave in ('tokens', 'reserved', 'literals'):
+            setattr(modulo, chave, valor)
+    for chave, valor in extras.items():
+        setattr(modulo, chave, valor)
+    return modulo
+
+VARIANTES = {
+    'funcao': regras('funcao', t_ignore=' \t', t_newline=t_newline),
+    'tokenrule': regras('tokenrule', t_ignore=' \t',
+                        t_ignore_newline=lex.TokenRule(r'\n+', newlines=True)),
+    'indice': regras('indice', t_ignore=' \t\n'),
+}
+
+def tempo(funcao):
+    t0 = time.perf_counter()
+    funcao()
+    return time.perf_counter() - t0
+
+def main():
+    partidas = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    texto = EXEMPLO * partidas
+    print(f'{partidas} partidas, {len(texto) / 2**20:.1f} MB, {texto.count(chr(10))} linhas')
+
+    lexers = {nome: lex.lex(module=modulo, lextab=None, errorlog=yacc.NullLogger())
+              for nome, modulo in VARIANTES.items()}
+
+    def tokenizar(lexer):
+        lexer.input(texto)
+        for _ in lexer:
+            pass
+
+    # As variantes são medidas intercaladas, por causa do ruído da máquina;
+    # vale o menor tempo de cada uma
+    tempos = {nome: [] for nome in lexers}
+    for _ in range(REPETICOES):
+        for nome, lexer in lexers.items():
+            tempos[nome].append(tempo(lambda: tokenizar(lexer)))
+    print(f'{"linhas":<12}{"tokenização (s)":>16}')
+    for nome, t in tempos.items():
+        print(f'{nome:<12}{min(t):>16.3f}')
+
+    # Consultas de posição no lexer sem contagem de linhas
+    lexer = lexers['indice']
+    lexer.input(texto)
+    t0 = time.perf_counter()
+    lexer.position(len(texto) - 1)
+    primeira = time.perf_counter() - t0
+    posicoes = [random.randrange(len(texto)) for _ in range(100000)]
+    t0 = time.perf_counter()
+    for pos in posicoes:
+        lexer.position(pos)
+    seguintes = (time.perf_counter() - t0) / len(posicoes)
+    print(f'primeira consulta (fim da entrada): {primeira * 1e3:.1f} ms')
+    print(f'consultas seguintes: {seguintes * 1e6:.2f} us')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# -----------------------------------------------------------------------------
+# benchmarks/recuperacao.py
+#
+# Compilação de um arquivo de partidas do tatico.py em que alguns blocos têm
+# uma linha malformada (parêntese faltando, dois-pontos faltando, um número
+# no nome do time), nas duas formas de tratar os erros de sintaxe:
+#
+#     sem regra      a gramática sem a regra 'command : error': o yacc esvazia
+#                    a pilha e descarta tokens até um que comece um comando,
+#                    e os erros dos três tokens seguintes não são informados
+#     recuperacao    a regra 'command : error' do tatico.py: o comando com
+#                    erro é descartado até o próximo comando e o bloco não é
+#                    validado (veja p_command_error())
+#
+# Mostra o tempo, o número de blocos traduzidos (os blocos sem erro devem ser
+# todos traduzidos, e só eles), de erros e de diagnósticos de sintaxe.  O
+# arquivo sem erros é compilado também, como referência do tempo.
+#
+# Uso:  python benchmarks/recuperacao.py [blocos] [blocos com erro]
+# -----------------------------------------------------------------------------
+
+import gc
+import os
+import random
+import sys
+import time
+import types
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+from compilador import novo_resultado
+from incremental import PARTIDA
+
+# Linhas de PARTIDA e as versões malformadas delas (com duas linhas
+# malformadas seguidas no último caso)
+MALFORMADAS = [
+    ('DEF: 2(Varela), 3(Leo), 4(Ortiz), 6(Ayrton)\n', 'DEF: 2(Varela), 3 Leo), 4(Ortiz), 6(Ayrton)\n'),
+    ('MEI: 5(Pulgar), 8(Gerson), 7(Luiz), 14(Arrascaeta)\n', 'MEI 5(Pulgar), 8(Gerson), 7(Luiz), 14(Arrascaeta)\n'),
+    ('TIME Flamengo\n', 'TIME Flamengo 3\n'),
+    ('GOL: 1(Rossi)\nDEF:', 'GOL: 1(Rossi\nDEF'),
+]
+
+# O p_error() do tatico.py sem a recuperação (só informa o erro)
+def p_error(p):
+    if p:
+        tatico.compilador.erro_sintaxe(f"Erro de sintaxe no token '{p.value}'", p)
+    else:
+        tatico.compilador.erro_sintaxe("Erro de sintaxe no final do arquivo")
+
+# Módulo com a gramática do tatico.py sem a regra de recuperação
+def sem_regra():
+    modulo = types.ModuleType('sem_regra')
+    modulo.__file__ = tatico.__file__
+    for nome in dir(tatico):
+        if (nome.startswith('p_') and nome not in ('p_command_error', 'p_error')
+                or nome in ('tokens', 'precedence')):
+            setattr(modulo, nome, getattr(tatico, nome))
+    modulo.p_error = p_error
+    return modulo
+
+# Uma compilação, sem o coletor de lixo; devolve o tempo e o resultado
+def compilar(parser, lexer, texto):
+    tatico.limpar_dados()
+    tatico.compilador.resultado = novo_resultado()
+    tatico.compilador.limite_erros = None
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        parser.parse(texto, lexer)
+        tempo = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    return tempo, tatico.compilador.resultado
+
+def main():
+    blocos = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    com_erro = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    aleatorio = random.Random(1)
+    quebrados = set(aleatorio.sample(range(blocos), com_erro))
+    partes = []
+    for i in range(blocos):
+        partida = PARTIDA
+        if i in quebrados:
+            partida = partida.replace(*aleatorio.choice(MALFORMADAS))
+        partes.append(partida)
+    texto = ''.join(partes)
+    print(f'{blocos} blocos, {com_erro} com erro')
+
+    log = yacc.NullLogger()
+    lexer = lex.lex(module=tatico, lextab=None, errorlog=log)
+    parsers = {
+        'sem erros': yacc.yacc(module=tatico, tabfile=None, errorlog=log),
+        'sem regra': yacc.yacc(module=sem_regra(), tabfile=None, errorlog=log),
+        'recuperacao': yacc.yacc(module=tatico, tabfile=None, errorlog=log),
+    }
+    print(f'{"forma":<14}{"tempo (s)":>10}{"traduzidos":>12}{"erros":>8}{"diagnósticos":>14}')
+    for forma, parser in parsers.items():
+        tempo, resultado = compilar(parser, lexer, PARTIDA * blocos if forma == 'sem erros' else texto)
+        print(f'{forma:<14}{tempo:>10.3f}{len(resultado["saidas"]):>12}{len(resultado["erros"]):>8}'
+              f'{len(resultado["diagnosticos"]):>14}')
+        if forma == 'sem erros':
+            esperado = [saida for i, saida in enumerate(resultado['saidas']) if i not in quebrados]
+        elif forma == 'recuperacao':
+            assert resultado['saidas'] == esperado
+            assert all(diagnostico['recuperado'] for diagnostico in resultado['diagnosticos'])
+
+if __name__ == '__main__':
+    main()
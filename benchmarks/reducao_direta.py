@@ -0,0 +1,134 @@
+# -----------------------------------------------------------------------------
+# benchmarks/reducao_direta.py
+#
+# Custo das reduções das regras pequenas do tatico.py (jogador,
+# nome_composto, lista_jogadores), que são a maior parte das reduções de uma
+# partida, nas duas formas de regra do yacc:
+#
+#     p[0]      a regra recebe um YaccProduction e atribui p[0]
+#     direta    a regra marcada com @direct recebe os valores do lado direito
+#               e devolve o valor do lado esquerdo (a forma do tatico.py)
+#
+# Os tokens vêm já tokenizados, de um TokenColumns, para medir só o parser e
+# as regras.  As duas formas são medidas intercaladas (mediana das
+# repetições) e devem dar o mesmo resultado.
+#
+# Uso:  python benchmarks/reducao_direta.py [tokens] [repetições]
+# -----------------------------------------------------------------------------
+
+import gc
+import os
+import statistics
+import sys
+import time
+import types
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+from compilador import novo_resultado
+from incremental import PARTIDA
+
+# As regras pequenas escritas com p[0]
+def p_nome_composto_simples(p):
+    'nome_composto : NOME'
+    p[0] = p[1]
+
+def p_nome_composto_recursivo(p):
+    'nome_composto : nome_composto NOME'
+    p[0] = f"{p[1]} {p[2]}"
+
+def p_lista_jogadores(p):
+    '''lista_jogadores : jogador
+                       | jogador VIRGULA lista_jogadores'''
+    if len(p) == 2:
+        p[0] = [p[1]]
+    else:
+        p[0] = [p[1]] + p[3]
+
+def p_jogador(p):
+    'jogador : NUMERO ABRE_PAR nome_composto FECHA_PAR'
+    p[0] = (p[1], p[3])
+
+CLASSICAS = (p_nome_composto_simples, p_nome_composto_recursivo, p_lista_jogadores, p_jogador)
+
+# Módulo com a gramática do tatico.py e as regras pequenas com p[0] (classicas
+# true) ou com @direct; com vazias, as outras regras (os comandos, em que
+# VALIDAR gera o JSON da partida) não fazem nada
+def gramatica(classicas, vazias):
+    modulo = types.ModuleType('classicas' if classicas else 'diretas')
+    modulo.__file__ = tatico.__file__
+    pequenas = {regra.__name__: regra for regra in CLASSICAS}
+    for nome in dir(tatico):
+        valor = getattr(tatico, nome)
+        if nome in pequenas:
+            assert getattr(valor, 'direct', False)
+            if classicas:
+                regra = pequenas[nome]
+                # A linha de cada regra é mantida: a primeira define o símbolo inicial
+                regra.__code__ = regra.__code__.replace(co_firstlineno=valor.__code__.co_firstlineno)
+                valor = regra
+        elif nome.startswith('p_') and nome != 'p_error':
+            if vazias:
+                def regra(p):
+                    pass
+                regra.__code__ = regra.__code__.replace(co_firstlineno=valor.__code__.co_firstlineno)
+                regra.__doc__ = valor.__doc__
+                valor = regra
+        elif nome not in ('tokens', 'precedence', 'start', 'p_error'):
+            continue
+        setattr(modulo, nome, valor)
+    return modulo
+
+# Uma análise, sem o coletor de lixo; devolve o tempo e o resultado
+def analisar(parser, colunas, lexer):
+    tatico.limpar_dados()
+    tatico.compilador.resultado = novo_resultado()
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        parser.parse(colunas, lexer)
+        tempo = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    return tempo, tatico.compilador.resultado
+
+def main():
+    tokens = int(float(sys.argv[1])) if len(sys.argv) > 1 else 1000000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+    log = yacc.NullLogger()
+    lexer = lex.lex(module=tatico, lextab=None, errorlog=log)
+    por_partida = len(lexer.tokenize_all(PARTIDA))
+    colunas = lexer.tokenize_all(PARTIDA * -(-tokens // por_partida))
+
+    print(f'{len(colunas)} tokens')
+
+    # regras: as regras de todos os comandos ou só as regras pequenas
+    formas = ('p[0]', 'direta')
+    parsers = {(regras, forma): yacc.yacc(module=gramatica(forma == 'p[0]', regras == 'pequenas'),
+                                          tabfile=None, errorlog=log)
+               for regras in ('todas', 'pequenas') for forma in formas}
+    tempos = {chave: [] for chave in parsers}
+    resultados = []
+    for _ in range(repeticoes):
+        for (regras, forma), parser in parsers.items():
+            tempo, resultado = analisar(parser, colunas, lexer)
+            tempos[regras, forma].append(tempo)
+            if regras == 'todas':
+                resultados.append(resultado)
+    assert all(resultado == resultados[0] for resultado in resultados)
+    assert not resultados[0]['erros']
+
+    print(f'{"regras":<10}{"forma":<8}{"tempo (s)":>10}{"tokens/s":>12}')
+    for regras, forma in parsers:
+        base = statistics.median(tempos[regras, 'p[0]'])
+        tempo = statistics.median(tempos[regras, forma])
+        print(f'{regras:<10}{forma:<8}{tempo:>10.3f}{len(colunas) / tempo:>12.0f}   ({base / tempo:.2f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# -----------------------------------------------------------------------------
+# benchmarks/startup.py
+#
+# Mede o custo de construção do lexer e do parser dos compiladores táticos
+# nos três modos de inicialização:
+#
+#     validado    lex.lex() / yacc.yacc() com todas as verificações
+#     otimizado   optimize=True (nenhuma verificação da gramática)
+#     cache       tabelas lidas dos arquivos de cache
+#
+# Uso:  python benchmarks/startup.py [repeticoes]
+# -----------------------------------------------------------------------------
+
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+import tatico
+import taticoinfinito
+
+# Constrói o lexer e o parser de um módulo e devolve os tempos (em ms)
+def construir(modulo, optimize=False, lextab=None, tabfile=None):
+    # Sem isso as expressões regulares compiladas na rodada anterior seriam
+    # reaproveitadas pelo cache do módulo re
+    re.purge()
+    log = yacc.NullLogger()
+
+    t0 = time.perf_counter()
+    lex.lex(module=modulo, optimize=optimize, lextab=lextab, errorlog=log)
+    t1 = time.perf_counter()
+    yacc.yacc(module=modulo, optimize=optimize, tabfile=tabfile, errorlog=log)
+    t2 = time.perf_counter()
+    return (t1 - t0) * 1000, (t2 - t1) * 1000
+
+def medir(modulo, repeticoes, **kwargs):
+    tempos = [construir(modulo, **kwargs) for _ in range(repeticoes)]
+    return (statistics.median(t[0] for t in tempos),
+            statistics.median(t[1] for t in tempos))
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    print(f'{"compilador":<16}{"modo":<12}{"lex (ms)":>10}{"yacc (ms)":>11}{"total (ms)":>12}')
+    with tempfile.TemporaryDirectory() as cache:
+        for modulo in (tatico, taticoinfinito):
+            nome = modulo.__name__
+            lextab = os.path.join(cache, nome + '.lextab')
+            tabfile = os.path.join(cache, nome + '.parsetab')
+            # Cria os arquivos de cache antes de medir o modo 'cache'
+            construir(modulo, lextab=lextab, tabfile=tabfile)
+
+            modos = [
+                ('validado', {}),
+                ('otimizado', {'optimize': True}),
+                ('cache', {'optimize': True, 'lextab': lextab, 'tabfile': tabfile}),
+            ]
+            base = None
+            for modo, kwargs in modos:
+                t_lex, t_yacc = medir(modulo, repeticoes, **kwargs)
+                total = t_lex + t_yacc
+                if base is None:
+                    base = total
+                print(f'{nome:<16}{modo:<12}{t_lex:>10.3f}{t_yacc:>11.3f}{total:>12.3f}'
+                      f'   ({base / total:.1f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+# -----------------------------------------------------------------------------
+# benchmarks/suite.py
+#
+# Benchmark de inicialização e construção de tabelas.  Para cada gramática
+# mede, separadamente:
+#
+#     import            importação do módulo (em um processo novo)
+#     lex               lex.lex()
+#     yacc              yacc.yacc() completo (sem cache de tabelas)
+#     reflexao          coleta e validação das regras (ParserReflect)
+#     gramatica         montagem e verificação do objeto Grammar
+#     lr0               conjuntos de itens LR(0)
+#     lalr              lookaheads LALR(1)
+#     tabela            preenchimento das tabelas de ação e goto
+#     primeiro_parse    primeira análise de uma entrada de exemplo
+#
+# As gramáticas são tatico.py, taticoinfinito.py, calc.py e as gramáticas
+# sintéticas de gramaticas.py.  Os resultados (medianas, em milissegundos) são
+# gravados em JSON para comparação entre commits:
+#
+#     python benchmarks/suite.py -o antes.json
+#     ... (alterações) ...
+#     python benchmarks/suite.py -o depois.json --comparar antes.json
+# -----------------------------------------------------------------------------
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+import gramaticas
+
+# Entradas de exemplo para a primeira análise
+ENTRADA_TATICO = '''\
+TIME Flamengo ; Fluminense
+FORMACAO 4-4-2 ; 4-2-3-1
+GOL: 1(Rossi) ; 1(Fabio)
+DEF: 2(Varela),3(Leo),4(Ortiz),6(Ayrton) ; 2(Xavier),3(Thiago),4(Manoel),6(Marcelo)
+MEI: 5(Pulgar),8(Gerson),7(Luiz),14(Arrascaeta) ; 8(Martinelli),5(Andre),10(Ganso),20(Renato)
+ATA: 9(Pedro),27(BH) ; 9(Cano),11(Keno)
+VALIDAR
+'''
+
+ENTRADA_INFINITO = '''\
+TIME Flamengo ; Fluminense
+FORMACAO 4-4-2 ; 4-2-3-1
+GOL: 1(Rossi) ; 1(Fabio)
+DEF: 2(Varela),3(Leo),4(Ortiz),6(Ayrton) ; 2(Xavier),3(Thiago),4(Manoel),6(Marcelo)
+MEI: 5(Pulgar),8(Gerson),7(Luiz),14(Arrascaeta) ; 8(Martinelli),5(Andre),10(Ganso),20(Renato)
+ATA: 9(Pedro),27(BH) ; 9(Cano),11(Keno)
+VALIDAR
+'''
+
+ENTRADA_CALC = 'x = 3 + 4 * (2 - 1) / -(7 - 5)'
+
+# -----------------------------------------------------------------------------
+# Medição das fases de yacc.yacc()
+# -----------------------------------------------------------------------------
+
+# Gerador de tabelas que registra a duração das fases da construção
+def gerador_medido(base):
+    class Gerador(base):
+        def lr0_items(self):
+            t0 = time.perf_counter()
+            C = super().lr0_items()
+            self.tempo_lr0 = time.perf_counter() - t0
+            return C
+
+        def add_lalr_lookaheads(self, C):
+            t0 = time.perf_counter()
+            super().add_lalr_lookaheads(C)
+            self.tempo_lalr = time.perf_counter() - t0
+
+    return Gerador
+
+def dicionario(modulo):
+    return {k: getattr(modulo, k) for k in dir(modulo)}
+
+# Repete as etapas de yacc.yacc(), medindo cada uma.  Devolve os tempos em
+# segundos e o parser construído.
+def fases_yacc(modulo, gerador):
+    log = yacc.NullLogger()
+    tempos = {}
+
+    t0 = time.perf_counter()
+    pinfo = yacc.ParserReflect(dicionario(modulo), log=log)
+    pinfo.get_all()
+    pinfo.signature()
+    pinfo.validate_all()
+    t1 = time.perf_counter()
+    tempos['reflexao'] = t1 - t0
+
+    grammar = yacc.Grammar(pinfo.tokens)
+    for term, assoc, level in pinfo.preclist:
+        grammar.set_precedence(term, assoc, level)
+    for funcname, gram in pinfo.grammar:
+        file, line, prodname, syms = gram
+        grammar.add_production(prodname, syms, funcname, file, line)
+    grammar.set_start(pinfo.start)
+    grammar.undefined_symbols()
+    grammar.unused_terminals()
+    grammar.unused_rules()
+    grammar.find_unreachable()
+    grammar.infinite_cycles()
+    grammar.unused_precedence()
+    t2 = time.perf_counter()
+    tempos['gramatica'] = t2 - t1
+
+    lr = gerador(grammar, log)
+    t3 = time.perf_counter()
+    tempos['lr0'] = lr.tempo_lr0
+    tempos['lalr'] = lr.tempo_lalr
+    tempos['tabela'] = (t3 - t2) - lr.tempo_lr0 - lr.tempo_lalr
+
+    lr.bind_callables(pinfo.pdict)
+    parser = yacc.LRParser(lr, pinfo.error_func)
+    return tempos, parser, len(grammar.Productions) - 1, len(lr.lr_action)
+
+# -----------------------------------------------------------------------------
+# Medição de uma gramática
+# -----------------------------------------------------------------------------
+
+# Tempo de importação do módulo em um processo novo (com o bytecode já em cache)
+def tempo_import(nome, diretorio, repeticoes):
+    codigo = ('import sys, time; sys.path[:0] = %r; t = time.perf_counter(); '
+              'import %s; print(time.perf_counter() - t)' % ([diretorio, RAIZ], nome))
+    tempos = []
+    for i in range(repeticoes + 1):
+        saida = subprocess.run([sys.executable, '-c', codigo], capture_output=True,
+                               text=True, stdin=subprocess.DEVNULL, check=True).stdout
+        if i:
+            tempos.append(float(saida.split()[-1]))
+    return statistics.median(tempos)
+
+def medir(nome, modulo, entrada, diretorio, repeticoes, gerador):
+    amostras = {}
+    def registrar(chave, segundos):
+        amostras.setdefault(chave, []).append(segundos * 1000)
+
+    registrar('import', tempo_import(modulo.__name__, diretorio, max(1, repeticoes // 5)))
+    log = yacc.NullLogger()
+    for _ in range(repeticoes):
+        re.purge()
+        t0 = time.perf_counter()
+        lexer = lex.lex(module=modulo, errorlog=log)
+        t1 = time.perf_counter()
+        yacc.yacc(module=modulo, tabfile=None, errorlog=log)
+        t2 = time.perf_counter()
+        registrar('lex', t1 - t0)
+        registrar('yacc', t2 - t1)
+
+        tempos, parser, producoes, estados = fases_yacc(modulo, gerador)
+        for chave, segundos in tempos.items():
+            registrar(chave, segundos)
+
+        if hasattr(modulo, 'limpar_dados'):
+            modulo.limpar_dados()
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            parser.parse(entrada, lexer=lexer)
+            registrar('primeiro_parse', time.perf_counter() - t0)
+
+    return {
+        'gramatica': nome,
+        'producoes': producoes,
+        'estados': estados,
+        'tempos_ms': {chave: round(statistics.median(v), 4) for chave, v in amostras.items()},
+    }
+
+# -----------------------------------------------------------------------------
+# Execução e comparação
+# -----------------------------------------------------------------------------
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(atual, anterior):
+    antes = {r['gramatica']: r['tempos_ms'] for r in anterior['resultados']}
+    print(f'\nComparação com {anterior["meta"].get("commit")} (depois / antes):')
+    for r in atual['resultados']:
+        if r['gramatica'] not in antes:
+            continue
+        razoes = []
+        for chave, ms in r['tempos_ms'].items():
+            anterior_ms = antes[r['gramatica']].get(chave)
+            if anterior_ms:
+                razoes.append(f'{chave}={ms / anterior_ms:.2f}')
+        print(f'  {r["gramatica"]:<16}' + ' '.join(razoes))
+
+def main():
+    opcoes = argparse.ArgumentParser(description=__doc__)
+    opcoes.add_argument('-o', '--saida', help='arquivo JSON de saída (padrão: stdout)')
+    opcoes.add_argument('-r', '--repeticoes', type=int, default=10)
+    opcoes.add_argument('-p', '--producoes', type=int, nargs='*', default=[100, 1000, 5000],
+                        help='tamanhos das gramáticas sintéticas')
+    opcoes.add_argument('--gerador', choices=['LRIntTable', 'LRTable'], default='LRIntTable')
+    opcoes.add_argument('--comparar', help='JSON de uma execução anterior')
+    args = opcoes.parse_args()
+
+    gerador = gerador_medido(getattr(yacc, args.gerador))
+
+    import calc
+    import tatico
+    import taticoinfinito
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        casos = [('tatico', tatico, ENTRADA_TATICO, RAIZ, args.repeticoes),
+                 ('taticoinfinito', taticoinfinito, ENTRADA_INFINITO, RAIZ, args.repeticoes),
+                 ('calc', calc, ENTRADA_CALC, RAIZ, args.repeticoes)]
+        for n in args.producoes:
+            modulo = gramaticas.carregar(n, diretorio)
+            # As gramáticas grandes levam segundos para construir
+            repeticoes = max(1, min(args.repeticoes, 20000 // n))
+            casos.append((f'sintetica_{n}', modulo, gramaticas.gerar_entrada(n, 200), diretorio, repeticoes))
+
+        for nome, modulo, entrada, caminho, repeticoes in casos:
+            print(f'medindo {nome}...', file=sys.stderr)
+            resultados.append(medir(nome, modulo, entrada, caminho, repeticoes, gerador))
+
+    relatorio = {
+        'meta': {
+            'commit': commit_atual(),
+            'data': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'gerador': args.gerador,
+            'repeticoes': args.repeticoes,
+        },
+        'resultados': resultados,
+    }
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            comparar(relatorio, json.load(f))
+
+if __name__ == '__main__':
+    main()
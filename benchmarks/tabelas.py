@@ -0,0 +1,87 @@
+# -----------------------------------------------------------------------------
+# benchmarks/tabelas.py
+#
+# Compara os dois geradores de tabelas LALR do ply.yacc: LRTable (o gerador
+# original, baseado em objetos LRItem) e LRIntTable (itens como inteiros e
+# lookaheads como bitmasks).  Para cada gramática, verifica que as tabelas de
+# ação e de goto (inclusive a ordem das ações de cada estado), os conflitos
+# encontrados e a saída de depuração (a do parser.out) são idênticos e
+# mostra o tempo de construção de cada um.
+#
+# Uso:  python benchmarks/tabelas.py [producoes ...]
+# -----------------------------------------------------------------------------
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ply.yacc as yacc
+
+import gramaticas
+import tatico
+import taticoinfinito
+
+# Monta o objeto Grammar de um módulo, como yacc.yacc() faria
+def construir_gramatica(modulo):
+    pdict = {k: getattr(modulo, k) for k in dir(modulo)}
+    pinfo = yacc.ParserReflect(pdict, log=yacc.NullLogger())
+    pinfo.get_all()
+    pinfo.get_grammar()
+
+    grammar = yacc.Grammar(pinfo.tokens)
+    for term, assoc, level in pinfo.preclist:
+        grammar.set_precedence(term, assoc, level)
+    for funcname, gram in pinfo.grammar:
+        file, line, prodname, syms = gram
+        grammar.add_production(prodname, syms, funcname, file, line)
+    grammar.set_start(pinfo.start)
+    return grammar
+
+# Constrói as tabelas de uma gramática com o gerador indicado; a saída de
+# depuração vem de uma segunda construção, fora da medida do tempo
+def gerar(modulo, gerador):
+    grammar = construir_gramatica(modulo)
+    t0 = time.perf_counter()
+    lr = gerador(grammar)
+    tempo = time.perf_counter() - t0
+    saida = io.StringIO()
+    gerador(construir_gramatica(modulo), yacc.PlyLogger(saida))
+    tabelas = {
+        'action': lr.lr_action,
+        'ordem': [list(acoes) for acoes in lr.lr_action.values()],
+        'saida': saida.getvalue(),
+        'goto': lr.lr_goto,
+        'sr_conflicts': sorted(lr.sr_conflicts),
+        'rr_conflicts': sorted((st, a.number, b.number) for st, a, b in lr.rr_conflicts),
+        'reduced': [p.reduced for p in grammar.Productions],
+    }
+    return tabelas, tempo
+
+def comparar(nome, modulo):
+    original, t_original = gerar(modulo, yacc.LRTable)
+    inteiro, t_inteiro = gerar(modulo, yacc.LRIntTable)
+    iguais = original == inteiro
+    print(f'{nome:<20}{len(original["action"]):>8}{t_original * 1000:>14.1f}'
+          f'{t_inteiro * 1000:>14.1f}{t_original / t_inteiro:>8.1f}x   '
+          f'{"idênticas" if iguais else "DIFERENTES"}')
+    return iguais
+
+def main():
+    producoes = [int(n) for n in sys.argv[1:]] or [100, 1000]
+
+    print(f'{"gramática":<20}{"estados":>8}{"LRTable (ms)":>14}{"LRIntTable":>14}')
+    ok = comparar('tatico', tatico)
+    ok = comparar('taticoinfinito', taticoinfinito) and ok
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n in producoes:
+            modulo = gramaticas.carregar(n, diretorio)
+            ok = comparar(f'sintética {n}', modulo) and ok
+    if not ok:
+        sys.exit('As tabelas geradas são diferentes')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# -----------------------------------------------------------------------------
+# benchmarks/tabelas_int.py
+#
+# Compara as três representações das tabelas do parser (yacc.yacc(tables=...)):
+#
+#     dict     LRParser, dicionários indexados pelo nome dos símbolos
+#     array    LRIntParser, um array de inteiros por estado
+#     comb     LRIntParser, tabela de ação comprimida em um único array
+#
+# Para cada gramática mostra a memória ocupada pelas tabelas de ação e de goto
+# (medida com tracemalloc) e a vazão do parser em tokens por segundo, e
+# verifica que as três representações produzem o mesmo resultado.
+#
+# Uso:  python benchmarks/tabelas_int.py [producoes ...]
+# -----------------------------------------------------------------------------
+
+import contextlib
+import io
+import os
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+import gramaticas
+from compilador import novo_resultado
+import tatico
+import taticoinfinito
+
+REPRESENTACOES = ('dict', 'array', 'comb')
+
+EXEMPLO = '''\
+TIME Flamengo ; Fluminense
+FORMACAO 4-4-2 ; 4-2-3-1
+GOL: 1(Rossi) ; 1(Fabio)
+DEF: 2(Varela),3(Leo),4(Ortiz),6(Ayrton) ; 2(Xavier),3(Thiago),4(Manoel),6(Marcelo)
+MEI: 5(Pulgar),8(Gerson),7(Luiz),14(Arrascaeta) ; 8(Martinelli),5(Andre),10(Ganso),20(Renato)
+ATA: 9(Pedro),27(BH) ; 9(Cano),11(Keno)
+VALIDAR
+'''
+
+# Memória (em bytes) alocada para criar as tabelas de uma representação
+def memoria_tabelas(parser, tables, pinfo_tokens):
+    lr = yacc.LRCachedTable(parser.productions, parser.action, parser.goto, parser.defaulted_states)
+    tracemalloc.start()
+    try:
+        if tables == 'dict':
+            # Uma cópia independente dos dicionários de ação e de goto
+            tabelas = pickle.loads(pickle.dumps((lr.lr_action, lr.lr_goto)))
+        else:
+            tabelas = yacc.LRIntParser(lr, None, pinfo_tokens, compress=(tables == 'comb'))
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+# Tokens por segundo na análise de texto (mediana de repeticoes)
+def vazao(modulo, parser, texto, repeticoes):
+    lexer = lex.lex(module=modulo, optimize=True, errorlog=yacc.NullLogger())
+    lexer.input(texto)
+    ntokens = sum(1 for _ in lexer)
+
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        if hasattr(modulo, 'limpar_dados'):
+            modulo.limpar_dados()
+        # Os compiladores táticos guardam as saídas no resultado do Compilador
+        compilador = getattr(modulo, 'compilador', None)
+        if compilador:
+            compilador.resultado = novo_resultado()
+        lexer.lineno = 1
+        with contextlib.redirect_stdout(io.StringIO()) as saida:
+            t0 = time.perf_counter()
+            valor = parser.parse(texto, lexer=lexer)
+            tempos.append(time.perf_counter() - t0)
+        resultado = (repr(valor), saida.getvalue(), repr(compilador and compilador.resultado))
+    return ntokens / statistics.median(tempos), resultado
+
+def medir(nome, modulo, texto, repeticoes):
+    log = yacc.NullLogger()
+    pdict = {k: getattr(modulo, k) for k in dir(modulo)}
+    pinfo = yacc.ParserReflect(pdict, log=log)
+    pinfo.get_all()
+
+    base = None
+    resultados = set()
+    for tables in REPRESENTACOES:
+        parser = yacc.yacc(module=modulo, tabfile=None, optimize=True, errorlog=log, tables=tables)
+        if tables == 'dict':
+            dicionarios = parser
+        memoria = memoria_tabelas(dicionarios, tables, pinfo.tokens)
+        tokens_s, resultado = vazao(modulo, parser, texto, repeticoes)
+        resultados.add(resultado)
+        if base is None:
+            base = tokens_s
+        print(f'{nome:<20}{tables:<8}{memoria / 1024:>12.1f}{tokens_s:>14.0f}   ({tokens_s / base:.2f}x)')
+    return len(resultados) == 1
+
+def main():
+    producoes = [int(n) for n in sys.argv[1:]] or [100, 1000]
+
+    print(f'{"gramática":<20}{"tabelas":<8}{"memória (KiB)":>12}{"tokens/s":>14}')
+    ok = medir('tatico', tatico, EXEMPLO * 200, 5)
+    ok = medir('taticoinfinito', taticoinfinito, EXEMPLO * 200, 5) and ok
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n in producoes:
+            modulo = gramaticas.carregar(n, diretorio)
+            ok = medir(f'sintética {n}', modulo, gramaticas.gerar_entrada(n, 5000), 5) and ok
+    if not ok:
+        sys.exit('As representações das tabelas produziram resultados diferentes')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -----------------------------------------------------------------------------
+# benchmarks/tokenizacao.py
+#
+# Compara a tokenização token a token (Lexer.token(), um LexToken por token,
+# descartando ou guardando os tokens) com a tokenização em colunas
+# (Lexer.tokenize_all()) em um arquivo de campeonato de vários megabytes, e a
+# análise a partir do texto com a análise a partir das colunas.  Verifica
+# também que as duas formas produzem os mesmos tokens.
+#
+# Uso:  python benchmarks/tokenizacao.py [megabytes]
+# -----------------------------------------------------------------------------
+
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+import tatico
+from compilador import novo_resultado
+from tabelas_int import EXEMPLO
+
+REPETICOES = 5
+
+def mediana(funcao):
+    tempos = []
+    for _ in range(REPETICOES):
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+    return statistics.median(tempos)
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    texto = EXEMPLO * int(megabytes * 2**20 / len(EXEMPLO))
+    log = yacc.NullLogger()
+    lexer = lex.lex(module=tatico, optimize=True, errorlog=log)
+
+    # Os mesmos tokens nas duas formas
+    lexer.input(texto)
+    esperados = [(t.type, t.value, t.lineno, t.lexpos) for t in lexer]
+    lexer.lineno = 1
+    colunas = lexer.tokenize_all(texto)
+    if esperados != [(t.type, t.value, t.lineno, t.lexpos) for t in colunas]:
+        sys.exit('tokenize_all() produziu tokens diferentes de token()')
+    ntokens = len(colunas)
+
+    def por_token():
+        lexer.input(texto)
+        for _ in lexer:
+            pass
+
+    # Guardando os tokens, como a tokenização em colunas faz
+    def lista_tokens():
+        lexer.input(texto)
+        return list(lexer)
+
+    def em_colunas():
+        lexer.tokenize_all(texto)
+
+    print(f'{len(texto) / 2**20:.1f} MB, {ntokens} tokens')
+    print(f'{"":<28}{"tempo (s)":>10}{"tokens/s":>14}')
+    base = None
+    for nome, funcao in (('lexer.token()', por_token), ('list(lexer)', lista_tokens),
+                         ('lexer.tokenize_all()', em_colunas)):
+        tempo = mediana(funcao)
+        base = base or tempo
+        print(f'{nome:<28}{tempo:>10.3f}{ntokens / tempo:>14.0f}   ({base / tempo:.2f}x)')
+
+    # Análise completa: a partir do texto e a partir das colunas
+    parser = yacc.yacc(module=tatico, optimize=True, tabfile=None, errorlog=log, tables='array')
+
+    def analisar(entrada):
+        def funcao():
+            tatico.limpar_dados()
+            tatico.compilador.resultado = novo_resultado()
+            tatico.compilador.limite_erros = None
+            lexer.lineno = 1
+            if entrada is None:
+                parser.parse(texto, lexer=lexer)
+            else:
+                parser.parse(lexer.tokenize_all(texto), lexer=lexer)
+        return funcao
+
+    base = None
+    for nome, funcao in (('parse(texto)', analisar(None)), ('parse(tokenize_all(texto))', analisar(True))):
+        tempo = mediana(funcao)
+        base = base or tempo
+        print(f'{nome:<28}{tempo:>10.3f}{ntokens / tempo:>14.0f}   ({base / tempo:.2f}x)')
+
+if __name__ == '__main__':
+    main()
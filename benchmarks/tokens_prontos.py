@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+# benchmarks/tokens_prontos.py
+#
+# Nova análise de um texto do tatico.py cujos tokens já estão guardados (em
+# um cache, ou vindos de um lexer em outro processo), comparada à análise a
+# partir do texto:
+#
+#     texto      parser.parse(texto): o lexer e o parser
+#     colunas    parser.parse_tokens(colunas), colunas = lexer.tokenize_all(texto)
+#     lista      parser.parse_tokens(tokens), tokens = list(lexer)
+#
+# O texto tem erros de sintaxe espalhados, para conferir que p_error()
+# recebe os mesmos tokens nas três formas: os resultados (com as mensagens de
+# erro) devem ser iguais.  Mediana das repetições, medidas intercaladas.
+#
+# Uso:  python benchmarks/tokens_prontos.py [partidas] [repetições]
+# -----------------------------------------------------------------------------
+
+import gc
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+from compilador import novo_resultado
+from incremental import PARTIDA
+
+# Uma partida com um erro de sintaxe (vírgula sobrando)
+COM_ERRO = PARTIDA.replace('3(Leo), ', '3(Leo),, ')
+
+# Uma análise, sem o coletor de lixo; devolve o tempo e o resultado
+def analisar(funcao):
+    tatico.limpar_dados()
+    tatico.compilador.resultado = novo_resultado()
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        funcao()
+        tempo = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    return tempo, tatico.compilador.resultado
+
+def main():
+    partidas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    log = yacc.NullLogger()
+    lexer = lex.lex(module=tatico, lextab=None, errorlog=log)
+    parser = yacc.yacc(module=tatico, tabfile=None, errorlog=log)
+    texto = (PARTIDA * 99 + COM_ERRO) * (partidas // 100)
+    colunas = lexer.tokenize_all(texto)
+    lexer.input(texto)
+    tokens = list(lexer)
+    print(f'{partidas} partidas, {len(tokens)} tokens')
+
+    def do_texto():
+        lexer.lineno = 1
+        parser.parse(texto, lexer)
+
+    formas = {
+        'texto': do_texto,
+        'colunas': lambda: parser.parse_tokens(colunas, lexer),
+        'lista': lambda: parser.parse_tokens(tokens, lexer),
+    }
+    tempos = {forma: [] for forma in formas}
+    resultados = []
+    for _ in range(repeticoes):
+        for forma, funcao in formas.items():
+            tempo, resultado = analisar(funcao)
+            tempos[forma].append(tempo)
+            resultados.append(resultado)
+    assert all(resultado == resultados[0] for resultado in resultados)
+    sintaxe = [erro for erro in resultados[0]['erros'] if erro.startswith('Erro de sintaxe')]
+    assert len(sintaxe) == partidas // 100
+
+    print(f'{"forma":<10}{"tempo (s)":>10}{"tokens/s":>12}')
+    base = statistics.median(tempos['texto'])
+    for forma in formas:
+        tempo = statistics.median(tempos[forma])
+        print(f'{forma:<10}{tempo:>10.3f}{len(tokens) / tempo:>12.0f}   ({base / tempo:.2f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# -----------------------------------------------------------------------------
+# benchmarks/valores.py
+#
+# Alocações por token do lexer em uma entrada grande do tatico.py.  Os tokens
+# de regras de texto e de TokenRule guardam só a posição do valor na entrada
+# (LexSpanToken) e o valor é feito quando é lido; a comparação é com o ply de
+# outra revisão do git, que faz o valor de todo token:
+#
+#     tokens       list(lexer): todos os tokens da entrada
+#     compilacao   tatico.compile_text(), guardando os tokens vistos pelo
+#                  parser (com os valores que as ações leram)
+#
+# Para cada medida mostra o tempo (mediana, sem guardar os tokens), os blocos
+# de memória (sys.getallocatedblocks) e os bytes (tracemalloc) que ficam
+# alocados por token e, na compilação, a fração dos valores que foram feitos.
+#
+#     python benchmarks/valores.py --revisao HEAD~1
+# -----------------------------------------------------------------------------
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+REPETICOES = 5
+
+def tempo(funcao):
+    tempos = []
+    for _ in range(REPETICOES):
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+    return round(statistics.median(tempos), 4)
+
+# Blocos e bytes que ficam alocados na lista de tokens devolvida por funcao()
+def alocacoes(funcao):
+    gc.collect()
+    gc.disable()
+    blocos = sys.getallocatedblocks()
+    tracemalloc.start()
+    tokens = funcao()
+    atual = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    blocos = sys.getallocatedblocks() - blocos
+    gc.enable()
+    n = len(tokens)
+    feitos = sum(getattr(t, 'lexsize', None) is None for t in tokens)
+    return {'blocos': round(blocos / n, 2), 'bytes': round(atual / n, 1), 'feitos': round(feitos / n, 3)}
+
+# Medidas feitas no processo filho, com o ply de sys.path[0]
+def medir_processo(partidas):
+    import ply.lex as lex
+    import ply.yacc as yacc
+    import tatico
+    from tabelas_int import EXEMPLO
+
+    texto = EXEMPLO * partidas
+    log = yacc.NullLogger()
+    lexer = lex.lex(module=tatico, optimize=True, errorlog=log)
+    parser = yacc.yacc(module=tatico, optimize=True, tabfile=None, errorlog=log)
+    tatico.compilador.lexer = lexer
+    tatico.compilador.parser = parser
+
+    def tokens():
+        lexer.input(texto)
+        lexer.lineno = 1
+        return list(lexer)
+
+    # Compila guardando os tokens entregues ao parser
+    def compilacao():
+        vistos = []
+        token = lex.Lexer.token
+
+        def guardar(self):
+            tok = token(self)
+            if tok is not None:
+                vistos.append(tok)
+            return tok
+
+        lex.Lexer.token = guardar
+        try:
+            tatico.compile_text(texto)
+        finally:
+            lex.Lexer.token = token
+        return vistos
+
+    resultado = {'tokens': alocacoes(tokens), 'compilacao': alocacoes(compilacao)}
+    resultado['tokens']['tempo_s'] = tempo(lambda: sum(1 for _ in tokens()))
+    resultado['compilacao']['tempo_s'] = tempo(lambda: tatico.compile_text(texto))
+    return resultado
+
+def executar(partidas, diretorio_ply):
+    comando = [sys.executable, os.path.abspath(__file__), '--filho', diretorio_ply, '-p', str(partidas)]
+    saida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+    return json.loads(saida)
+
+def main():
+    opcoes = argparse.ArgumentParser()
+    opcoes.add_argument('-p', '--partidas', type=int, default=2000)
+    opcoes.add_argument('--revisao', help='revisão do git com o ply de comparação')
+    opcoes.add_argument('--filho', help=argparse.SUPPRESS)
+    args = opcoes.parse_args()
+
+    if args.filho:
+        sys.path.insert(0, args.filho)
+        print(json.dumps(medir_processo(args.partidas)))
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        casos = []
+        if args.revisao:
+            arquivo = subprocess.run(['git', 'archive', args.revisao, 'ply'], cwd=RAIZ,
+                                     capture_output=True, check=True).stdout
+            subprocess.run(['tar', '-x', '-C', diretorio], input=arquivo, check=True)
+            casos.append((args.revisao, diretorio))
+        casos.append(('atual', RAIZ))
+
+        print(f'{args.partidas} partidas')
+        print(f'{"ply":<10}{"medida":<12}{"tempo (s)":>10}{"blocos/token":>14}{"bytes/token":>13}{"feitos":>8}')
+        for nome, caminho in casos:
+            for medida, v in executar(args.partidas, caminho).items():
+                print(f'{nome:<10}{medida:<12}{v["tempo_s"]:>10.3f}{v["blocos"]:>14.2f}{v["bytes"]:>13.1f}'
+                      f'{v["feitos"]:>8.0%}')
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import os
 from ply import lex
 from ply import yacc
 # -----------------------------------------------------------------------------
@@ -23,11 +24,7 @@ def t_NUMBER(t):
     t.value = int(t.value)
     return t
 
-t_ignore = " \t"
-
-def t_newline(t):
-    r'\n+'
-    t.lexer.lineno += t.value.count("\n")
+t_ignore = " \t\n"
 
 def t_error(t):
     print("Illegal character '%s'" % t.value[0])
@@ -35,7 +32,7 @@ def t_error(t):
 
 # Build the lexer
 import ply.lex as lex
-lexer = lex.lex()
+lexer = lex.lex(lextab=os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__', 'calc.lextab'))
 
 # Parsing rules
 
@@ -104,13 +101,14 @@ def p_error(p):
         print("Syntax error at EOF")
 
 import ply.yacc as yacc
-parser = yacc.yacc()
-
-while True:
-    try:
-        s = input('calc > ')
-    except EOFError:
-        break
-    if not s:
-        continue
-    yacc.parse(s)
\ No newline at end of file
+parser = yacc.yacc(tabfile=os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__', 'calc.parsetab'))
+
+if __name__ == '__main__':
+    while True:
+        try:
+            s = input('calc > ')
+        except EOFError:
+            break
+        if not s:
+            continue
+        yacc.parse(s)
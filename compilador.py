@@ -0,0 +1,591 @@
+# -----------------------------------------------------------------------------
+# compilador.py
+#
+# Infraestrutura comum aos compiladores táticos (tatico.py e taticoinfinito.py).
+#
+# Os módulos dos compiladores só definem a gramática e as ações semânticas.
+# Esta classe cuida do resto: constrói o lexer e o parser na primeira vez que
+# forem necessários (opcionalmente em uma thread de fundo), executa a
+# compilação de um texto e junta as mensagens e saídas em um resultado.
+#
+# Para implantação, o parser pode ser gerado como um módulo Python com as
+# tabelas prontas (veja Compilador.gerar_parser()).  Se o módulo gerado
+# existir e corresponder ao fonte atual da gramática e à versão do ply, ele é
+# usado no lugar de yacc.yacc(); senão, é gerado de novo.
+# -----------------------------------------------------------------------------
+
+import bisect
+import copy
+import hashlib
+import itertools
+import mmap
+import os
+import sys
+import threading
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+# Estrutura devolvida por compile_text()
+def novo_resultado():
+    return {
+        'saidas': [],     # Objetos JSON gerados por cada VALIDAR bem sucedido
+        'mensagens': [],  # Tudo o que o compilador emitiu, na ordem
+        'erros': [],      # Erros léxicos, sintáticos e semânticos (no máximo limite_erros)
+        'diagnosticos': [], # Os erros de sintaxe, como dicionários (veja Compilador.erro_sintaxe())
+        'parar': False,   # True se o comando STOP foi encontrado
+        'abortado': False # True se a compilação foi interrompida por excesso de erros
+    }
+
+# Interrompe a compilação quando o limite de erros é ultrapassado
+class CompilacaoAbortada(Exception):
+    pass
+
+# Mostra no máximo este número de caracteres de uma sequência de caracteres
+# ilegais
+TRECHO_ILEGAL = 20
+
+class Compilador:
+    def __init__(self, modulo, nome):
+        self.modulo = modulo          # Módulo com as regras t_ e p_
+        self.nome = nome              # Nome usado para os arquivos de cache
+        self.lexer = None
+        self.parser = None
+        self.resultado = novo_resultado()
+        self.eco = False              # Imprime as mensagens assim que são emitidas
+        self.arquivo = None           # Arquivo sendo compilado (para as posições dos erros)
+        # Número de erros a partir do qual a compilação é interrompida (None:
+        # sem limite).  Os erros ficam em resultado['erros'], que assim nunca
+        # passa de limite_erros mensagens, mais a de interrupção.
+        self.limite_erros = 1000
+        # Amostra de entrada típica: as regras do lexer que mais casam nela são
+        # tentadas primeiro (lex(profile=...)).  A ordem fica no cache do lexer.
+        self.perfil = None
+        # Em produção (python -O) a gramática não é verificada de novo a cada
+        # construção das tabelas
+        self.otimizar = not __debug__
+        self._construcao = threading.Lock()
+        self._compilacao = threading.Lock()
+        self._aquecimento = None
+        self._lexer_fluxo = None
+        self._diagnostico = None      # Diagnóstico do erro de sintaxe sendo recuperado
+
+    # Diretório onde ficam os caches das tabelas do analisador
+    def diretorio_cache(self):
+        return os.path.join(os.path.dirname(os.path.abspath(self.modulo.__file__)), '__pycache__')
+
+    # Nome e caminho do módulo do parser gerado
+    def modulo_parser(self):
+        nome = self.nome + '_parser'
+        return nome, os.path.join(os.path.dirname(os.path.abspath(self.modulo.__file__)), nome + '.py')
+
+    # Identifica a versão do fonte da gramática para a qual o parser foi gerado
+    def assinatura(self):
+        with open(self.modulo.__file__, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    # Gera o módulo do parser (nome_parser.py, ao lado do módulo da gramática)
+    def gerar_parser(self):
+        nome, caminho = self.modulo_parser()
+        parser = yacc.yacc(module=self.modulo, tabfile=None)
+        yacc.write_module(parser, caminho, self.nome, self.assinatura())
+        return caminho
+
+    # Devolve o parser do módulo gerado, ou None se ele não existir.  Um
+    # módulo gerado para outra versão da gramática ou por outra versão do
+    # ply (o módulo usa os internos de ply.yacc) é gerado de novo, para a
+    # próxima execução; desta vez as tabelas vêm de yacc.yacc().
+    def carregar_parser(self):
+        nome, caminho = self.modulo_parser()
+        if not os.path.exists(caminho):
+            return None
+        gerado = yacc.read_module(nome, self.assinatura())
+        if gerado is None:
+            sys.modules.pop(nome, None)
+            self.gerar_parser()
+            return None
+        return gerado.Parser(self.modulo)
+
+    # Constrói o lexer e o parser (uma única vez)
+    def construir(self):
+        with self._construcao:
+            if self.parser is None:
+                cache = self.diretorio_cache()
+                lexer = lex.lex(module=self.modulo, optimize=self.otimizar, profile=self.perfil,
+                                lextab=os.path.join(cache, self.nome + '.lextab'))
+                parser = self.carregar_parser()
+                if parser is None:
+                    parser = yacc.yacc(module=self.modulo, optimize=self.otimizar,
+                                       tabfile=os.path.join(cache, self.nome + '.parsetab'))
+                self.parser = parser
+                self.lexer = lexer
+        return self.lexer, self.parser
+
+    # Constrói o lexer e o parser em uma thread de fundo, para que a primeira
+    # compilação não pague o custo de construção das tabelas
+    def warm_up(self):
+        with self._construcao:
+            if self.parser is None and self._aquecimento is None:
+                self._aquecimento = threading.Thread(target=self.construir,
+                                                     name=f'{self.nome}-warm-up', daemon=True)
+                self._aquecimento.start()
+        return self._aquecimento
+
+    # Registra uma mensagem do compilador no resultado corrente
+    def emitir(self, msg):
+        self.resultado['mensagens'].append(msg)
+        if self.eco:
+            print(msg)
+
+    # Registra um erro (que também é emitido como mensagem).  lexpos é a
+    # posição do erro na entrada: ao compilar um arquivo, a mensagem começa
+    # com arquivo:linha:coluna, calculadas pelo lexer só neste momento.
+    def erro(self, msg, lexpos=None):
+        if lexpos is not None and self.arquivo is not None:
+            linha, coluna = self.lexer.position(lexpos)
+            msg = f'{self.arquivo}:{linha}:{coluna}: {msg}'
+        erros = self.resultado['erros']
+        erros.append(msg)
+        self.emitir(msg)
+        if self.limite_erros is not None and len(erros) >= self.limite_erros:
+            msg = f'Muitos erros ({len(erros)}): compilação interrompida'
+            erros.append(msg)
+            self.emitir(msg)
+            self.resultado['abortado'] = True
+            raise CompilacaoAbortada(msg)
+
+    # Erro de sintaxe, para p_error().  Além da mensagem, registra em
+    # resultado['diagnosticos'] o tipo e o valor do token do erro (None no
+    # fim da entrada) e, ao compilar um arquivo, a posição dele, como erro();
+    # 'recuperado' fica True quando a análise é retomada no comando seguinte
+    # (veja recuperar(); com alimentar(), talvez depois que o resultado com o
+    # erro foi devolvido).
+    def erro_sintaxe(self, msg, token=None):
+        diagnostico = {
+            'mensagem': msg,
+            'token': None if token is None else token.type,
+            'valor': None if token is None else token.value,
+            'arquivo': self.arquivo,
+            'linha': None,
+            'coluna': None,
+            'recuperado': False,
+        }
+        lexpos = None if token is None else token.lexpos
+        if lexpos is not None and self.arquivo is not None:
+            diagnostico['linha'], diagnostico['coluna'] = self.lexer.position(lexpos)
+        self.resultado['diagnosticos'].append(diagnostico)
+        self._diagnostico = diagnostico
+        self.erro(msg, lexpos)
+
+    # Recuperação de um erro de sintaxe, para a regra 'command : error' da
+    # gramática.  O parser descarta os tokens do comando com erro até o
+    # começo do comando seguinte (um TIME, um VALIDAR, o começo de uma
+    # linha), e a regra é reduzida ali; a partir daí os erros voltam a ser
+    # informados, sem a espera de três tokens do yacc.  Limpar a memória
+    # semântica do bloco cabe à regra.
+    def recuperar(self, p):
+        p.parser.errok()
+        if self._diagnostico is not None:
+            self._diagnostico['recuperado'] = True
+            self._diagnostico = None
+
+    # Erro léxico, para t_error(): a sequência inteira de caracteres ilegais
+    # vira um único erro e é pulada pelo lexer
+    def erro_lexico(self, t):
+        lexer = t.lexer
+        trecho = lexer.illegal_run()
+        lexer.skip(len(trecho))
+        if len(trecho) == 1:
+            msg = f"Caractere ilegal '{trecho}'"
+        elif len(trecho) <= TRECHO_ILEGAL:
+            msg = f"{len(trecho)} caracteres ilegais '{trecho}'"
+        else:
+            msg = f"{len(trecho)} caracteres ilegais '{trecho[:TRECHO_ILEGAL]}...'"
+        # t.lexpos é relativo à janela do lexer com input_stream()
+        self.erro(msg, lexer.lexoffset + t.lexpos)
+
+    # Compila um texto e devolve o resultado.  Com reiniciar=False a memória
+    # semântica (times em construção) é preservada entre as chamadas, como no
+    # modo interativo, onde cada linha é compilada separadamente.
+    #
+    # A fonte também pode ser um arquivo aberto ou um iterador de textos: o
+    # lexer lê a entrada em blocos, sem carregá-la inteira na memória.  Ou
+    # ainda bytes, bytearray, memoryview ou mmap, lidos como Latin-1: com um
+    # mmap o arquivo é tokenizado sem ser lido nem decodificado por inteiro.
+    def compile_text(self, fonte, eco=False, reiniciar=True):
+        lexer, parser = self.construir()
+        with self._compilacao:
+            self.resultado = novo_resultado()
+            self.eco = eco
+            if reiniciar:
+                self.modulo.limpar_dados()
+                lexer.lineno = 1
+            try:
+                if isinstance(fonte, (str, bytes, bytearray, memoryview, mmap.mmap)):
+                    parser.parse(fonte, lexer=lexer)
+                else:
+                    lexer.input_stream(fonte, lines=self.arquivo is not None)
+                    parser.parse(lexer=lexer)
+            except CompilacaoAbortada:
+                pass
+            finally:
+                self.eco = False
+            return self.resultado
+
+    # Compila um texto que chega aos poucos (linhas digitadas, leituras de um
+    # socket).  O parser guarda o estado entre as chamadas, sem reiniciar a
+    # análise nem guardar o texto: um bloco TIME...VALIDAR pode chegar em
+    # muitas partes, cortadas até no meio de uma linha, e a memória não
+    # cresce com o número de blocos.  Devolve um resultado novo, com o que o
+    # texto dado completou.  Com fim_de_linha=True (o modo interativo), o que
+    # já pode terminar ali é compilado sem esperar pelo token seguinte; um
+    # comando incompleto continua na próxima chamada.  terminar() indica o
+    # fim da entrada.  A memória semântica é preservada, como em
+    # compile_text(reiniciar=False).
+    def alimentar(self, texto, eco=False, fim_de_linha=False):
+        lexer, parser = self.construir()
+        with self._compilacao:
+            if self._lexer_fluxo is None:
+                # Um lexer só para o fluxo, que compile_text() não reinicia
+                self._lexer_fluxo = lexer.clone()
+            self.resultado = novo_resultado()
+            self.eco = eco
+            try:
+                parser.feed(texto, self._lexer_fluxo)
+                if fim_de_linha:
+                    parser.flush()
+            except CompilacaoAbortada:
+                pass
+            finally:
+                self.eco = False
+            return self.resultado
+
+    def terminar(self, eco=False):
+        lexer, parser = self.construir()
+        with self._compilacao:
+            self.resultado = novo_resultado()
+            self.eco = eco
+            try:
+                parser.end()
+            except CompilacaoAbortada:
+                pass
+            finally:
+                self.eco = False
+            return self.resultado
+
+    # Compilação incremental de um texto editado aos poucos (veja
+    # CompilacaoIncremental)
+    def incremental(self, texto=''):
+        return CompilacaoIncremental(self, texto)
+
+    # Compila arquivos inteiros, imprimindo as mensagens
+    def compile_files(self, caminhos):
+        for caminho in caminhos:
+            self.arquivo = caminho
+            try:
+                with open(caminho, encoding='utf-8') as f:
+                    resultado = self.compile_text(f, eco=True)
+            finally:
+                self.arquivo = None
+            if resultado['parar']:
+                break
+
+    # Laço interativo: cada linha digitada é compilada e o resultado impresso
+    def repl(self, prompt):
+        while True:
+            try:
+                s = input(prompt)
+            except EOFError:
+                # Um comando que ficou incompleto é um erro
+                self.terminar(eco=True)
+                break
+            if not s: continue
+
+            # Cada linha completa é compilada assim que é digitada; um comando
+            # incompleto continua na linha seguinte
+            resultado = self.alimentar(s + '\n', eco=True, fim_de_linha=True)
+            if resultado['parar']:
+                sys.exit() # Encerra o script Python
+
+# -----------------------------------------------------------------------------
+# Compilação incremental
+#
+# Para editores que mandam o texto inteiro a cada tecla.  O documento fica
+# dividido em linhas, com os tokens de cada linha, e em blocos de linhas, com
+# a parte do resultado de cada bloco.  Uma edição só tokeniza de novo as
+# linhas que ela atinge e só compila de novo os blocos que as contêm; os
+# outros blocos reaproveitam os tokens e o resultado anteriores.
+#
+# Um bloco termina antes da linha do primeiro token que vem depois de um
+# VALIDAR (as linhas sem tokens depois do VALIDAR ficam no bloco).  Cada
+# bloco é compilado sozinho, a partir da memória semântica limpa, o que dá o
+# mesmo resultado que a compilação do texto inteiro quando, ao fim do bloco,
+# o parser não está se recuperando de um erro (parser.errorcount == 0, ou a
+# recuperação já terminou com parser.errok()), a memória semântica foi limpa
+# pelo VALIDAR e o primeiro token do bloco seguinte pode começar um comando.
+# Quando não, o bloco é juntado ao seguinte e compilado de novo.
+#
+# Supõe que os tokens não atravessam linhas, que o lexer não tem estados e
+# que a gramática é uma lista de comandos.  O módulo da gramática deve ter
+# dados(), que devolve a memória semântica (comparada com a memória limpa).
+# -----------------------------------------------------------------------------
+
+class Bloco:
+    def __init__(self, linhas, itens):
+        self.linhas = linhas          # Textos das linhas (com o '\n', exceto a última do documento)
+        self.itens = itens            # Para cada linha, os tokens e as mensagens dos erros léxicos
+        self.tamanho = sum(map(len, linhas))
+        self.resultado = None         # Parte do resultado deste bloco (None: não compilado)
+        tipos = [item.type for item in itertools.chain.from_iterable(itens) if item.__class__ is not str]
+        self.primeiro = tipos[0] if tipos else None
+        self.ultimo = tipos[-1] if tipos else None
+
+    def juntar(self, outro):
+        return Bloco(self.linhas + outro.linhas, self.itens + outro.itens)
+
+# Entrega ao parser os tokens de um bloco.  As mensagens dos erros léxicos
+# são emitidas quando o parser pede o token seguinte, como faz o lexer.
+class _Alimentador:
+    def __init__(self, compilador, itens):
+        self.compilador = compilador
+        self.itens = itertools.chain.from_iterable(itens)
+        self.fim = False              # True depois de entregar o fim do bloco
+
+    def token(self):
+        for item in self.itens:
+            if item.__class__ is not str:
+                return item
+            self.compilador.erro(item)
+        self.fim = True
+        return None
+
+# Linhas de um texto, separadas só por '\n' (como o lexer as vê).  Com
+# final=True o texto vai até o fim do documento e a última linha (sem '\n',
+# talvez vazia) é mantida.
+def _linhas(texto, final):
+    partes = texto.split('\n')
+    linhas = [parte + '\n' for parte in partes[:-1]]
+    if final:
+        linhas.append(partes[-1])
+    return linhas
+
+class CompilacaoIncremental:
+    FIM_BLOCO = 'VALIDAR'
+
+    def __init__(self, compilador, texto=''):
+        self.compilador = compilador
+        lexer, parser = compilador.construir()
+        self.lexer = lexer.clone()
+        self.parser = parser
+        # Tokens que podem começar um comando.  Um parser sem shifted_tokens()
+        # e errorcount (módulo gerado por uma versão antiga) nunca permite
+        # dividir o texto, que é então sempre compilado inteiro.
+        shifted_tokens = getattr(parser, 'shifted_tokens', None)
+        self.inicio_comando = frozenset(shifted_tokens() if shifted_tokens else ())
+        compilador.modulo.limpar_dados()
+        self.limpa = copy.deepcopy(compilador.modulo.dados())
+        self.texto = ''
+        self.blocos = [Bloco([''], [[]])]
+        self.resultado = None
+        self.editar(0, 0, texto)
+
+    # Troca texto[inicio:fim] por novo e devolve o resultado da compilação
+    # do texto editado (o mesmo de compile_text())
+    def editar(self, inicio, fim, novo):
+        if not 0 <= inicio <= fim <= len(self.texto):
+            raise ValueError(f'Trecho inválido: {inicio}:{fim}')
+        with self.compilador._compilacao:
+            texto = self.texto[:inicio] + novo + self.texto[fim:]
+            blocos = self.blocos
+            inicios = list(itertools.accumulate((b.tamanho for b in blocos), initial=0))
+            i = min(bisect.bisect_right(inicios, inicio), len(blocos)) - 1
+            j = min(bisect.bisect_right(inicios, fim), len(blocos)) - 1
+
+            # Linhas atingidas pela edição (a e b, entre as linhas dos blocos i a j)
+            linhas = [linha for bloco in blocos[i:j + 1] for linha in bloco.linhas]
+            itens = [item for bloco in blocos[i:j + 1] for item in bloco.itens]
+            pos = inicios[i]
+            a = b = None
+            for n, linha in enumerate(linhas):
+                if a is None and inicio < pos + len(linha):
+                    a, inicio_a = n, pos
+                if fim < pos + len(linha):
+                    b = n
+                    break
+                pos += len(linha)
+            if a is None:
+                a, inicio_a = len(linhas) - 1, pos - len(linhas[-1])
+            if b is None:
+                b, pos = len(linhas) - 1, pos - len(linhas[-1])
+            fim_b = pos + len(linhas[b]) + len(novo) - (fim - inicio)
+            novas = _linhas(texto[inicio_a:fim_b], fim_b == len(texto))
+            linhas[a:b + 1] = novas
+            itens[a:b + 1] = self._tokenizar(novas)
+
+            # Os limites da região refeita devem continuar sendo fins de
+            # bloco: senão os blocos vizinhos entram na região
+            regiao = Bloco(linhas, itens)
+            while True:
+                if i > 0 and (not any(item.__class__ is not str for item in regiao.itens[0])
+                              or regiao.primeiro not in self.inicio_comando):
+                    i -= 1
+                    regiao = blocos[i].juntar(regiao)
+                elif j + 1 < len(blocos) and regiao.ultimo != self.FIM_BLOCO:
+                    j += 1
+                    regiao = regiao.juntar(blocos[j])
+                else:
+                    break
+            self.blocos = blocos[:i] + self._dividir(regiao) + blocos[j + 1:]
+            self.texto = texto
+            try:
+                self._atualizar(blocos, i, j)
+            except BaseException:
+                self.resultado = None
+                raise
+            return self.resultado
+
+    # Tokens e mensagens de erro léxico de cada linha
+    def _tokenizar(self, linhas):
+        compilador = self.compilador
+        lexer = self.lexer
+        resultado, limite = compilador.resultado, compilador.limite_erros
+        compilador.resultado, compilador.limite_erros = novo_resultado(), None
+        erros = compilador.resultado['erros']
+        try:
+            itens = []
+            for linha in linhas:
+                lexer.input(linha)
+                entradas = []
+                while True:
+                    tok = lexer.token()
+                    if erros:
+                        entradas.extend(erros)
+                        del erros[:]
+                    if tok is None:
+                        break
+                    entradas.append(tok)
+                itens.append(entradas)
+            return itens
+        finally:
+            compilador.resultado, compilador.limite_erros = resultado, limite
+
+    # Contexto da análise que acabou de rodar nesta thread (veja
+    # yacc.ParseContext), ou None para um parser sem contextos (módulo gerado
+    # por uma versão antiga)
+    def _contexto(self):
+        context = getattr(self.parser, 'context', None)
+        return context() if context else None
+
+    # True se a análise do contexto terminou fora da recuperação de um erro.
+    # Sem contexto não se sabe, e o bloco nunca está recuperado.
+    def _recuperado(self, contexto):
+        return contexto is not None and (contexto.errorcount == 0 or contexto.errorok)
+
+    # Divide as linhas de um bloco nos fins de bloco
+    def _dividir(self, bloco):
+        blocos = []
+        comeco = 0
+        ultimo = None
+        for n, entradas in enumerate(bloco.itens):
+            tipos = [item.type for item in entradas if item.__class__ is not str]
+            if tipos and ultimo == self.FIM_BLOCO and n > comeco:
+                blocos.append(Bloco(bloco.linhas[comeco:n], bloco.itens[comeco:n]))
+                comeco = n
+            if tipos:
+                ultimo = tipos[-1]
+        blocos.append(Bloco(bloco.linhas[comeco:], bloco.itens[comeco:]))
+        return blocos
+
+    # Atualiza o resultado depois que os blocos i a j de antigos foram
+    # trocados pelos blocos sem resultado a partir de self.blocos[i]: as
+    # partes dos blocos novos substituem as dos antigos nas listas do
+    # resultado.  Perto do limite de erros (ou depois de uma compilação
+    # interrompida) o resultado é montado de novo com _compilar().
+    def _atualizar(self, antigos, i, j):
+        compilador = self.compilador
+        resultado = self.resultado
+        limite = compilador.limite_erros
+        if (resultado is None or resultado['abortado'] or
+                any(bloco.resultado is None for bloco in antigos[i:j + 1])):
+            self.resultado = self._compilar()
+            return
+
+        # Compila os blocos novos sem o limite de erros (os blocos antigos
+        # que forem juntados a eles também saem do resultado)
+        parcial = compilador.resultado = novo_resultado()
+        compilador.limite_erros = None
+        try:
+            k = i
+            while k < len(self.blocos) and self.blocos[k].resultado is None:
+                k = self._compilar_bloco(k)
+        finally:
+            compilador.limite_erros = limite
+        removidos = antigos[i:len(antigos) - (len(self.blocos) - k)]
+
+        for chave in ('saidas', 'mensagens', 'erros', 'diagnosticos'):
+            inicio = sum(len(bloco.resultado[chave]) for bloco in self.blocos[:i])
+            n = sum(len(bloco.resultado[chave]) for bloco in removidos)
+            resultado[chave][inicio:inicio + n] = parcial[chave]
+        resultado['parar'] = any(bloco.resultado['parar'] for bloco in self.blocos)
+        if limite is not None and len(resultado['erros']) >= limite:
+            self.resultado = self._compilar()
+
+    # Monta o resultado com as partes dos blocos, compilando os que não
+    # têm resultado
+    def _compilar(self):
+        compilador = self.compilador
+        resultado = compilador.resultado = novo_resultado()
+        limite = compilador.limite_erros
+        k = 0
+        try:
+            while k < len(self.blocos):
+                parte = self.blocos[k].resultado
+                if parte is None or (limite is not None and
+                                     len(resultado['erros']) + len(parte['erros']) >= limite):
+                    k = self._compilar_bloco(k)
+                    continue
+                for chave in ('saidas', 'mensagens', 'erros', 'diagnosticos'):
+                    resultado[chave].extend(parte[chave])
+                resultado['parar'] = resultado['parar'] or parte['parar']
+                k += 1
+        except CompilacaoAbortada:
+            pass
+        return resultado
+
+    # Compila o bloco k a partir da memória limpa, juntando-o aos seguintes
+    # enquanto o fim dele não for limpo.  Devolve o índice do bloco seguinte.
+    def _compilar_bloco(self, k):
+        compilador = self.compilador
+        modulo = compilador.modulo
+        resultado = compilador.resultado
+        blocos = self.blocos
+        while True:
+            bloco = blocos[k]
+            marcas = {chave: len(resultado[chave]) for chave in ('saidas', 'mensagens', 'erros', 'diagnosticos')}
+            parar = resultado['parar']
+            resultado['parar'] = False
+            modulo.limpar_dados()
+            alimentador = _Alimentador(compilador, bloco.itens)
+            try:
+                self.parser.parse(lexer=alimentador)
+                contexto = self._contexto()
+            except Exception:
+                # O que acontece depois do fim do bloco (erros, a interrupção
+                # por excesso de erros, exceções das ações) pode não acontecer
+                # na compilação do texto inteiro
+                if not alimentador.fim or k + 1 == len(blocos):
+                    resultado['parar'] = resultado['parar'] or parar
+                    raise
+            else:
+                if (k + 1 == len(blocos) or
+                        (self._recuperado(contexto) and modulo.dados() == self.limpa
+                         and blocos[k + 1].primeiro in self.inicio_comando)):
+                    bloco.resultado = {chave: resultado[chave][marca:] for chave, marca in marcas.items()}
+                    bloco.resultado['parar'] = resultado['parar']
+                    resultado['parar'] = resultado['parar'] or parar
+                    return k + 1
+            for chave, marca in marcas.items():
+                del resultado[chave][marca:]
+            resultado['parar'] = parar
+            resultado['abortado'] = False
+            blocos[k:k + 2] = [bloco.juntar(blocos[k + 1])]
@@ -39,6 +39,19 @@ import types
 import copy
 import os
 import inspect
+import hashlib
+import pickle
+import tempfile
+import itertools
+import bisect
+import unicodedata
+from array import array
+
+from . import __version__
+
+# Version of the lexer table cache format. Must be changed whenever the layout
+# of the cached lexer tables changes
+__tabversion__ = '1.0'
 
 # This tuple contains acceptable string types
 StringTypes = (str, bytes)
@@ -53,11 +66,382 @@ class LexError(Exception):
         self.args = (message,)
         self.text = s
 
-# Token class.  This class is used to represent the tokens produced.
+# Token class.  This class is used to represent the tokens produced.  The
+# standard attributes have fixed slots; token rules may still add others.
 class LexToken(object):
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer', '__dict__')
+
     def __repr__(self):
         return f'LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})'
 
+# Token produced by Lexer.token() for string rules and TokenRules (rule
+# functions, which normally read the value, get a LexToken with the value
+# already made).  Its value is the span lexdata[lexstart:lexstart+lexsize]
+# of the input, only made (sliced, decoded as Latin-1 for bytes input and
+# converted by the convert function of the class, if any) when it is first
+# read, so the values no grammar action looks at cost nothing.  Values set
+# by the token rules are stored as they are.
+#
+# Until the value is made, lexdata holds the input and lexsize the size of
+# the span; lexsize is None afterwards and lexdata holds the value.  The
+# start of the span is kept apart from lexpos, which grammar rules may move
+# (YaccProduction.set_lexpos()).  The input must not be changed (or an mmap
+# closed) while the value is not made.  The __dict__ of a LexToken is only
+# allocated when another attribute is set.
+class LexSpanToken(LexToken):
+    __slots__ = ('lexdata', 'lexstart', 'lexsize')
+    convert = None
+
+    @property
+    def value(self):
+        if self.lexsize is None:
+            return self.lexdata
+        return self._makevalue()
+
+    @value.setter
+    def value(self, value):
+        self.lexdata = value
+        self.lexsize = None
+
+    def _makevalue(self):
+        start = self.lexstart
+        value = self.lexdata[start:start + self.lexsize]
+        if value.__class__ is not str:
+            value = str(value, 'latin-1')
+        if self.convert is not None:
+            value = self.convert(value)
+        self.lexdata = value
+        self.lexsize = None
+        return value
+
+# Token of bytes input handed out by TokenColumns, whose values are the
+# matched bytes: the value is decoded (as Latin-1) when it is first read.
+class LexBytesToken(LexToken):
+    __slots__ = ('rawvalue',)
+
+    @property
+    def value(self):
+        value = self.rawvalue
+        if value.__class__ is bytes:
+            value = self.rawvalue = value.decode('latin-1')
+        return value
+
+    @value.setter
+    def value(self, value):
+        self.rawvalue = value
+
+# Declarative token rule.  Assigned to a t_ name in place of a rule function,
+# it describes the usual work of such functions, which the lexer then does
+# itself, without calling Python code for each token:
+#
+#     keywords    dictionary mapping token texts to token types (the matched
+#                 text is looked up, the rule's own type is the default)
+#     convert     callable applied to the text to get the token value (int,
+#                 float, ...), when the value is first read
+#     newlines    if true, the newlines in the text are added to lineno
+#                 (the attribute holds the newline character, or None)
+#
+# For example:
+#
+#     t_ID = TokenRule(r'[a-zA-Z_]\w*', keywords=reserved)
+#     t_NUMBER = TokenRule(r'\d+', convert=int)
+#     t_ignore_newline = TokenRule(r'\n+', newlines=True)
+#
+# As for string rules, a rule with 'ignore_' in its name is discarded.  As for
+# functions, the rules are tried in the order of definition.
+class TokenRule(object):
+    __slots__ = ('regex', 'keywords', 'convert', 'newlines', 'tokenclass', 'line', 'file')
+
+    def __init__(self, regex, *, keywords=None, convert=None, newlines=False):
+        self.regex = regex
+        self.keywords = keywords
+        self.convert = convert
+        self.newlines = '\n' if newlines else None
+
+        # Class of the tokens, applying convert to the value when it's read
+        if convert is None:
+            self.tokenclass = LexSpanToken
+        else:
+            self.tokenclass = type('LexSpanToken', (LexSpanToken,), {'__slots__': (), 'convert': staticmethod(convert)})
+
+        # Where the rule is defined, for ordering and error messages
+        caller = sys._getframe(1)
+        self.line = caller.f_lineno
+        self.file = caller.f_code.co_filename
+
+    def __repr__(self):
+        return f'TokenRule({self.regex!r})'
+
+    # Copy of the rule with the types of the keywords replaced by
+    # typeid(type) (for Lexer.settypeids())
+    def _typeids(self, typeid):
+        rule = copy.copy(self)
+        if self.keywords:
+            rule.keywords = {text: typeid(type) for text, type in self.keywords.items()}
+        return rule
+
+    # Copy of the rule for bytes input: keywords and newlines as bytes,
+    # and the converter applied to the decoded text (int and float take
+    # the bytes as they are)
+    def _bytes(self):
+        rule = copy.copy(self)
+        if self.keywords:
+            rule.keywords = {text.encode('latin-1'): type for text, type in self.keywords.items()
+                             if max(text, default='\0') <= '\xff'}
+        if self.convert not in (None, int, float):
+            convert = self.convert
+            rule.convert = lambda value: convert(value.decode('latin-1'))
+        if self.newlines:
+            rule.newlines = b'\n'
+        return rule
+
+# Type ids assigned on demand, for lexers that weren't given ids with
+# settypeids().  Ids 0 and 1 are reserved for '$end' and 'error', as in
+# yacc.LRIntParser.
+class _TypeIds(dict):
+    def __init__(self):
+        super().__init__({'$end': 0, 'error': 1})
+
+    def __missing__(self, type):
+        self[type] = typeid = len(self)
+        return typeid
+
+# Columnar token storage filled by Lexer.tokenize_into().  Token i is
+# described by types[i] (its type id, see typeids), starts[i] and ends[i]
+# (its position in the input), values[i] and linenos[i].  No LexToken
+# objects are created unless they are asked for.
+class TokenColumns:
+    def __init__(self, typeids=None):
+        self.typeids = _TypeIds() if typeids is None else typeids
+        self.types   = array('i')
+        self.starts  = array('q')
+        self.ends    = array('q')
+        self.linenos = array('i')
+        self.values  = []
+        self.tokenclass = LexToken      # LexBytesToken once tokens of bytes input are added
+
+    def __len__(self):
+        return len(self.types)
+
+    def clear(self):
+        del self.types[:], self.starts[:], self.ends[:], self.linenos[:], self.values[:]
+
+    # List mapping type ids back to type names
+    def typenames(self):
+        names = [None] * (max(self.typeids.values(), default=-1) + 1)
+        for name, typeid in self.typeids.items():
+            names[typeid] = name
+        return names
+
+    # Token i as a LexToken (with the type name as type)
+    def token(self, i):
+        tok = self.tokenclass()
+        tok.type = self.typenames()[self.types[i]]
+        tok.value = self.values[i]
+        tok.lineno = self.linenos[i]
+        tok.lexpos = self.starts[i]
+        return tok
+
+    def __iter__(self):
+        return iter(self.reader(), None)
+
+    # Return a function handing out the tokens one at a time, like
+    # Lexer.token().  The token types are the type names, or the ids of
+    # the given typeids map (normally those of a yacc.LRIntParser).
+    def reader(self, typeids=None):
+        if typeids is self.typeids:
+            types = self.types
+        else:
+            names = self.typenames()
+            if typeids is None:
+                trans = names
+            else:
+                trans = []
+                for name in names:
+                    if name is not None and name not in typeids:
+                        raise LexError(f'Token type {name!r} is not known to the parser', name)
+                    trans.append(typeids.get(name))
+            types = [trans[t] for t in self.types]
+
+        values  = self.values
+        linenos = self.linenos
+        starts  = self.starts
+        indices = iter(range(len(types)))
+        Token   = self.tokenclass
+
+        def token():
+            for i in indices:
+                tok = Token()
+                tok.type = types[i]
+                tok.value = values[i]
+                tok.lineno = linenos[i]
+                tok.lexpos = starts[i]
+                return tok
+            return None
+        return token
+
+# Add offset to the positions of the tokens from start on
+def _shift_positions(columns, start, offset):
+    if offset and start < len(columns):
+        columns.starts[start:] = array('q', [pos + offset for pos in columns.starts[start:]])
+        columns.ends[start:] = array('q', [pos + offset for pos in columns.ends[start:]])
+
+# Chunks of chunksize characters read from a file
+def _read_chunks(f, chunksize):
+    while True:
+        chunk = f.read(chunksize)
+        if not chunk:
+            return
+        yield chunk
+
+# -----------------------------------------------------------------------------
+# LineIndex
+#
+# Positions of the newlines of an input, used to turn a position (lexpos)
+# into a line and a column only when they are asked for (for a message),
+# instead of counting lines while lexing.  The text given to the
+# constructor is scanned lazily, up to the positions asked for; the
+# chunks of a stream are indexed by add() as they are read.  Lines and
+# columns are numbered from 1; lineno is the line at position 0.
+# -----------------------------------------------------------------------------
+
+_newline_str = re.compile('\n')
+_newline_bytes = re.compile(b'\n')
+
+class LineIndex(object):
+    def __init__(self, data=None, lineno=1):
+        self.data = data              # Text scanned on demand (None for a stream)
+        self.lineno = lineno
+        self.newlines = array('q')    # Positions of the newlines found so far
+        self.scanned = 0              # The newlines before this position are known
+
+    def __repr__(self):
+        return f'LineIndex({len(self.newlines)} newlines up to {self.scanned})'
+
+    # A copy with its own newlines, for a clone of the lexer (position()
+    # indexes the text on demand, and push() adds to the index)
+    def copy(self):
+        c = copy.copy(self)
+        c.newlines = array('q', self.newlines)
+        return c
+
+    # Index the next chunk of a stream (it starts at position scanned)
+    def add(self, chunk):
+        self._index(chunk, 0, len(chunk), self.scanned)
+
+    # The chunks of an iterator, indexed as they are taken
+    def chunks(self, chunks):
+        for chunk in chunks:
+            self.add(chunk)
+            yield chunk
+
+    def _index(self, data, start, end, offset):
+        newline = _newline_str if isinstance(data, str) else _newline_bytes
+        self.newlines.extend([m.start() + offset for m in newline.finditer(data, start, end)])
+        self.scanned = offset + end
+
+    # (line, column) of position pos
+    def position(self, pos):
+        if pos > self.scanned:
+            if self.data is None:
+                raise ValueError(f'Position {pos} has not been read yet')
+            # Scan at least as much again as before, so that a run of
+            # diagnostics scans the text only once
+            end = min(len(self.data), max(pos, 2 * self.scanned, 65536))
+            self._index(self.data, self.scanned, end, 0)
+        i = bisect.bisect_left(self.newlines, pos)
+        column = pos + 1 if i == 0 else pos - self.newlines[i - 1]
+        return self.lineno + i, column
+
+# Unicode classes, as the bodies of character classes listing the Latin-1
+# characters they match, for _bytes_pattern()
+def _latin1_class(escape, flags):
+    match = re.compile(escape, flags & ~re.VERBOSE).match
+    codes = [c for c in range(256) if match(chr(c))]
+    ranges = []
+    for c in codes:
+        if ranges and ranges[-1][1] == c - 1:
+            ranges[-1][1] = c
+        else:
+            ranges.append([c, c])
+    return ''.join('\\x%02x' % lo if lo == hi else '\\x%02x-\\x%02x' % (lo, hi) for lo, hi in ranges)
+
+# Translate a str regular expression into a bytes regular expression with
+# the same meaning on Latin-1 text: \w, \d, \s (and \W, \D, \S) become
+# explicit classes of Latin-1 characters and the characters are encoded as
+# Latin-1.  Expressions using other characters raise LexError.  (Case
+# folding with re.IGNORECASE and \b only know the ASCII letters.)
+def _bytes_pattern(pattern, flags):
+    out = []
+    i = 0
+    n = len(pattern)
+    inclass = False
+    while i < n:
+        c = pattern[i]
+        if c == '\\' and i + 1 < n:
+            e = pattern[i+1]
+            if e in 'wWdDsS':
+                body = _latin1_class(pattern[i:i+2], flags)
+                out.append(body if inclass else '[' + body + ']')
+                i += 2
+                continue
+            if e in 'uUN':
+                if e == 'N':
+                    end = pattern.index('}', i) + 1
+                    code = ord(unicodedata.lookup(pattern[i+3:end-1]))
+                else:
+                    end = i + (6 if e == 'u' else 10)
+                    code = int(pattern[i+2:end], 16)
+                out.append('\\x%02x' % code if code < 256 else chr(code))
+                i = end
+                continue
+            out.append(pattern[i:i+2])
+            i += 2
+            continue
+        if inclass:
+            inclass = c != ']'
+        elif c == '[':
+            # A ']' right after '[' or '[^' belongs to the class
+            j = i + 1 + pattern.startswith('^', i + 1)
+            j += pattern.startswith(']', j)
+            out.append(pattern[i:j])
+            i = j
+            inclass = True
+            continue
+        elif c == '#' and flags & re.VERBOSE:
+            end = pattern.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        out.append(c)
+        i += 1
+    try:
+        return ''.join(out).encode('latin-1')
+    except UnicodeEncodeError:
+        raise LexError(f'Regular expression {pattern!r} uses characters that are not in Latin-1 '
+                       'and cannot match bytes input', pattern) from None
+
+# Bytes version of a compiled master regular expression
+def _bytes_regex(cre):
+    return re.compile(_bytes_pattern(cre.pattern, cre.flags), cre.flags & ~re.UNICODE)
+
+_bytes_line = re.compile(rb'[^\n]*')
+
+# End of the text handed to t_error() and LexError: the end of the input,
+# or, for bytes input (possibly a large mmap), the end of the line
+def _error_end(data, pos):
+    if isinstance(data, str):
+        return len(data)
+    return _bytes_line.match(data, pos).end()
+
+def _error_text(data, pos):
+    text = data[pos:_error_end(data, pos)]
+    return text if isinstance(text, str) else str(text, 'latin-1')
+
+# Character at data[pos] (a str also for bytes input)
+def _char(data, pos):
+    c = data[pos]
+    return chr(c) if c.__class__ is int else c
+
 # This object is a stand-in for a logging object created by the
 # logging module.
 
@@ -77,6 +461,28 @@ class PlyLogger(object):
     info = critical
     debug = critical
 
+# -----------------------------------------------------------------------------
+# _RuleCounter
+#
+# Stands in for a compiled master regex in Lexer.profile(): counts the rule,
+# named in names, of every match.
+# -----------------------------------------------------------------------------
+class _RuleCounter(object):
+    def __init__(self, cre, names, counts):
+        self.cre = cre
+        self.names = names
+        self.counts = counts
+
+    def __getattr__(self, name):
+        return getattr(self.cre, name)
+
+    def match(self, string, pos=0, endpos=sys.maxsize):
+        m = self.cre.match(string, pos, endpos)
+        if m:
+            name = self.names[m.lastindex]
+            self.counts[name] = self.counts.get(name, 0) + 1
+        return m
+
 # -----------------------------------------------------------------------------
 #                        === Lexing Engine ===
 #
@@ -84,11 +490,19 @@ class PlyLogger(object):
 # a few public methods and attributes:
 #
 #    input()          -  Store a new string in the lexer
+#    input_stream()   -  Read the input from a file or an iterator of strings
+#    push()           -  Add text to the input as it arrives
 #    token()          -  Get the next token
 #    clone()          -  Clone the lexer
+#    settypeids()     -  Hand out integer token types
+#    tokenize_all()   -  Tokenize the whole input into a TokenColumns
+#    tokenize_into()  -  Append the remaining tokens to a TokenColumns
+#    position()       -  Line and column of a position in the input
+#    profile()        -  Count the matches of each rule on a sample input
 #
 #    lineno           -  Current line number
-#    lexpos           -  Current position in the input string
+#    lexpos           -  Current position in the input string (in the
+#                        window lexdata for input_stream())
 # -----------------------------------------------------------------------------
 
 class Lexer:
@@ -118,22 +532,42 @@ class Lexer:
         self.lexliterals = ''         # Literal characters that can be passed through
         self.lexmodule = None         # Module
         self.lineno = 1               # Current line number
+        self.lextypeids = None        # Integer ids handed out as token types (see settypeids())
+        self.lexstatereids = None     # Master regexs with integer token types
+        self.lexidcache = None        # (typeids, lexstatere, lexstatereids) of the last settypeids()
+        self.lexstream = None         # Chunks still to be read by input_stream()
+        self.lexchunksize = 0         # Size of the chunks read by input_stream()
+        self.lexoffset = 0            # Position of lexdata[0] in the whole input
+        self.lexbytes = False         # True while the input is bytes (see input())
+        self.lexstatealt = None       # (lexstatere, lexstateignore, lexliterals) for the other kind of input
+        self.lexlines = None          # LineIndex of the input (see position())
+        self.lexpush = None           # Partial line kept by push() (None: not pushing)
 
     def clone(self, object=None):
         c = copy.copy(self)
 
+        # The clone gets its own copy of the state that changes while lexing,
+        # so that clones can be used at the same time (one per thread, say)
+
+        c.lexstatestack = self.lexstatestack[:]
+        if self.lexlines is not None:
+            c.lexlines = self.lexlines.copy()
+
         # If the object parameter has been supplied, it means we are attaching the
         # lexer to a new object.  In this case, we have to rebind all methods in
         # the lexstatere and lexstateerrorf tables.
 
         if object:
+            if self.lexbytes:
+                c._setbytes(False)
+            c.lexstatealt = None
             newtab = {}
-            for key, ritem in self.lexstatere.items():
+            for key, ritem in c.lexstatere.items():
                 newre = []
                 for cre, findex in ritem:
                     newfindex = []
                     for f in findex:
-                        if not f or not f[0]:
+                        if not f or not f[0] or isinstance(f[0], TokenRule):
                             newfindex.append(f)
                             continue
                         newfindex.append((getattr(object, f[0].__name__), f[1]))
@@ -144,15 +578,326 @@ class Lexer:
             for key, ef in self.lexstateerrorf.items():
                 c.lexstateerrorf[key] = getattr(object, ef.__name__)
             c.lexmodule = object
+            if c.lextypeids is not None:
+                c.settypeids(c.lextypeids)
+            if self.lexbytes:
+                c._setbytes(True)
+        if 'token' in c.__dict__:
+            c.token = c._token_stream
         return c
 
+    # ------------------------------------------------------------
+    # writetab() - Write lexer information to a cache file
+    #
+    # The file is written under a temporary name and then moved into
+    # place so that other processes never see a partially written file.
+    # It gets the mode of a new file (see _file_mode()).
+    # ------------------------------------------------------------
+    def writetab(self, lextab, signature):
+        # Rewrite the lexstatere table, replacing function objects with function names
+        tabre = {}
+        for statename, lre in self.lexstatere.items():
+            titem = []
+            for (pat, func), retext, renames in zip(lre, self.lexstateretext[statename], self.lexstaterenames[statename]):
+                titem.append((retext, _funcs_to_names(func, renames), renames))
+            tabre[statename] = titem
+
+        data = {
+            'tabversion'     : __tabversion__,
+            'signature'      : _lextab_signature(signature),
+            'lextokens'      : self.lextokens,
+            'lexliterals'    : self.lexliterals,
+            'lexreflags'     : self.lexreflags,
+            'lexstateinfo'   : self.lexstateinfo,
+            'lexstatere'     : tabre,
+            'lexstateignore' : self.lexstateignore,
+            'lexstateerrorf' : {s: ef.__name__ if ef else None for s, ef in self.lexstateerrorf.items()},
+            'lexstateeoff'   : {s: ef.__name__ if ef else None for s, ef in self.lexstateeoff.items()},
+        }
+
+        dirname = os.path.dirname(os.path.abspath(lextab))
+        os.makedirs(dirname, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(lextab))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.chmod(tmpname, _file_mode())
+            os.replace(tmpname, lextab)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
+
+    # ------------------------------------------------------------
+    # readtab() - Read lexer information from a cache file
+    #
+    # Returns False if the file doesn't exist or was written for a
+    # different set of token rules.  Rule functions are looked up
+    # by name in fdict.
+    # ------------------------------------------------------------
+    def readtab(self, lextab, signature, fdict):
+        try:
+            with open(lextab, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return False
+
+        if (not isinstance(data, dict) or data.get('tabversion') != __tabversion__ or
+            data.get('signature') != _lextab_signature(signature)):
+            return False
+
+        self.lextokens      = data['lextokens']
+        self.lexliterals    = data['lexliterals']
+        self.lextokens_all  = self.lextokens | set(self.lexliterals)
+        self.lexreflags     = data['lexreflags']
+        self.lexstateinfo   = data['lexstateinfo']
+        self.lexstateignore = data['lexstateignore']
+
+        self.lexstatere = {}
+        self.lexstateretext = {}
+        self.lexstaterenames = {}
+        for statename, lre in data['lexstatere'].items():
+            titem = []
+            txtitem = []
+            nameitem = []
+            for pat, func_name, renames in lre:
+                titem.append((re.compile(pat, self.lexreflags), _names_to_funcs(func_name, fdict)))
+                txtitem.append(pat)
+                nameitem.append(renames)
+            self.lexstatere[statename] = titem
+            self.lexstateretext[statename] = txtitem
+            self.lexstaterenames[statename] = nameitem
+
+        self.lexstateerrorf = {}
+        for statename, ef in data['lexstateerrorf'].items():
+            self.lexstateerrorf[statename] = fdict[ef] if ef else None
+
+        self.lexstateeoff = {}
+        for statename, ef in data['lexstateeoff'].items():
+            self.lexstateeoff[statename] = fdict[ef] if ef else None
+
+        self.begin('INITIAL')
+        return True
+
     # ------------------------------------------------------------
     # input() - Push a new string into the lexer
+    #
+    # s may also be bytes, a bytearray, a memoryview or an mmap
+    # (a whole file mapped with mmap.mmap(f.fileno(), 0,
+    # access=mmap.ACCESS_READ) is lexed without reading it into
+    # memory).  The input is then taken as Latin-1 text: the
+    # regular expressions are matched as bytes patterns and the
+    # tokens decode their value when it is read.
+    # Rule functions see bytes in lexer.lexdata and lexer.lexmatch.
     # ------------------------------------------------------------
     def input(self, s):
+        isbytes = not isinstance(s, str)
+        if isbytes != self.lexbytes:
+            self._setbytes(isbytes)
         self.lexdata = s
         self.lexpos = 0
         self.lexlen = len(s)
+        self.lexoffset = 0
+        self.lexstream = None
+        self.lexpush = None
+        self.lexlines = LineIndex(s, self.lineno)
+        self.__dict__.pop('token', None)
+
+    # ------------------------------------------------------------
+    # input_stream() - Read the input from a file or an iterator
+    #
+    # source is a file-like object, read chunksize characters at
+    # a time, or an iterable of strings.  Only a window of the text
+    # is kept in lexdata: the text still to be tokenized plus at
+    # most a few chunks.  Tokens may span chunks but must be
+    # shorter than chunksize.  The positions of the tokens are
+    # counted from the start of the stream (lexdata[0] is at
+    # position lexoffset).  With lines=True the newlines of each
+    # chunk are indexed as it is read, for position().
+    # ------------------------------------------------------------
+    def input_stream(self, source, chunksize=65536, lines=False):
+        if hasattr(source, 'read'):
+            chunks = _read_chunks(source, chunksize)
+        else:
+            chunks = iter(source)
+        first = next(chunks, '')
+        self.input(first[:0])
+        if lines:
+            chunks = self.lexlines.chunks(itertools.chain([first], chunks))
+            first = next(chunks)
+        else:
+            self.lexlines = None
+        self.lexstream = itertools.chain([first], chunks)
+        self.lexchunksize = chunksize
+        self.token = self._token_stream
+        self._readmore()
+
+    # ------------------------------------------------------------
+    # push() - Add text to the input as it arrives
+    #
+    # For text received a piece at a time (lines typed, reads
+    # from a socket), handed to a parser as it comes (see
+    # yacc.LRParser.feed()).  Returns an iterator over the tokens
+    # of the text pushed so far up to its last newline; the rest,
+    # a partial line, is kept and lexed with the next text.  With
+    # final=True the partial line is lexed too.  Tokens must not
+    # span lines.  The positions of the tokens are counted from
+    # the first text pushed after input().
+    # ------------------------------------------------------------
+    def push(self, text=None, final=False):
+        if self.lexpush is None:
+            # First text of the input
+            offset = 0
+            lines = LineIndex(None, self.lineno)
+            data = text
+        else:
+            offset = self.lexoffset + len(self.lexdata)
+            lines = self.lexlines
+            data = self.lexpush if text is None else self.lexpush + text
+        if data is None:
+            data = ''
+        if final:
+            rest = data[:0]
+        else:
+            cut = data.rfind('\n' if isinstance(data, str) else b'\n') + 1
+            data, rest = data[:cut], data[cut:]
+        self.input(data)
+        self.lexoffset = offset
+        self.lexpush = rest
+        lines.add(data)
+        self.lexlines = lines
+        return self._pushed_tokens(offset)
+
+    def _pushed_tokens(self, offset):
+        token = self.token
+        while True:
+            tok = token()
+            if tok is None:
+                return
+            if getattr(tok, 'lexsize', None) is not None:
+                tok._makevalue()        # Before the text is replaced by the next push()
+            tok.lexpos += offset
+            yield tok
+
+    # ------------------------------------------------------------
+    # position() - Line and column of a position in the input
+    #
+    # pos is a token's lexpos (by default the current position).
+    # Lines are counted from the lineno the lexer had when the
+    # input was given.  Nothing is counted while lexing: the
+    # newlines are found when a position is first asked for.
+    # ------------------------------------------------------------
+    def position(self, pos=None):
+        if self.lexlines is None:
+            raise LexError('The positions of an input_stream() need lines=True', None)
+        if pos is None:
+            pos = self.lexoffset + self.lexpos
+        return self.lexlines.position(pos)
+
+    # Switch between str and bytes input, swapping the master regexs,
+    # ignored characters and literals with those in lexstatealt
+    # (made from the str ones the first time bytes are given)
+    def _setbytes(self, isbytes):
+        alt = self.lexstatealt
+        if alt is None:
+            bytesre = {}
+            for state, lre in self.lexstatere.items():
+                bre = []
+                for cre, findex in lre:
+                    bfindex = []
+                    for f in findex:
+                        if f and isinstance(f[0], TokenRule):
+                            f = (f[0]._bytes(), f[1])
+                        bfindex.append(f)
+                    bre.append((_bytes_regex(cre), bfindex))
+                bytesre[state] = bre
+            alt = (bytesre,
+                   {state: ignore.encode('latin-1', 'ignore') for state, ignore in self.lexstateignore.items()},
+                   ''.join(self.lexliterals).encode('latin-1', 'ignore'))
+        self.lexstatealt = (self.lexstatere, self.lexstateignore, self.lexliterals)
+        self.lexstatere, self.lexstateignore, self.lexliterals = alt
+        self.lexbytes = isbytes
+        self.settypeids(self.lextypeids)
+
+    # Discard the text before lexpos and read chunks of the stream
+    # until there are two chunks of text.  lexlen is set a chunk
+    # before the end of the text, so that the tokens starting
+    # before lexlen are complete.
+    def _readmore(self):
+        lexpos = self.lexpos
+        data = self.lexdata
+        if lexpos >= len(data) > self.lexlen:
+            raise LexError(f'Token ending at position {self.lexoffset + lexpos} is longer than the '
+                           f'stream window ({self.lexchunksize} characters)', data[self.lexlen:])
+        pieces = [data[lexpos:]]
+        size = len(pieces[0])
+        for chunk in self.lexstream:
+            pieces.append(chunk)
+            size += len(chunk)
+            if size >= 2 * self.lexchunksize:
+                break
+        else:
+            self.lexstream = None
+        self.lexoffset += lexpos
+        self.lexdata = data[:0].join(pieces)
+        self.lexpos = 0
+        self.lexlen = size if self.lexstream is None else size - self.lexchunksize
+
+    # token() for input_stream().  Lexer.token() stops at the end of
+    # the window; the window is then moved and lexing goes on.
+    def _token_stream(self):
+        token = self.__class__.token
+        while True:
+            tok = token(self)
+            if tok is not None:
+                if getattr(tok, 'lexsize', None) is not None:
+                    tok._makevalue()        # Before the window moves
+                tok.lexpos += self.lexoffset
+                return tok
+            if self.lexstream is None:
+                return None
+            self._readmore()
+
+    # ------------------------------------------------------------
+    # settypeids() - Hand out integer token types
+    #
+    # typeids maps token type names to integers (normally the
+    # terminal ids of a yacc.LRIntParser).  Token rule functions
+    # still see the type name; it is replaced by its id when the
+    # token is returned.  settypeids(None) goes back to names.
+    # The master regexs made for the last typeids are kept, since
+    # an LRIntParser sets its ids for each parse and then gives the
+    # lexer back the types it had.
+    # ------------------------------------------------------------
+    def settypeids(self, typeids):
+        self.lextypeids = typeids
+        cached = self.lexidcache
+        if typeids is None:
+            self.lexstatereids = None
+        elif cached and cached[0] is typeids and cached[1] is self.lexstatere:
+            self.lexstatereids = cached[2]
+        else:
+            self.lexstatereids = {}
+            for state, lre in self.lexstatere.items():
+                idre = []
+                for cre, findex in lre:
+                    idfindex = []
+                    for f in findex:
+                        if f and not f[0] and f[1]:
+                            f = (None, self._typeid(f[1]))
+                        elif f and isinstance(f[0], TokenRule):
+                            f = (f[0]._typeids(self._typeid), f[1] and self._typeid(f[1]))
+                        idfindex.append(f)
+                    idre.append((cre, idfindex))
+                self.lexstatereids[state] = idre
+            self.lexidcache = (typeids, self.lexstatere, self.lexstatereids)
+        self.begin(self.lexstate)
+
+    # Return the id of a token type for settypeids()
+    def _typeid(self, type):
+        try:
+            return self.lextypeids[type]
+        except KeyError:
+            raise LexError(f'Token type {type!r} is not known to the parser', type) from None
 
     # ------------------------------------------------------------
     # begin() - Changes the lexing state
@@ -160,7 +905,7 @@ class Lexer:
     def begin(self, state):
         if state not in self.lexstatere:
             raise ValueError(f'Undefined state {state!r}')
-        self.lexre = self.lexstatere[state]
+        self.lexre = (self.lexstatereids or self.lexstatere)[state]
         self.lexretext = self.lexstateretext[state]
         self.lexignore = self.lexstateignore.get(state, '')
         self.lexerrorf = self.lexstateerrorf.get(state, None)
@@ -192,6 +937,72 @@ class Lexer:
     def skip(self, n):
         self.lexpos += n
 
+    # ------------------------------------------------------------
+    # illegal_run() - The run of illegal characters at lexpos
+    #
+    # For t_error(): the text from lexpos up to the next position
+    # where a token, an ignored character or a literal can start
+    # (found by searching with the master regexs, not character by
+    # character).  t.lexer.skip(len(run)) skips the whole run, so
+    # that it is reported once.  For input_stream() the run ends at
+    # the end of the window at the latest.
+    # ------------------------------------------------------------
+    def illegal_run(self):
+        lexdata = self.lexdata
+        start = self.lexpos
+        end = len(lexdata)
+        for lexre, lexindexfunc in self.lexre:
+            m = lexre.search(lexdata, start + 1)
+            if m and m.start() < end:
+                end = m.start()
+        if self.lexbytes:
+            stop = self.lexignore + self.lexliterals
+            stopre = b'[' + re.escape(stop) + b']'
+        else:
+            stop = self.lexignore + ''.join(self.lexliterals)
+            stopre = '[' + re.escape(stop) + ']'
+        if stop:
+            m = re.compile(stopre).search(lexdata, start + 1, end)
+            if m:
+                end = m.start()
+        run = lexdata[start:end]
+        if run.__class__ is not str:
+            run = str(run, 'latin-1')
+        return run
+
+    # ------------------------------------------------------------
+    # profile() - Count the matches of each rule
+    #
+    # Lexes data (a string, bytes taken as Latin-1, or an iterable
+    # of them) with a clone of the lexer whose master regexs count
+    # the rule of every match, and returns a dictionary mapping rule
+    # names to counts.  Rule functions are called as usual.  Used by
+    # lex(profile=...) to order the master regexs.
+    # ------------------------------------------------------------
+    def profile(self, data):
+        counts = {}
+        c = self.clone()
+        if c.lexbytes:
+            c._setbytes(False)
+        c.lexstatealt = None
+        c.lextypeids = None
+        c.lexstatereids = None
+        c.lexstatere = {}
+        for state, lre in self.lexstatere.items():
+            c.lexstatere[state] = [(_RuleCounter(cre, names, counts), findex) for (cre, findex), names
+                                   in zip(lre, self.lexstaterenames[state])]
+        c.lexstatestack = []
+        c.begin('INITIAL')
+        if isinstance(data, (str, bytes, bytearray, memoryview)):
+            data = [data]
+        for text in data:
+            if not isinstance(text, str):
+                text = str(text, 'latin-1')
+            c.input(text)
+            while c.token() is not None:
+                pass
+        return counts
+
     # ------------------------------------------------------------
     # token() - Return the next token from the Lexer
     #
@@ -205,6 +1016,8 @@ class Lexer:
         lexlen    = self.lexlen
         lexignore = self.lexignore
         lexdata   = self.lexdata
+        typeids   = self.lextypeids
+        FuncToken = LexBytesToken if self.lexbytes else LexToken
 
         while lexpos < lexlen:
             # This code provides some short-circuit code for whitespace, tabs, and other ignored characters
@@ -218,28 +1031,59 @@ class Lexer:
                 if not m:
                     continue
 
-                # Create a token for return
-                tok = LexToken()
-                tok.value = m.group()
-                tok.lineno = self.lineno
-                tok.lexpos = lexpos
-
-                i = m.lastindex
-                func, tok.type = lexindexfunc[i]
+                func, type = lexindexfunc[m.lastindex]
+                end = m.end()
 
                 if not func:
                     # If no token type was set, it's an ignored token
-                    if tok.type:
-                        self.lexpos = m.end()
-                        return tok
-                    else:
-                        lexpos = m.end()
+                    if type is None:
+                        lexpos = end
                         break
 
-                lexpos = m.end()
+                    # Create a token for return.  Its value is only taken from
+                    # the span [lexstart:lexstart+lexsize] when it's read.
+                    tok = LexSpanToken()
+                    tok.lexdata = lexdata
+                    tok.lexpos = tok.lexstart = lexpos
+                    tok.lexsize = end - lexpos
+                    tok.lineno = self.lineno
+                    tok.type = type
+                    self.lexpos = end
+                    return tok
+
+                # Declarative rule, processed here
+                if func.__class__ is TokenRule:
+                    lineno = self.lineno
+                    if func.newlines:
+                        self.lineno += m.group().count(func.newlines)
+                    if type is None:
+                        lexpos = end
+                        break
+                    tok = func.tokenclass()
+                    tok.lexdata = lexdata
+                    tok.lexpos = tok.lexstart = lexpos
+                    tok.lexsize = end - lexpos
+                    tok.lineno = lineno
+                    tok.type = type
+                    if func.keywords:
+                        value = m.group()
+                        type = func.keywords.get(value)
+                        if type is not None:
+                            tok.type = type
+                        elif value.__class__ is str and not func.convert:
+                            tok.value = value     # Keep the text made for the lookup
+                    self.lexpos = end
+                    return tok
 
-                # If token is processed by a function, call it
+                # If token is processed by a function, call it.  The value
+                # is made right away, as functions normally read it.
+                tok = FuncToken()
+                tok.value = m.group()
+                tok.lineno = self.lineno
+                tok.lexpos = lexpos
+                tok.type = type
 
+                lexpos = end
                 tok.lexer = self      # Set additional attributes useful in token rules
                 self.lexmatch = m
                 self.lexpos = lexpos
@@ -252,40 +1096,50 @@ class Lexer:
                     lexpos    = self.lexpos         # This is here in case user has updated lexpos.
                     lexignore = self.lexignore      # This is here in case there was a state change
                     break
+                if typeids is not None:
+                    newtok.type = self._typeid(newtok.type)
                 return newtok
             else:
                 # No match, see if in literals
                 if lexdata[lexpos] in self.lexliterals:
                     tok = LexToken()
-                    tok.value = lexdata[lexpos]
+                    tok.value = _char(lexdata, lexpos)
                     tok.lineno = self.lineno
-                    tok.type = tok.value
+                    tok.type = tok.value if typeids is None else self._typeid(tok.value)
                     tok.lexpos = lexpos
                     self.lexpos = lexpos + 1
                     return tok
 
                 # No match. Call t_error() if defined.
                 if self.lexerrorf:
-                    tok = LexToken()
-                    tok.value = self.lexdata[lexpos:]
+                    tok = LexSpanToken()
+                    tok.lexdata = lexdata
+                    tok.lexpos = tok.lexstart = lexpos
+                    tok.lexsize = _error_end(lexdata, lexpos) - lexpos
                     tok.lineno = self.lineno
                     tok.type = 'error'
                     tok.lexer = self
-                    tok.lexpos = lexpos
                     self.lexpos = lexpos
                     newtok = self.lexerrorf(tok)
                     if lexpos == self.lexpos:
                         # Error method didn't change text position at all. This is an error.
-                        raise LexError(f"Scanning error. Illegal character {lexdata[lexpos]!r}",
-                                       lexdata[lexpos:])
+                        raise LexError(f"Scanning error. Illegal character {_char(lexdata, lexpos)!r}",
+                                       _error_text(lexdata, lexpos))
                     lexpos = self.lexpos
                     if not newtok:
                         continue
+                    if typeids is not None:
+                        newtok.type = self._typeid(newtok.type)
                     return newtok
 
                 self.lexpos = lexpos
-                raise LexError(f"Illegal character {lexdata[lexpos]!r} at index {lexpos}",
-                               lexdata[lexpos:])
+                raise LexError(f"Illegal character {_char(lexdata, lexpos)!r} at index {lexpos}",
+                               _error_text(lexdata, lexpos))
+
+        # End of the window of a stream (see input_stream())
+        if self.lexstream is not None:
+            self.lexpos = lexpos
+            return None
 
         if self.lexeoff:
             tok = LexToken()
@@ -296,6 +1150,8 @@ class Lexer:
             tok.lexer = self
             self.lexpos = lexpos
             newtok = self.lexeoff(tok)
+            if newtok and typeids is not None:
+                newtok.type = self._typeid(newtok.type)
             return newtok
 
         self.lexpos = lexpos + 1
@@ -303,6 +1159,209 @@ class Lexer:
             raise RuntimeError('No input string given with input()')
         return None
 
+    # ------------------------------------------------------------
+    # tokenize_all() - Tokenize all of the input
+    #
+    # Returns a TokenColumns with the tokens of data (or of the rest
+    # of the current input).  The type ids are those of typeids, of
+    # settypeids() or else assigned as the types are found.
+    # ------------------------------------------------------------
+    def tokenize_all(self, data=None, typeids=None):
+        if data is not None:
+            self.input(data)
+        columns = TokenColumns(typeids if typeids is not None else self.lextypeids)
+        self.tokenize_into(columns)
+        return columns
+
+    # ------------------------------------------------------------
+    # tokenize_into() - Append the remaining tokens to columns
+    #
+    # Produces the same tokens as calling token() until the end of
+    # the input, but stores them in columns instead of creating a
+    # LexToken for each.  Tokens of rule functions, literals and the
+    # error and eof rules are still passed through LexToken objects.
+    # Note that the rule functions (t_error() included) all run here,
+    # before the tokens reach a parser.  Returns the number of tokens
+    # added.
+    # ------------------------------------------------------------
+    def tokenize_into(self, columns):
+        if self.lexdata is None:
+            raise RuntimeError('No input string given with input()')
+        saved = self.lextypeids
+        if saved is not columns.typeids:
+            self.settypeids(columns.typeids)
+        if self.lexbytes:
+            columns.tokenclass = LexBytesToken
+        try:
+            return self._tokenize_into(columns)
+        finally:
+            if self.lextypeids is not saved:
+                self.settypeids(saved)
+
+    def _tokenize_into(self, columns):
+        # Make local copies of frequently referenced attributes
+        lexpos    = self.lexpos
+        lexlen    = self.lexlen
+        lexignore = self.lexignore
+        lexdata   = self.lexdata
+        typeids   = self.lextypeids
+        types     = columns.types.append
+        starts    = columns.starts.append
+        ends      = columns.ends.append
+        linenos   = columns.linenos.append
+        values    = columns.values.append
+        count     = len(columns)
+        mark      = count               # First token with positions in the current window
+
+        while True:
+            while lexpos < lexlen:
+                if lexdata[lexpos] in lexignore:
+                    lexpos += 1
+                    continue
+
+                # Look for a regular expression match
+                for lexre, lexindexfunc in self.lexre:
+                    m = lexre.match(lexdata, lexpos)
+                    if not m:
+                        continue
+
+                    func, type = lexindexfunc[m.lastindex]
+                    end = m.end()
+
+                    if not func:
+                        # Simple token (or ignored if it has no type)
+                        if type is not None:
+                            types(type)
+                            starts(lexpos)
+                            ends(end)
+                            linenos(self.lineno)
+                            values(m.group())
+                        lexpos = end
+                        break
+
+                    # Declarative rule
+                    if func.__class__ is TokenRule:
+                        value = m.group()
+                        lineno = self.lineno
+                        if func.newlines:
+                            self.lineno += value.count(func.newlines)
+                        if type is not None:
+                            if func.keywords:
+                                type = func.keywords.get(value, type)
+                            types(type)
+                            starts(lexpos)
+                            ends(end)
+                            linenos(lineno)
+                            values(func.convert(value) if func.convert else value)
+                        lexpos = end
+                        break
+
+                    # Token processed by a function
+                    tok = LexBytesToken() if self.lexbytes else LexToken()
+                    tok.value = m.group()
+                    tok.lineno = self.lineno
+                    tok.lexpos = lexpos
+                    tok.type = type
+                    tok.lexer = self
+                    self.lexmatch = m
+                    self.lexpos = end
+                    newtok = func(tok)
+                    del tok.lexer
+                    del self.lexmatch
+
+                    lexpos    = self.lexpos         # This is here in case user has updated lexpos.
+                    lexignore = self.lexignore      # This is here in case there was a state change
+                    if newtok:
+                        try:
+                            types(typeids[newtok.type])
+                        except KeyError:
+                            self._typeid(newtok.type)     # Unknown type: raises LexError
+                        starts(newtok.lexpos)
+                        ends(end)
+                        linenos(newtok.lineno)
+                        values(newtok.value)
+                    break
+                else:
+                    # No match, see if in literals
+                    if lexdata[lexpos] in self.lexliterals:
+                        c = _char(lexdata, lexpos)
+                        types(self._typeid(c))
+                        starts(lexpos)
+                        ends(lexpos + 1)
+                        linenos(self.lineno)
+                        values(c)
+                        lexpos += 1
+                        continue
+
+                    # No match. Call t_error() if defined.
+                    if self.lexerrorf:
+                        tok = LexSpanToken()
+                        tok.lexdata = lexdata
+                        tok.lexpos = tok.lexstart = lexpos
+                        tok.lexsize = _error_end(lexdata, lexpos) - lexpos
+                        tok.lineno = self.lineno
+                        tok.type = 'error'
+                        tok.lexer = self
+                        self.lexpos = lexpos
+                        newtok = self.lexerrorf(tok)
+                        if lexpos == self.lexpos:
+                            # Error method didn't change text position at all. This is an error.
+                            raise LexError(f"Scanning error. Illegal character {_char(lexdata, lexpos)!r}",
+                                           _error_text(lexdata, lexpos))
+                        lexpos = self.lexpos
+                        lexignore = self.lexignore
+                        if newtok:
+                            types(self._typeid(newtok.type))
+                            starts(newtok.lexpos)
+                            ends(lexpos)
+                            linenos(newtok.lineno)
+                            values(newtok.value)
+                        continue
+
+                    self.lexpos = lexpos
+                    raise LexError(f"Illegal character {_char(lexdata, lexpos)!r} at index {lexpos}",
+                                   _error_text(lexdata, lexpos))
+
+            self.lexpos = lexpos
+
+            # End of the window of a stream: make the positions absolute
+            # and read more
+            if self.lexstream is not None:
+                _shift_positions(columns, mark, self.lexoffset)
+                self._readmore()
+                mark      = len(columns)
+                lexpos    = self.lexpos
+                lexlen    = self.lexlen
+                lexdata   = self.lexdata
+                continue
+
+            if not self.lexeoff:
+                break
+
+            # The eof rule may supply more input with input()
+            tok = LexToken()
+            tok.type = 'eof'
+            tok.value = ''
+            tok.lineno = self.lineno
+            tok.lexpos = lexpos
+            tok.lexer = self
+            newtok = self.lexeoff(tok)
+            if newtok:
+                types(self._typeid(newtok.type))
+                starts(newtok.lexpos)
+                ends(newtok.lexpos)
+                linenos(newtok.lineno)
+                values(newtok.value)
+            if self.lexpos >= self.lexlen:
+                break
+            lexpos    = self.lexpos
+            lexlen    = self.lexlen
+            lexdata   = self.lexdata
+            lexignore = self.lexignore
+
+        _shift_positions(columns, mark, self.lexoffset)
+        return len(columns) - count
+
     # Iterator interface
     def __iter__(self):
         return self
@@ -340,6 +1399,59 @@ def get_caller_module_dict(levels):
     f = sys._getframe(levels)
     return { **f.f_globals, **f.f_locals }
 
+# -----------------------------------------------------------------------------
+# _lextab_signature()
+#
+# Returns the key under which the lexer tables for a given token rule
+# signature are cached.  The PLY version is part of the key so that
+# upgrading PLY invalidates existing cache files.
+# -----------------------------------------------------------------------------
+def _lextab_signature(signature):
+    return hashlib.sha256(('%s:%s' % (__version__, signature)).encode('utf-8')).hexdigest()
+
+# -----------------------------------------------------------------------------
+# _file_mode()
+#
+# The mode of a file created with open(): 0o666 less the umask.  Given to the
+# cache files (here and in yacc.py) before they replace the old ones, since
+# the files of tempfile.mkstemp() can only be read by their owner, which
+# would keep other users of the rules from reading the cache.
+# -----------------------------------------------------------------------------
+def _file_mode():
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+# -----------------------------------------------------------------------------
+# _funcs_to_names()
+#
+# Given a list of regular expression functions, this converts it to a list
+# suitable for output to a table file
+# -----------------------------------------------------------------------------
+def _funcs_to_names(funclist, namelist):
+    result = []
+    for f, name in zip(funclist, namelist):
+        if f and f[0]:
+            result.append((name, f[1]))
+        else:
+            result.append(f)
+    return result
+
+# -----------------------------------------------------------------------------
+# _names_to_funcs()
+#
+# Given a list of regular expression function names, this converts it back to
+# functions.
+# -----------------------------------------------------------------------------
+def _names_to_funcs(namelist, fdict):
+    result = []
+    for n in namelist:
+        if n and n[0]:
+            result.append((fdict[n[0]], n[1]))
+        else:
+            result.append(n)
+    return result
+
 # -----------------------------------------------------------------------------
 # _form_master_re()
 #
@@ -363,6 +1475,9 @@ def _form_master_re(relist, reflags, ldict, toknames):
             if type(handle) in (types.FunctionType, types.MethodType):
                 lexindexfunc[i] = (handle, toknames[f])
                 lexindexnames[i] = f
+            elif isinstance(handle, TokenRule):
+                lexindexfunc[i] = (handle, None if f.find('ignore_') > 0 else toknames[f])
+                lexindexnames[i] = f
             elif handle is not None:
                 lexindexnames[i] = f
                 if f.find('ignore_') > 0:
@@ -371,12 +1486,234 @@ def _form_master_re(relist, reflags, ldict, toknames):
                     lexindexfunc[i] = (None, toknames[f])
 
         return [(lexre, lexindexfunc)], [regex], [lexindexnames]
-    except Exception:
-        m = (len(relist) // 2) + 1
+    except Exception as e:
+        # A single rule that doesn't compile can't be split any further (it
+        # is only found here with lex(optimize=True), see validate_all())
+        if len(relist) == 1:
+            if isinstance(e, re.error):
+                name = relist[0][4:relist[0].index('>')]
+                raise SyntaxError(f"Invalid regular expression for rule {name!r}. {e}") from e
+            raise
+        m = len(relist) // 2
         llist, lre, lnames = _form_master_re(relist[:m], reflags, ldict, toknames)
         rlist, rre, rnames = _form_master_re(relist[m:], reflags, ldict, toknames)
         return (llist+rlist), (lre+rre), (lnames+rnames)
 
+# -----------------------------------------------------------------------------
+# _form_state_res()
+#
+# Builds the master regular expressions of every lexer state from the lists of
+# (name, regex) rules in rules.  debuglog is only given when debugging.
+# -----------------------------------------------------------------------------
+def _form_state_res(lexobj, rules, stateinfo, reflags, ldict, toknames, debuglog):
+    if debuglog:
+        debuglog.info('lex: ==== MASTER REGEXS FOLLOW ====')
+
+    for state, rule_list in rules.items():
+        regex_list = ['(?P<%s>%s)' % rule for rule in rule_list]
+        lexre, re_text, re_names = _form_master_re(regex_list, reflags, ldict, toknames)
+        lexobj.lexstatere[state] = lexre
+        lexobj.lexstateretext[state] = re_text
+        lexobj.lexstaterenames[state] = re_names
+        if debuglog:
+            for i, text in enumerate(re_text):
+                debuglog.info("lex: state '%s' : regex[%d] = '%s'", state, i, text)
+
+    # For inclusive states, we need to add the regular expressions from the INITIAL state
+    for state, stype in stateinfo.items():
+        if state != 'INITIAL' and stype == 'inclusive':
+            lexobj.lexstatere[state].extend(lexobj.lexstatere['INITIAL'])
+            lexobj.lexstateretext[state].extend(lexobj.lexstateretext['INITIAL'])
+            lexobj.lexstaterenames[state].extend(lexobj.lexstaterenames['INITIAL'])
+
+    lexobj.lexstateinfo = stateinfo
+    lexobj.lexidcache = None
+    lexobj.lexre = lexobj.lexstatere['INITIAL']
+    lexobj.lexretext = lexobj.lexstateretext['INITIAL']
+    lexobj.lexreflags = reflags
+
+# -----------------------------------------------------------------------------
+# _first_chars()
+#
+# The characters a regular expression can start a match with, as a sorted list
+# of disjoint (first, last) code point ranges.  The expression is taken apart
+# with the parser of the re module.  Whenever the answer isn't certain (case
+# folding, backreferences, expressions that can match the empty string or an
+# unknown syntax) every character is returned, so the result is never smaller
+# than the real set.
+# -----------------------------------------------------------------------------
+_ALLCHARS = [(0, sys.maxunicode)]
+
+try:
+    from re import _parser as _sre_parse, _constants as _sre
+except ImportError:
+    try:
+        import sre_parse as _sre_parse, sre_constants as _sre
+    except ImportError:
+        _sre_parse = _sre = None
+
+class _Unknown(Exception):
+    pass
+
+def _merge_ranges(ranges):
+    result = []
+    for first, last in sorted(ranges):
+        if result and first <= result[-1][1] + 1:
+            if last > result[-1][1]:
+                result[-1] = (result[-1][0], last)
+        else:
+            result.append((first, last))
+    return result
+
+def _complement_ranges(ranges):
+    result = []
+    start = 0
+    for first, last in _merge_ranges(ranges):
+        if first > start:
+            result.append((start, first - 1))
+        start = last + 1
+    if start <= sys.maxunicode:
+        result.append((start, sys.maxunicode))
+    return result
+
+def _ranges_meet(a, b):
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i][1] < b[j][0]:
+            i += 1
+        elif b[j][1] < a[i][0]:
+            j += 1
+        else:
+            return True
+    return False
+
+# Ranges of the characters matched by \d, \w, \s and their negations, found
+# by matching the class against a string with every character in it
+_category_ranges_cache = {}
+
+def _category_ranges(category, flags):
+    escape = {
+        _sre.CATEGORY_DIGIT: r'\d', _sre.CATEGORY_NOT_DIGIT: r'\D',
+        _sre.CATEGORY_WORD: r'\w', _sre.CATEGORY_NOT_WORD: r'\W',
+        _sre.CATEGORY_SPACE: r'\s', _sre.CATEGORY_NOT_SPACE: r'\S',
+    }.get(category)
+    if escape is None:
+        raise _Unknown(category)
+    key = (escape, flags & re.ASCII)
+    if key not in _category_ranges_cache:
+        allchars = ''.join(map(chr, range(sys.maxunicode + 1)))
+        _category_ranges_cache[key] = [(m.start(), m.end() - 1) for m in
+                                       re.finditer(escape + '+', allchars, flags & re.ASCII)]
+    return _category_ranges_cache[key]
+
+# First characters of a parsed sequence, and whether it can match ''
+def _first_of(items, flags):
+    ranges = []
+    for op, av in items:
+        if op is _sre.LITERAL:
+            ranges.append((av, av))
+            return ranges, False
+        if op is _sre.NOT_LITERAL:
+            return ranges + _complement_ranges([(av, av)]), False
+        if op is _sre.ANY:
+            return _ALLCHARS, False
+        if op is _sre.IN:
+            inranges = []
+            negate = False
+            for iop, iav in av:
+                if iop is _sre.NEGATE:
+                    negate = True
+                elif iop is _sre.LITERAL:
+                    inranges.append((iav, iav))
+                elif iop is _sre.RANGE:
+                    inranges.append(iav)
+                elif iop is _sre.CATEGORY:
+                    inranges.extend(_category_ranges(iav, flags))
+                else:
+                    raise _Unknown(iop)
+            if negate:
+                inranges = _complement_ranges(inranges)
+            return ranges + inranges, False
+        if op is _sre.SUBPATTERN:
+            group, addflags, delflags, sub = av
+            if addflags & re.IGNORECASE:
+                raise _Unknown(op)
+            subranges, nullable = _first_of(sub, flags)
+        elif op is getattr(_sre, 'ATOMIC_GROUP', None):
+            subranges, nullable = _first_of(av, flags)
+        elif op is _sre.BRANCH:
+            subranges = []
+            nullable = False
+            for branch in av[1]:
+                branchranges, branchnullable = _first_of(branch, flags)
+                subranges += branchranges
+                nullable = nullable or branchnullable
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT, getattr(_sre, 'POSSESSIVE_REPEAT', None)):
+            lo, hi, sub = av
+            subranges, nullable = _first_of(sub, flags)
+            nullable = nullable or lo == 0
+        elif op in (_sre.AT, _sre.ASSERT, _sre.ASSERT_NOT):
+            # Zero width: they only restrict where the match can start
+            continue
+        else:
+            raise _Unknown(op)
+        ranges += subranges
+        if not nullable:
+            return ranges, False
+    return ranges, True
+
+def _first_chars(regex, reflags):
+    if _sre_parse is None:
+        return _ALLCHARS
+    try:
+        parsed = _sre_parse.parse(regex, reflags)
+        flags = parsed.state.flags
+        if flags & re.IGNORECASE:
+            return _ALLCHARS
+        ranges, nullable = _first_of(parsed.data, flags)
+    except Exception:
+        return _ALLCHARS
+    return _ALLCHARS if nullable else _merge_ranges(ranges)
+
+# -----------------------------------------------------------------------------
+# _order_rules()
+#
+# Reorders the (name, regex) rules of a lexer state so that the rules with
+# the most matches in counts come first.  The master regex takes the first
+# alternative that matches, so a rule only moves ahead of an earlier rule
+# when their first characters are disjoint: at any position at most one of
+# the two can match, and the rule chosen for every input stays the same.
+#
+# A rule that has to stay behind others can only be moved forward together
+# with them, so each step places the rule whose group (the rule and the rules
+# still unplaced that it must follow) has the most matches per rule.  Rules
+# with no counts keep their order.
+# -----------------------------------------------------------------------------
+def _order_rules(rules, counts, reflags):
+    firsts = [_first_chars(regex, reflags) for name, regex in rules]
+    hits = [counts.get(name, 0) for name, regex in rules]
+
+    # The earlier rules each rule must stay behind, directly or not
+    before = []
+    for j in range(len(rules)):
+        direct = [i for i in range(j) if _ranges_meet(firsts[i], firsts[j])]
+        before.append(set(direct).union(*(before[i] for i in direct)))
+
+    order = []
+    left = set(range(len(rules)))
+    while left:
+        best = None
+        for j in sorted(left):
+            group = sorted((before[j] & left) | {j})
+            density = sum(hits[i] for i in group) / len(group)
+            if best is None or density > best_density:
+                best, best_density = group, density
+        # The group is closed under before, so its rules can be placed in
+        # their original order
+        order.extend(best)
+        left.difference_update(best)
+    return [rules[j] for j in order]
+
 # -----------------------------------------------------------------------------
 # def _statetoken(s,names)
 #
@@ -434,6 +1771,28 @@ class LexerReflect(object):
         self.validate_rules()
         return self.error
 
+    # Compute a signature over the token rules
+    def signature(self):
+        parts = []
+        try:
+            parts.append(' '.join(self.tokens))
+            parts.append(repr(self.literals))
+            parts.append(repr(sorted(self.stateinfo.items())))
+            for state in self.stateinfo:
+                for fname, f in self.funcsym[state]:
+                    parts.append('%s %s %s' % (state, fname, _get_regex(f)))
+                    if isinstance(f, TokenRule):
+                        parts.append('%s %s rule' % (state, fname))
+                for name, r in self.strsym[state]:
+                    parts.append('%s %s %s' % (state, name, r))
+            parts.append(repr(sorted(self.ignore.items())))
+            parts.append(repr(sorted((s, f.__name__) for s, f in self.errorf.items())))
+            parts.append(repr(sorted((s, f.__name__) for s, f in self.eoff.items())))
+            parts.append(str(self.reflags))
+        except (TypeError, ValueError, AttributeError):
+            pass
+        return '\n'.join(parts)
+
     # Get the tokens map
     def get_tokens(self):
         tokens = self.ldict.get('tokens', None)
@@ -554,6 +1913,14 @@ class LexerReflect(object):
                 else:
                     for s in states:
                         self.funcsym[s].append((f, t))
+            elif isinstance(t, TokenRule):
+                if tokname in ('ignore', 'error', 'eof'):
+                    self.log.error("%s:%d: Rule %r must be defined as a %s", t.file, t.line, f,
+                                   'string' if tokname == 'ignore' else 'function')
+                    self.error = True
+                else:
+                    for s in states:
+                        self.funcsym[s].append((f, t))
             elif isinstance(t, StringTypes):
                 if tokname == 'ignore':
                     for s in states:
@@ -571,9 +1938,9 @@ class LexerReflect(object):
                 self.log.error('%s not defined as a function or string', f)
                 self.error = True
 
-        # Sort the functions by line number
+        # Sort the functions and declarative rules by line number
         for f in self.funcsym.values():
-            f.sort(key=lambda x: x[1].__code__.co_firstlineno)
+            f.sort(key=lambda x: x[1].line if isinstance(x[1], TokenRule) else x[1].__code__.co_firstlineno)
 
         # Sort the strings by regular expression length
         for s in self.strsym.values():
@@ -585,6 +1952,10 @@ class LexerReflect(object):
             # Validate all rules defined by functions
 
             for fname, f in self.funcsym[state]:
+                if isinstance(f, TokenRule):
+                    self.validate_tokenrule(fname, f)
+                    continue
+
                 line = f.__code__.co_firstlineno
                 file = f.__code__.co_filename
                 module = inspect.getmodule(f)
@@ -675,6 +2046,39 @@ class LexerReflect(object):
         for module in self.modules:
             self.validate_module(module)
 
+    # Validate a declarative rule
+    def validate_tokenrule(self, name, rule):
+        tokname = self.toknames[name]
+        if tokname not in self.tokens and tokname.find('ignore_') < 0:
+            self.log.error("%s:%d: Rule %r defined for an unspecified token %s", rule.file, rule.line, name, tokname)
+            self.error = True
+
+        for text, type in (rule.keywords or {}).items():
+            if type not in self.tokens:
+                self.log.error("%s:%d: Rule %r maps %r to an unspecified token %s", rule.file, rule.line,
+                               name, text, type)
+                self.error = True
+
+        if rule.convert is not None and not callable(rule.convert):
+            self.log.error("%s:%d: Value converter of rule %r is not callable", rule.file, rule.line, name)
+            self.error = True
+
+        if not isinstance(rule.regex, StringTypes) or not rule.regex:
+            self.log.error("%s:%d: No regular expression defined for rule %r", rule.file, rule.line, name)
+            self.error = True
+            return
+
+        try:
+            c = re.compile('(?P<%s>%s)' % (name, rule.regex), self.reflags)
+            if c.match(''):
+                self.log.error("%s:%d: Regular expression for rule %r matches empty string", rule.file, rule.line, name)
+                self.error = True
+        except re.error as e:
+            self.log.error("%s:%d: Invalid regular expression for rule %r. %s", rule.file, rule.line, name, e)
+            if '#' in rule.regex:
+                self.log.error("%s:%d. Make sure '#' in rule %r is escaped with '\\#'", rule.file, rule.line, name)
+            self.error = True
+
     # -----------------------------------------------------------------------------
     # validate_module()
     #
@@ -709,19 +2113,58 @@ class LexerReflect(object):
                     self.error = True
             linen += 1
 
+# -----------------------------------------------------------------------------
+# _profile_digest()
+#
+# A digest of the sample input of lex(profile=...) (a string, bytes or a list
+# of them, normalized as Lexer.profile() reads them).  It is part of the
+# signature of the lexer tables, which keep the order of the rules found on
+# the sample.
+# -----------------------------------------------------------------------------
+def _profile_digest(profile):
+    if isinstance(profile, (str, bytes, bytearray, memoryview)):
+        profile = [profile]
+    digest = hashlib.sha256()
+    for text in profile:
+        if not isinstance(text, str):
+            text = str(text, 'latin-1')
+        data = text.encode('utf-8')
+        digest.update(b'%d:' % len(data))
+        digest.update(data)
+    return digest.hexdigest()
+
 # -----------------------------------------------------------------------------
 # lex(module)
 #
 # Build all of the regular expression rules from definitions in the supplied module
+#
+# backend selects how the tokens are matched: 'regex' tries the master regular
+# expressions (the rules, in order) at each position; 'dfa' compiles the rules
+# into a single DFA (see lexdfa.py), except in the lexer states with rules
+# that a DFA can't match as re does.  Both produce the same tokens.
+#
+# profile is a sample input (see Lexer.profile()).  The rules that match most
+# often in it are moved to the front of the master regexs, where this can't
+# change the tokens (see _order_rules()), so that fewer alternatives fail
+# before a match.  The order is saved in lextab and kept until the rules or
+# the sample change.
 # -----------------------------------------------------------------------------
 def lex(*, module=None, object=None, debug=False, 
-        reflags=int(re.VERBOSE), debuglog=None, errorlog=None):
+        reflags=int(re.VERBOSE), debuglog=None, errorlog=None, lextab=None,
+        optimize=False, backend='regex', profile=None):
 
     global lexer
 
+    if backend == 'regex':
+        lexclass = Lexer
+    elif backend == 'dfa':
+        from .lexdfa import DFALexer as lexclass
+    else:
+        raise ValueError(f'Unknown lexer backend {backend!r}')
+
     ldict = None
     stateinfo  = {'INITIAL': 'inclusive'}
-    lexobj = Lexer()
+    lexobj = lexclass()
     global token, input
 
     if errorlog is None:
@@ -748,8 +2191,31 @@ def lex(*, module=None, object=None, debug=False,
     # Collect parser information from the dictionary
     linfo = LexerReflect(ldict, log=errorlog, reflags=reflags)
     linfo.get_all()
-    if linfo.validate_all():
-        raise SyntaxError("Can't build lexer")
+
+    # Try to reuse the lexer tables from the cache file.  The rules were
+    # validated when the file was written, so validation is skipped on a hit.
+    signature = linfo.signature()
+    if profile is not None and backend == 'regex':
+        if not isinstance(profile, (str, bytes, bytearray, memoryview)):
+            profile = list(profile)
+        signature += '\nprofile ' + _profile_digest(profile)
+    if lextab and not debug:
+        try:
+            if lexobj.readtab(lextab, signature, ldict):
+                token = lexobj.token
+                input = lexobj.input
+                lexer = lexobj
+                return lexobj
+        except Exception as e:
+            errorlog.warning("There was a problem loading the lexer table file %r: %r", lextab, e)
+            lexobj = lexclass()
+
+    # In optimized mode, the rules are assumed to have been validated during
+    # development.  The individual regular expressions aren't compiled, the
+    # source files aren't scanned for duplicate rules and no warnings are issued.
+    if not optimize:
+        if linfo.validate_all():
+            raise SyntaxError("Can't build lexer")
 
     # Dump some basic debugging information
     if debug:
@@ -773,50 +2239,27 @@ def lex(*, module=None, object=None, debug=False,
     # Get the stateinfo dictionary
     stateinfo = linfo.stateinfo
 
-    regexs = {}
-    # Build the master regular expressions
+    rules = {}
+    # Collect the (name, regex) rules of each state
     for state in stateinfo:
-        regex_list = []
+        rule_list = []
 
         # Add rules defined by functions first
         for fname, f in linfo.funcsym[state]:
-            regex_list.append('(?P<%s>%s)' % (fname, _get_regex(f)))
+            rule_list.append((fname, _get_regex(f)))
             if debug:
                 debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", fname, _get_regex(f), state)
 
         # Now add all of the simple rules
         for name, r in linfo.strsym[state]:
-            regex_list.append('(?P<%s>%s)' % (name, r))
+            rule_list.append((name, r))
             if debug:
                 debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", name, r, state)
 
-        regexs[state] = regex_list
+        rules[state] = rule_list
 
     # Build the master regular expressions
-
-    if debug:
-        debuglog.info('lex: ==== MASTER REGEXS FOLLOW ====')
-
-    for state in regexs:
-        lexre, re_text, re_names = _form_master_re(regexs[state], reflags, ldict, linfo.toknames)
-        lexobj.lexstatere[state] = lexre
-        lexobj.lexstateretext[state] = re_text
-        lexobj.lexstaterenames[state] = re_names
-        if debug:
-            for i, text in enumerate(re_text):
-                debuglog.info("lex: state '%s' : regex[%d] = '%s'", state, i, text)
-
-    # For inclusive states, we need to add the regular expressions from the INITIAL state
-    for state, stype in stateinfo.items():
-        if state != 'INITIAL' and stype == 'inclusive':
-            lexobj.lexstatere[state].extend(lexobj.lexstatere['INITIAL'])
-            lexobj.lexstateretext[state].extend(lexobj.lexstateretext['INITIAL'])
-            lexobj.lexstaterenames[state].extend(lexobj.lexstaterenames['INITIAL'])
-
-    lexobj.lexstateinfo = stateinfo
-    lexobj.lexre = lexobj.lexstatere['INITIAL']
-    lexobj.lexretext = lexobj.lexstateretext['INITIAL']
-    lexobj.lexreflags = reflags
+    _form_state_res(lexobj, rules, stateinfo, reflags, ldict, linfo.toknames, debug and debuglog)
 
     # Set up ignore variables
     lexobj.lexstateignore = linfo.ignore
@@ -825,16 +2268,28 @@ def lex(*, module=None, object=None, debug=False,
     # Set up error functions
     lexobj.lexstateerrorf = linfo.errorf
     lexobj.lexerrorf = linfo.errorf.get('INITIAL', None)
-    if not lexobj.lexerrorf:
+    if not lexobj.lexerrorf and not optimize:
         errorlog.warning('No t_error rule is defined')
 
     # Set up eof functions
     lexobj.lexstateeoff = linfo.eoff
     lexobj.lexeoff = linfo.eoff.get('INITIAL', None)
 
+    # The DFAs are built here, so the states lexed with the master regexs
+    # (their rules can't be handled by a DFA, see lexdfa.py) are reported by lex()
+    if lexclass is not Lexer:
+        for state in stateinfo:
+            lexobj.begin(state)
+        lexobj.begin('INITIAL')
+        if not optimize:
+            for state, e in lexobj.lexdfaerrors.items():
+                errorlog.warning('State %r uses the regex backend. %s', state, e)
+
     # Check state information for ignore and error rules
     for s, stype in stateinfo.items():
         if stype == 'exclusive':
+            if optimize:
+                continue
             if s not in linfo.errorf:
                 errorlog.warning("No error rule is defined for exclusive state %r", s)
             if s not in linfo.ignore and lexobj.lexignore:
@@ -845,6 +2300,25 @@ def lex(*, module=None, object=None, debug=False,
             if s not in linfo.ignore:
                 linfo.ignore[s] = linfo.ignore.get('INITIAL', '')
 
+    # Order the alternatives of the master regexs by the number of matches
+    # of each rule on the sample input.  The DFA backend doesn't try the
+    # rules one after the other, so there is nothing to order.
+    if profile is not None and lexclass is Lexer:
+        counts = lexobj.profile(profile)
+        for state in rules:
+            rules[state] = _order_rules(rules[state], counts, reflags)
+        if debug:
+            debuglog.info('lex: rule matches = %r', counts)
+        _form_state_res(lexobj, rules, stateinfo, reflags, ldict, linfo.toknames, debug and debuglog)
+        lexobj.begin('INITIAL')
+
+    # Save the lexer tables for the next run
+    if lextab:
+        try:
+            lexobj.writetab(lextab, signature)
+        except OSError as e:
+            errorlog.warning("Couldn't write lexer table file %r. %s", lextab, e)
+
     # Create global versions of the token() and input() functions
     token = lexobj.token
     input = lexobj.input
@@ -0,0 +1,734 @@
+# -----------------------------------------------------------------------------
+# ply: lexdfa.py
+#
+# Table-driven DFA backend for ply.lex (lex(backend='dfa')).
+#
+# The master regular expressions built by lex() are translated into a single
+# NFA per lexer state, and the NFA into a DFA.  Each token is then found in
+# one left to right scan of the input instead of trying the rules one after
+# the other.  The rule chosen is the one PLY would choose: the first rule (in
+# master regex order) that matches, with its longest match.  This is the
+# token found by the regex backend as long as every rule, taken on its own,
+# matches as much as it can.  That is true of the usual token rules, but not
+# of rules such as r'a?(ab)?', where the backtracking matcher stops early:
+# rules where the two can differ are detected (see DFA.check()), and the
+# lexer states that have them are lexed with the master regexs, as by the
+# regex backend.
+#
+# Character sets are never enumerated.  The DFA is built lazily, one
+# transition at a time, and each distinct character is classified once by
+# testing it against the character sets of the rules with the re module
+# itself, so flags, Unicode classes and case folding behave exactly as in
+# the regex backend.  Runs of characters that leave a state unchanged are
+# skipped with one call to a compiled regex.
+#
+# Only the regular subset of the re syntax is supported: no anchors,
+# lookarounds, backreferences, conditional groups or non-greedy
+# quantifiers.  The states with rules that use anything else are lexed
+# with the master regexs too, and lex() warns about them.  The input must
+# be a str (bytes input needs the regex backend).
+# -----------------------------------------------------------------------------
+
+import array
+import re
+import sys
+import unicodedata
+
+from .lex import Lexer, LexError, LexSpanToken, LexToken, TokenRule
+
+# Raised for the rules a DFA can't match as re does (their lexer state then
+# keeps the master regexs, see DFALexer)
+class DFAError(Exception):
+    pass
+
+# -----------------------------------------------------------------------------
+#                           === Regex Parsing ===
+#
+# The parser produces a small syntax tree:
+#
+#     ('set', atom)                     one character of character set atom
+#     ('cat', [nodes])                  concatenation
+#     ('alt', [nodes])                  alternation
+#     ('rep', node, min, max)           repetition (max is None if unbounded)
+#     ('group', index, node)            capturing group number index
+#
+# Character sets (atoms) are kept as re source text, e.g. '[a-z]', r'\d' or
+# '.', and numbered in the order they are found.
+# -----------------------------------------------------------------------------
+
+_quantifier = re.compile(r'\{(\d*)(,(\d*))?\}')
+
+_control_escapes = {
+    'a': '\a', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v',
+}
+
+class _RegexParser:
+    def __init__(self, text, flags, atoms):
+        self.text = text
+        self.pos = 0
+        self.verbose = flags & re.VERBOSE
+        self.atoms = atoms          # Dictionary mapping atom text to atom number
+        self.groups = 0             # Number of capturing groups seen
+
+    def error(self, msg):
+        raise DFAError(f'{msg} at position {self.pos} of {self.text!r}')
+
+    def atom(self, text):
+        return ('set', self.atoms.setdefault(text, len(self.atoms)))
+
+    # Next significant character (without consuming it)
+    def peek(self):
+        text = self.text
+        if self.verbose:
+            while self.pos < len(text):
+                c = text[self.pos]
+                if c in ' \t\n\r\f\v':
+                    self.pos += 1
+                elif c == '#':
+                    end = text.find('\n', self.pos)
+                    self.pos = len(text) if end < 0 else end + 1
+                else:
+                    break
+        return text[self.pos] if self.pos < len(text) else ''
+
+    def parse(self):
+        node = self.parse_alt()
+        if self.peek():
+            self.error('Unbalanced parenthesis')
+        return node
+
+    def parse_alt(self):
+        branches = [self.parse_cat()]
+        while self.peek() == '|':
+            self.pos += 1
+            branches.append(self.parse_cat())
+        return branches[0] if len(branches) == 1 else ('alt', branches)
+
+    def parse_cat(self):
+        items = []
+        while self.peek() not in ('', '|', ')'):
+            items.append(self.parse_repeat())
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def parse_repeat(self):
+        node = self.parse_atom()
+        while True:
+            c = self.peek()
+            if c == '*':
+                lo, hi = 0, None
+                self.pos += 1
+            elif c == '+':
+                lo, hi = 1, None
+                self.pos += 1
+            elif c == '?':
+                lo, hi = 0, 1
+                self.pos += 1
+            elif c == '{' and _quantifier.match(self.text, self.pos):
+                m = _quantifier.match(self.text, self.pos)
+                lo = int(m.group(1) or 0)
+                if m.group(2):
+                    hi = int(m.group(3)) if m.group(3) else None
+                else:
+                    hi = lo
+                self.pos = m.end()
+            else:
+                return node
+            if self.pos < len(self.text) and self.text[self.pos] in '?+':
+                self.error('Non-greedy and possessive quantifiers are not supported')
+            node = ('rep', node, lo, hi)
+
+    def parse_atom(self):
+        c = self.peek()
+        text = self.text
+        self.pos += 1
+        if c == '(':
+            if text.startswith('?:', self.pos):
+                self.pos += 2
+                index = None
+            elif text.startswith('?P<', self.pos):
+                self.pos = text.index('>', self.pos) + 1
+                self.groups += 1
+                index = self.groups
+            elif text.startswith('?', self.pos):
+                self.error('Unsupported group')
+            else:
+                self.groups += 1
+                index = self.groups
+            node = self.parse_alt()
+            if self.peek() != ')':
+                self.error('Missing )')
+            self.pos += 1
+            return node if index is None else ('group', index, node)
+
+        if c == '[':
+            return self.atom(self.parse_class())
+        if c == '.':
+            return self.atom('.')
+        if c in '^$':
+            self.error('Anchors are not supported')
+        if c == '\\':
+            return self.parse_escape()
+        if c in '*+?)':
+            self.error('Unexpected %r' % c)
+        return self.atom(re.escape(c))
+
+    # Source text of a character class (the opening [ has been consumed)
+    def parse_class(self):
+        text = self.text
+        start = self.pos - 1
+        i = self.pos
+        if i < len(text) and text[i] == '^':
+            i += 1
+        if i < len(text) and text[i] == ']':
+            i += 1
+        while i < len(text) and text[i] != ']':
+            i += 2 if text[i] == '\\' else 1
+        if i >= len(text):
+            self.error('Unterminated character set')
+        self.pos = i + 1
+        return text[start:self.pos]
+
+    def parse_escape(self):
+        text = self.text
+        if self.pos >= len(text):
+            self.error('Bad escape')
+        e = text[self.pos]
+        self.pos += 1
+        if e in 'dDwWsS':
+            return self.atom('\\' + e)
+        if e in _control_escapes:
+            return self.atom(re.escape(_control_escapes[e]))
+        if e in 'xuU':
+            size = {'x': 2, 'u': 4, 'U': 8}[e]
+            code = text[self.pos:self.pos + size]
+            self.pos += size
+            return self.atom(re.escape(chr(int(code, 16))))
+        if e == 'N':
+            end = text.index('}', self.pos)
+            name = text[self.pos + 1:end]
+            self.pos = end + 1
+            return self.atom(re.escape(unicodedata.lookup(name)))
+        if e == '0':
+            m = re.compile('[0-7]{0,2}').match(text, self.pos)
+            self.pos = m.end()
+            return self.atom(re.escape(chr(int('0' + m.group(), 8))))
+        if e.isalnum():
+            self.error('Unsupported escape \\%s' % e)
+        return self.atom(re.escape(e))
+
+# -----------------------------------------------------------------------------
+#                       === NFA and DFA Construction ===
+# -----------------------------------------------------------------------------
+
+DEAD = -1               # Transition to the dead state
+NOMATCH = 1 << 62       # Rule number meaning "no rule"
+
+# A string of every character (for DFA.overlap())
+def _all_characters():
+    codes = array.array('I', range(sys.maxunicode + 1))
+    return codes.tobytes().decode('utf-32-le' if sys.byteorder == 'little' else 'utf-32-be', 'surrogatepass')
+
+class DFA:
+    # retexts is the list of master regex texts of a lexer state
+    def __init__(self, retexts, reflags):
+        self.atoms = {}
+        self.eps = []                   # Epsilon transitions of each NFA state
+        self.edges = []                 # (atom, target) transitions of each NFA state
+        self.accept = {}                # NFA state -> rule number
+        self.rules = []                 # (master regex number, group number) of each rule
+
+        starts = []
+        trees = []
+        for ci, text in enumerate(retexts):
+            tree = _RegexParser(text, reflags, self.atoms).parse()
+            branches = tree[1] if tree[0] == 'alt' else [tree]
+            for branch in branches:
+                if branch[0] != 'group':
+                    raise DFAError(f'Unexpected master regex {text!r}')
+                s, e = self.build(branch[2])
+                self.accept[e] = len(self.rules)
+                self.rules.append((ci, branch[1]))
+                starts.append(s)
+                trees.append((branch[2], text, branch[1]))
+        start = self.newstate()
+        self.eps[start] = starts
+
+        # Single character tests for each atom, with the lexer flags
+        flags = reflags & ~re.VERBOSE
+        self.atomtext = sorted(self.atoms, key=self.atoms.get)
+        self.atomtests = [re.compile(text, flags).match for text in self.atomtext]
+        self.flags = flags
+        self.charatoms = {}             # Character -> atoms containing it
+
+        self.overlaps = {}              # (atom, atom) -> True if they share a character
+        self.characters = None          # Every character (see overlap())
+        for tree, text, index in trees:
+            problem = self.check(tree)
+            if problem:
+                names = {i: name for name, i in re.compile(text, reflags).groupindex.items()}
+                raise DFAError(f'Rule {names.get(index, index)!r}: {problem}')
+        self.characters = None
+
+        # DFA tables, indexed by DFA state number
+        self.states = {}                # Set of NFA states -> DFA state number
+        self.nfasets = []               # DFA state number -> set of NFA states
+        self.trans = []                 # Transitions (dictionaries character -> state)
+        self.accmin = []                # First rule accepted by the state (or NOMATCH)
+        self.accsets = []               # All the rules accepted by the state
+        self.loops = []                 # Compiled match() skipping a self loop (or None)
+        self.final = []                 # True for states without transitions
+        self.start = self.dfastate(self.closure([start]))
+
+    # Leftmost-first and longest match.
+    #
+    # The re module tries the alternatives of a rule in order, and repeats
+    # an item as many times as it can, until the rest of the rule matches:
+    # the match found is the first that succeeds, not the longest.  The two
+    # agree when the rule is deterministic (each character of the input can
+    # be matched by a single item of the rule: the character sets that can
+    # begin the rule, or follow an item, are disjoint) and the first choice
+    # of re always reads more input when it can: no alternative but the
+    # last may match the empty string, nor may a repeated item.  Returns
+    # the reason a rule fails the test, or None.  Some rules where the two
+    # agree fail as well (r'ab|a', say).
+    def check(self, tree):
+        follow = []                     # Positions that can follow each position
+        atoms = []                      # Atom of each position
+
+        # Returns (nullable, first positions, last positions) of a node
+        def positions(node):
+            kind = node[0]
+            if kind == 'set':
+                atoms.append(node[1])
+                follow.append(set())
+                p = len(atoms) - 1
+                return False, {p}, {p}
+            if kind == 'group':
+                return positions(node[2])
+            if kind == 'cat':
+                return sequence([positions(item) for item in node[1]])
+            if kind == 'alt':
+                nullable, first, last = False, set(), set()
+                for i, item in enumerate(node[1]):
+                    n, f, l = positions(item)
+                    if n and i < len(node[1]) - 1:
+                        raise DFAError('an alternative that matches the empty string comes before others')
+                    nullable = nullable or n
+                    first |= f
+                    last |= l
+                return nullable, first, last
+            # Repetition: lo copies of the item, then a repeated copy or hi - lo
+            # nested optional copies, as made by build()
+            _, item, lo, hi = node
+
+            def copy():
+                n, f, l = positions(item)
+                if n:
+                    raise DFAError('a repeated item matches the empty string')
+                return n, f, l
+
+            parts = [copy() for _ in range(lo)]
+            if hi is None:
+                _, f, l = copy()
+                for p in l:
+                    follow[p] |= f
+                parts.append((True, f, l))
+            else:
+                rest = (True, set(), set())
+                for _ in range(hi - lo):
+                    rest = (True,) + sequence([copy(), rest])[1:]
+                parts.append(rest)
+            return sequence(parts)
+
+        def sequence(parts):
+            nullable, first, last = True, set(), set()
+            for n, f, l in parts:
+                for p in last:
+                    follow[p] |= f
+                if nullable:
+                    first |= f
+                last = last | l if n else l
+                nullable = nullable and n
+            return nullable, first, last
+
+        try:
+            _, first, _ = positions(tree)
+        except DFAError as e:
+            return str(e)
+        for group in [first] + follow:
+            group = sorted(group, key=atoms.__getitem__)
+            for i, p in enumerate(group):
+                for q in group[i + 1:]:
+                    if self.overlap(atoms[p], atoms[q]):
+                        return (f'{self.atomtext[atoms[p]]!r} and {self.atomtext[atoms[q]]!r} '
+                                'can both match the same character at the same point')
+        return None
+
+    # True if atoms a and b have a character in common.  A single character
+    # (an atom made by re.escape()) is tested directly; other sets are
+    # searched for in a string of every character.
+    def overlap(self, a, b):
+        if a == b:
+            return True
+        result = self.overlaps.get((a, b))
+        if result is None:
+            texts = self.atomtext
+            single = not self.flags & re.IGNORECASE
+            if single and re.escape(texts[a][-1]) == texts[a]:
+                result = bool(self.atomtests[b](texts[a][-1]))
+            elif single and re.escape(texts[b][-1]) == texts[b]:
+                result = bool(self.atomtests[a](texts[b][-1]))
+            else:
+                if self.characters is None:
+                    self.characters = _all_characters()
+                both = re.compile('(?=%s)%s' % (texts[a], texts[b]), self.flags)
+                result = both.search(self.characters) is not None
+            self.overlaps[a, b] = result
+        return result
+
+    def newstate(self):
+        self.eps.append([])
+        self.edges.append([])
+        return len(self.eps) - 1
+
+    # Build the NFA fragment of a syntax tree node.  Returns (start, end).
+    def build(self, node):
+        kind = node[0]
+        if kind == 'set':
+            s, e = self.newstate(), self.newstate()
+            self.edges[s].append((node[1], e))
+            return s, e
+        if kind == 'group':
+            return self.build(node[2])
+        if kind == 'cat':
+            s = cur = self.newstate()
+            for item in node[1]:
+                bs, be = self.build(item)
+                self.eps[cur].append(bs)
+                cur = be
+            return s, cur
+        if kind == 'alt':
+            s, e = self.newstate(), self.newstate()
+            for item in node[1]:
+                bs, be = self.build(item)
+                self.eps[s].append(bs)
+                self.eps[be].append(e)
+            return s, e
+        # Repetition
+        _, item, lo, hi = node
+        s = cur = self.newstate()
+        for _ in range(lo):
+            bs, be = self.build(item)
+            self.eps[cur].append(bs)
+            cur = be
+        if hi is None:
+            loop = self.newstate()
+            self.eps[cur].append(loop)
+            bs, be = self.build(item)
+            self.eps[loop].append(bs)
+            self.eps[be].append(loop)
+            return s, loop
+        e = self.newstate()
+        for _ in range(hi - lo):
+            bs, be = self.build(item)
+            self.eps[cur].append(bs)
+            self.eps[cur].append(e)
+            cur = be
+        self.eps[cur].append(e)
+        return s, e
+
+    def closure(self, states):
+        result = set(states)
+        stack = list(states)
+        while stack:
+            for t in self.eps[stack.pop()]:
+                if t not in result:
+                    result.add(t)
+                    stack.append(t)
+        return frozenset(result)
+
+    # Number of the DFA state for a set of NFA states (creating it if needed)
+    def dfastate(self, nfaset):
+        n = self.states.get(nfaset)
+        if n is not None:
+            return n
+        n = self.states[nfaset] = len(self.nfasets)
+        self.nfasets.append(nfaset)
+        self.trans.append({})
+        accepted = frozenset(self.accept[s] for s in nfaset if s in self.accept)
+        self.accmin.append(min(accepted) if accepted else NOMATCH)
+        self.accsets.append(accepted)
+
+        self.final.append(not any(self.edges[s] for s in nfaset))
+
+        # A character that belongs to an atom leading back to the state, and
+        # to none of the other atoms of its transitions, leaves the state
+        # unchanged.  Runs of such characters are skipped with a regex.
+        self.loops.append(None)
+        atoms = {}
+        for s in nfaset:
+            for a, t in self.edges[s]:
+                atoms.setdefault(a, []).append(t)
+        looping = [a for a, targets in atoms.items() if self.closure(targets) == nfaset]
+        if looping:
+            pattern = '|'.join(self.atomtext[a] for a in looping)
+            others = [self.atomtext[a] for a in atoms if a not in looping]
+            if others:
+                pattern = '(?!%s)(?:%s)' % ('|'.join(others), pattern)
+            self.loops[n] = re.compile('(?:%s)*' % pattern, self.flags).match
+        return n
+
+    # Compute (and record) the transition of DFA state n on character c
+    def step(self, n, c):
+        atoms = self.charatoms.get(c)
+        if atoms is None:
+            atoms = self.charatoms[c] = frozenset(a for a, test in enumerate(self.atomtests) if test(c))
+        targets = [t for s in self.nfasets[n] for a, t in self.edges[s] if a in atoms]
+        nxt = self.dfastate(self.closure(targets)) if targets else DEAD
+        self.trans[n][c] = nxt
+        return nxt
+
+    # Find the token at data[pos].  Returns (rule, end), rule being NOMATCH
+    # if no rule matches.  (No rule matches the empty string, so the start
+    # state is never accepting.)
+    def match(self, data, pos):
+        trans   = self.trans
+        accmin  = self.accmin
+        accsets = self.accsets
+        loops   = self.loops
+        final   = self.final
+        end     = len(data)
+        state   = self.start
+        best    = NOMATCH
+        bestend = pos
+
+        while pos < end:
+            c = data[pos]
+            nxt = trans[state].get(c)
+            if nxt is None:
+                nxt = self.step(state, c)
+            if nxt < 0:
+                break
+            state = nxt
+            pos += 1
+            loop = loops[state]
+            if loop:
+                pos = loop(data, pos).end()
+            r = accmin[state]
+            if r < best:
+                best = r
+                bestend = pos
+            elif r != NOMATCH and best in accsets[state]:
+                bestend = pos
+            if final[state]:
+                break
+
+        return best, bestend
+
+# -----------------------------------------------------------------------------
+#                            === DFA Lexer ===
+#
+# Lexer using the DFA of each lexer state to find the tokens.  The error rule
+# and the eof rule are handled by Lexer.token() itself, which is called when
+# neither a rule nor a literal matches.  A state without a DFA (see DFAError)
+# is lexed by Lexer.token() too.
+# -----------------------------------------------------------------------------
+
+class DFALexer(Lexer):
+    def __init__(self):
+        super().__init__()
+        self.lexstatedfa = {}         # Dictionary mapping lexer states to DFAs (or None)
+        self.lexdfaerrors = {}        # Why a state has no DFA (the DFAError), by state
+        self.lexdfa = None            # DFA of the current state
+        self.lexdfaentries = None     # (func, type) of each rule of the DFA
+        self.lexdfamatch = None       # Rules whose functions use lexer.lexmatch
+
+    def begin(self, state):
+        super().begin(state)
+        if state not in self.lexstatedfa:
+            try:
+                self.lexstatedfa[state] = DFA(self.lexstateretext[state], self.lexreflags)
+            except DFAError as e:
+                self.lexstatedfa[state] = None
+                self.lexdfaerrors[state] = str(e)
+        dfa = self.lexdfa = self.lexstatedfa[state]
+        if dfa is None:
+            self.lexdfaentries = self.lexdfamatch = None
+            return
+        self.lexdfaentries = [self.lexre[ci][1][gi] for ci, gi in dfa.rules]
+        self.lexdfamatch = frozenset(i for i, (func, _) in enumerate(self.lexdfaentries)
+                                     if func and not isinstance(func, TokenRule)
+                                     and 'lexmatch' in func.__code__.co_names)
+
+    # The DFA classifies str characters: bytes input is not supported
+    def _setbytes(self, isbytes):
+        if isbytes:
+            raise LexError('The dfa backend does not support bytes input; use the regex backend', None)
+        super()._setbytes(isbytes)
+
+    def clone(self, object=None):
+        c = super().clone(object)
+        if object:
+            c.begin(c.lexstate)
+        return c
+
+    def token(self):
+        dfa = self.lexdfa
+        if dfa is None:
+            return Lexer.token(self)
+
+        # Make local copies of frequently referenced attributes
+        lexpos    = self.lexpos
+        lexlen    = self.lexlen
+        lexignore = self.lexignore
+        lexdata   = self.lexdata
+        trans     = dfa.trans
+        accmin    = dfa.accmin
+        loops     = dfa.loops
+        final     = dfa.final
+
+        while lexpos < lexlen:
+            # This code provides some short-circuit code for whitespace, tabs, and other ignored characters
+            if lexdata[lexpos] in lexignore:
+                lexpos += 1
+                continue
+
+            # Run the DFA (DFA.match(), inlined).  The token may extend past
+            # lexlen, which is before the end of the data for input_stream().
+            state = dfa.start
+            rule = NOMATCH
+            end = pos = lexpos
+            datalen = len(lexdata)
+            while pos < datalen:
+                c = lexdata[pos]
+                nxt = trans[state].get(c)
+                if nxt is None:
+                    nxt = dfa.step(state, c)
+                if nxt < 0:
+                    break
+                state = nxt
+                pos += 1
+                loop = loops[state]
+                if loop:
+                    pos = loop(lexdata, pos).end()
+                r = accmin[state]
+                if r < rule:
+                    rule = r
+                    end = pos
+                elif r != NOMATCH and rule in dfa.accsets[state]:
+                    end = pos
+                if final[state]:
+                    break
+
+            if rule == NOMATCH:
+                # No match, see if in literals
+                if lexdata[lexpos] in self.lexliterals:
+                    tok = LexToken()
+                    tok.value = lexdata[lexpos]
+                    tok.lineno = self.lineno
+                    tok.type = tok.value if self.lextypeids is None else self._typeid(tok.value)
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos + 1
+                    return tok
+                break
+
+            func, type = self.lexdfaentries[rule]
+
+            if not func:
+                # If no token type was set, it's an ignored token
+                if type is None:
+                    lexpos = end
+                    continue
+                tok = LexSpanToken()
+                tok.lexdata = lexdata
+                tok.lexpos = tok.lexstart = lexpos
+                tok.lexsize = end - lexpos
+                tok.lineno = self.lineno
+                tok.type = type
+                self.lexpos = end
+                return tok
+
+            # Declarative rule, processed here
+            if func.__class__ is TokenRule:
+                lineno = self.lineno
+                if func.newlines:
+                    self.lineno += lexdata.count(func.newlines, lexpos, end)
+                if type is None:
+                    lexpos = end
+                    continue
+                tok = func.tokenclass()
+                tok.lexdata = lexdata
+                tok.lexpos = tok.lexstart = lexpos
+                tok.lexsize = end - lexpos
+                tok.lineno = lineno
+                tok.type = type
+                if func.keywords:
+                    value = lexdata[lexpos:end]
+                    type = func.keywords.get(value)
+                    if type is not None:
+                        tok.type = type
+                    elif not func.convert:
+                        tok.value = value     # Keep the text made for the lookup
+                self.lexpos = end
+                return tok
+
+            # If token is processed by a function, call it.  The value
+            # is made right away, as functions normally read it.
+            tok = LexToken()
+            tok.value = lexdata[lexpos:end]
+            tok.lineno = self.lineno
+            tok.lexpos = lexpos
+            tok.type = type
+            tok.lexer = self
+            self.lexmatch = (self.lexre[self.lexdfa.rules[rule][0]][0].match(lexdata, lexpos)
+                             if rule in self.lexdfamatch else None)
+            self.lexpos = end
+            newtok = func(tok)
+            del tok.lexer
+            del self.lexmatch
+
+            # Every function must return a token, if nothing, we just move to next token
+            if not newtok:
+                lexpos    = self.lexpos         # This is here in case user has updated lexpos.
+                lexignore = self.lexignore      # This is here in case there was a state change
+                lexlen    = self.lexlen
+                lexdata   = self.lexdata
+                dfa       = self.lexdfa
+                if dfa is None:
+                    return Lexer.token(self)
+                trans     = dfa.trans
+                accmin    = dfa.accmin
+                loops     = dfa.loops
+                final     = dfa.final
+                continue
+            if self.lextypeids is not None:
+                newtok.type = self._typeid(newtok.type)
+            return newtok
+
+        # Errors and the end of the input
+        self.lexpos = lexpos
+        return Lexer.token(self)
+
+    def _tokenize_into(self, columns):
+        types   = columns.types.append
+        starts  = columns.starts.append
+        ends    = columns.ends.append
+        linenos = columns.linenos.append
+        values  = columns.values.append
+        count   = len(columns)
+
+        while True:
+            at_end = self.lexpos >= self.lexlen and self.lexstream is None
+            tok = self.token()
+            if not tok:
+                break
+            types(tok.type)
+            starts(tok.lexpos)
+            ends(max(self.lexoffset + self.lexpos, tok.lexpos))
+            linenos(tok.lineno)
+            values(tok.value)
+            if at_end and self.lexpos >= self.lexlen:
+                break
+
+        return len(columns) - count
+
@@ -64,7 +64,19 @@
 import re
 import types
 import sys
+import os
+import copy
+import functools
 import inspect
+import hashlib
+import importlib
+import pickle
+import tempfile
+import threading
+from array import array
+
+from . import __version__
+from .lex import TokenColumns, _file_mode
 
 #-----------------------------------------------------------------------------
 #                     === User configurable parameters ===
@@ -76,11 +88,15 @@ yaccdebug   = False            # Debugging mode.  If set, yacc generates a
                                # a 'parser.out' file in the current directory
 
 debug_file  = 'parser.out'     # Default name of the debugging file
+tab_file    = None             # Default name of the table cache file (None disables caching)
 error_count = 3                # Number of symbols that must be shifted to leave recovery mode
 resultlimit = 40               # Size limit of results when running in debug mode.
 
 MAXINT = sys.maxsize
 
+__tabversion__ = '1.0'         # Version of the table cache file format.  Must be changed
+                               # whenever the layout of the cached tables changes
+
 # This object is a stand-in for a logging object created by the
 # logging module.   PLY will use this by default to create things
 # such as the parser.out file.  If a user wants more detailed
@@ -154,6 +170,8 @@ def format_stack_entry(r):
 #        .endlexpos  = Ending lex position (optional, set automatically)
 
 class YaccSymbol:
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'endlineno', 'endlexpos', 'lexer')
+
     def __str__(self):
         return self.type
 
@@ -168,8 +186,12 @@ class YaccSymbol:
 # a tuple of (startline,endline) representing the range of lines
 # for a symbol.  The lexspan() method returns a tuple (lexpos,endlexpos)
 # representing the range of positional information for a symbol.
+# An end position of None (as in recycled symbols, see
+# LRParser.enable_symbol_pool()) means the same as no end position.
 
 class YaccProduction:
+    __slots__ = ('slice', 'stack', 'lexer', 'parser')
+
     def __init__(self, s, stack=None):
         self.slice = s
         self.stack = stack
@@ -201,8 +223,8 @@ class YaccProduction:
 
     def linespan(self, n):
         startline = getattr(self.slice[n], 'lineno', 0)
-        endline = getattr(self.slice[n], 'endlineno', startline)
-        return startline, endline
+        endline = getattr(self.slice[n], 'endlineno', None)
+        return startline, startline if endline is None else endline
 
     def lexpos(self, n):
         return getattr(self.slice[n], 'lexpos', 0)
@@ -212,12 +234,196 @@ class YaccProduction:
 
     def lexspan(self, n):
         startpos = getattr(self.slice[n], 'lexpos', 0)
-        endpos = getattr(self.slice[n], 'endlexpos', startpos)
-        return startpos, endpos
+        endpos = getattr(self.slice[n], 'endlexpos', None)
+        return startpos, startpos if endpos is None else endpos
 
     def error(self):
         raise SyntaxError
 
+# -----------------------------------------------------------------------------
+# @direct
+#
+# This decorator marks a grammar rule function that is called with the values
+# of the symbols on the right hand side as positional arguments and returns
+# the value of the left hand side, instead of getting a YaccProduction:
+#
+#     @direct
+#     def p_expr_plus(left, plus, right):
+#         'expr : expr PLUS term'
+#         return left + right
+#
+# A function with several productions of different lengths takes default or
+# variable arguments.  Such rules don't get the lexer, the parser or the
+# positions of the symbols; raising SyntaxError starts the error recovery as
+# for the other rules.
+# -----------------------------------------------------------------------------
+
+def direct(f):
+    f.direct = True
+    return f
+
+# -----------------------------------------------------------------------------
+# _TokenInput
+#
+# Input already tokenized, given to parse_tokens(): a TokenColumns (see
+# Lexer.tokenize_all()) or any iterable of tokens with the attributes type,
+# value, lineno and lexpos (LexTokens, for instance).  The tokens may come
+# from a lexer run in another thread or process, or from a cache.  The parse
+# loops tell it apart from text for the lexer.
+# -----------------------------------------------------------------------------
+
+class _TokenInput:
+    __slots__ = ('tokens',)
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    # Return a function handing out the tokens one at a time, like
+    # Lexer.token().  With typeids (those of an LRIntParser) the type names
+    # are replaced by their ids, in copies of the tokens, which may then be
+    # parsed again.  Tokens that already have ids (from a lexer set up with
+    # settypeids()) are handed out as they are.
+    def reader(self, typeids=None):
+        tokens = self.tokens
+        if isinstance(tokens, TokenColumns):
+            return tokens.reader(typeids)
+        get_token = functools.partial(next, iter(tokens), None)
+        if typeids is None:
+            return get_token
+
+        def token():
+            tok = get_token()
+            if tok and tok.type.__class__ is not int:
+                tok = copy.copy(tok)
+                tok.type = typeids[tok.type]
+            return tok
+        return token
+
+# Sent to the parse of LRParser.feed() by flush()
+_flush = object()
+
+# -----------------------------------------------------------------------------
+# ParseContext
+#
+# The state of one call of parse(): the stacks, the token function and the
+# error recovery counters.  A parser (LRParser, LRIntParser or the Parser of
+# a generated module) only reads its tables while parsing, and every parse
+# gets a new context, so one parser can be used by several threads at once
+# (each with its own lexer, see Lexer.clone()) and can be called again from
+# a grammar rule.  The tables must not be changed (set_defaulted_states(),
+# say) while parses are running.
+#
+# The context is p.parser in the grammar rules (p.parser.errok()), and the
+# attributes it doesn't have are looked up on and set on the parser
+# (p.parser.symbols, p.parser.userdata = ...).
+# The same attributes of the parser (parser.errok(), parser.errorcount,
+# parser.statestack ..., as used by p_error()) are those of the last parse
+# started in the current thread, or of the parse that called p_error().
+# -----------------------------------------------------------------------------
+
+class ParseContext:
+    __slots__ = ('parser', 'token', 'statestack', 'symstack', 'state', 'errorcount', 'errorok')
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.token = None
+        self.statestack = []
+        self.symstack = []
+        self.state = 0
+        self.errorcount = 0
+        self.errorok = True
+
+    def __getattr__(self, name):
+        return getattr(self.parser, name)
+
+    def __setattr__(self, name, value):
+        if name in ParseContext.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.parser, name, value)
+
+    def __delattr__(self, name):
+        if name in ParseContext.__slots__:
+            object.__delattr__(self, name)
+        else:
+            delattr(self.parser, name)
+
+    def errok(self):
+        self.errorok = True
+
+    def restart(self):
+        del self.statestack[:]
+        del self.symstack[:]
+        sym = YaccSymbol()
+        sym.type = self.parser._end
+        self.symstack.append(sym)
+        self.statestack.append(0)
+
+# Parser attributes kept in the context of the current thread
+def _context_attribute(name):
+    return property(lambda self: getattr(self.context(), name),
+                    lambda self, value: setattr(self.context(), name, value))
+
+# -----------------------------------------------------------------------------
+# PushParse
+#
+# A parse of input handed to the parser as it arrives, lexed by its own
+# lexer (see LRParser.feed()).  The parse is a generator (LRParser._push())
+# that is sent the tokens.
+# -----------------------------------------------------------------------------
+
+class PushParse:
+    def __init__(self, parser, lexer=None):
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+        self.parser = parser
+        self.lexer = lexer
+        self.pushing = None                      # The parse, None until the first feed()
+
+    def feed(self, input):
+        if self.pushing is None:
+            self.pushing = self.parser._push(self.lexer)
+            next(self.pushing)
+        if isinstance(input, (str, bytes, bytearray)):
+            input = self.lexer.push(input)
+        self._send(input)
+
+    def flush(self):
+        if self.pushing is None:
+            return
+        if getattr(self.lexer, 'lexpush', None):
+            self._send(self.lexer.push(final=True))
+            if self.pushing is None:
+                return
+        self._send((_flush,))
+
+    def end(self):
+        if self.pushing is None:
+            return None
+        if getattr(self.lexer, 'lexpush', None):
+            self._send(self.lexer.push(final=True))
+        try:
+            self.pushing.send(None)
+        except StopIteration as e:
+            return e.value
+        finally:
+            self.pushing = None
+
+    # Send tokens to the parse.  An exception (from a grammar rule, for
+    # instance) ends the parse.
+    def _send(self, tokens):
+        send = self.pushing.send
+        try:
+            for tok in tokens:
+                send(tok)
+        except StopIteration:
+            # The parse ended at a flush() (an error at the end)
+            self.pushing = None
+        except BaseException:
+            self.pushing = None
+            raise
+
 # -----------------------------------------------------------------------------
 #                               == LRParser ==
 #
@@ -225,24 +431,69 @@ class YaccProduction:
 # -----------------------------------------------------------------------------
 
 class LRParser:
+    _end = '$end'                                # Type of the end symbol
+    _error = 'error'                             # Type of the error symbol
+
     def __init__(self, lrtab, errorf):
         self.productions = lrtab.lr_productions
         self.action = lrtab.lr_action
         self.goto = lrtab.lr_goto
         self.errorfunc = errorf
         self.set_defaulted_states()
-        self.errorok = True
+        self.pooling = False
+        self.pushing = None                      # The PushParse of feed()
+        self._local = threading.local()          # State kept by thread
+        self.set_rules()
+
+    # The state of the parse (see ParseContext)
+    statestack = _context_attribute('statestack')
+    symstack   = _context_attribute('symstack')
+    state      = _context_attribute('state')
+    token      = _context_attribute('token')
+    errorcount = _context_attribute('errorcount')
+    errorok    = _context_attribute('errorok')
+
+    # The context of the last parse started in the current thread (an empty
+    # one if there was none)
+    def context(self):
+        try:
+            return self._local.context
+        except AttributeError:
+            context = self._local.context = ParseContext(self)
+            return context
+
+    # A new context, for a parse starting in the current thread
+    def _start(self):
+        context = self._local.context = ParseContext(self)
+        return context
 
     def errok(self):
-        self.errorok = True
+        self.context().errorok = True
+
+    # The (function, length, name, gotos, direct) of each production, used
+    # by parseopt_notrack().  gotos maps the states uncovered by the
+    # reduction to the state to go to (one dictionary per nonterminal,
+    # so a reduction needs a single lookup).  direct is true for the
+    # functions marked with @direct.
+    def set_rules(self):
+        gotos = {}
+        for state, row in self.goto.items():
+            for name, target in row.items():
+                gotos.setdefault(name, {})[state] = target
+        self.rules = [None]
+        for p in self.productions[1:]:
+            self.rules.append((p.callable, p.len, p.name, gotos.get(p.name, {}), p.direct))
+
+    # Token types that can be shifted in a state (by default the start
+    # state, that is, the tokens that can begin the input).  Together with
+    # errorcount (the number of tokens still to be shifted before the
+    # error recovery is over, 0 outside of it) this lets a driver tell
+    # whether the input can be split at a given point and parsed in parts.
+    def shifted_tokens(self, state=0):
+        return [t for t, a in self.action[state].items() if a is not None and a > 0]
 
     def restart(self):
-        del self.statestack[:]
-        del self.symstack[:]
-        sym = YaccSymbol()
-        sym.type = '$end'
-        self.symstack.append(sym)
-        self.statestack.append(0)
+        self.context().restart()
 
     # Defaulted state support.
     # This method identifies parser states where there is only one possible reduction action.
@@ -262,6 +513,29 @@ class LRParser:
     def disable_defaulted_states(self):
         self.defaulted_states = {}
 
+    # Symbol pool.
+    # When enabled, the YaccSymbol objects of the nonterminals on the right hand
+    # side of a rule are put back in a free list once the rule has run, and
+    # reused for the following reductions (in this and later parses).  Grammar
+    # rules must then not keep references to p.slice or its symbols.  The pool
+    # isn't used in parses with position tracking.  Each thread has its own.
+    def enable_symbol_pool(self):
+        self.pooling = True
+
+    def disable_symbol_pool(self):
+        self.pooling = False
+        self._local.symbol_pool = []
+
+    # The free list of the current thread (None if the pool is disabled)
+    def _symbol_pool(self):
+        if not self.pooling:
+            return None
+        try:
+            return self._local.symbol_pool
+        except AttributeError:
+            pool = self._local.symbol_pool = []
+            return pool
+
     # parse().
     #
     # This is the core parsing engine.  To operate, it requires a lexer object.
@@ -269,20 +543,313 @@ class LRParser:
     # see the various rule reductions and parsing steps.  tracking turns on position
     # tracking.  In this mode, symbols will record the starting/ending line number and
     # character index.
+    #
+    # Without either option (the common case) the parse is done by
+    # parseopt_notrack(), the loop of parsedebug() without the debugging and
+    # tracking code (both are generated by ygen.py).
 
     def parse(self, input=None, lexer=None, debug=False, tracking=False):
+        if debug or tracking:
+            return self.parsedebug(input, lexer, debug, tracking)
+        return self.parseopt_notrack(input, lexer)
+
+    # parse_tokens().
+    #
+    # Parse input already tokenized (see _TokenInput) instead of reading
+    # it from the lexer.  Syntax errors are reported to p_error() as in
+    # parse().  The lexer is only handed to the grammar rules (p.lexer) and
+    # to p_error() (as the token's lexer attribute).
+
+    def parse_tokens(self, tokens, lexer=None, debug=False, tracking=False):
+        return self.parse(_TokenInput(tokens), lexer, debug, tracking)
+
+    # feed(), flush() and end().
+    #
+    # Push parsing: the input is handed to the parser as it arrives, and the
+    # parser keeps its state between the calls.  feed() takes text (lexed
+    # with Lexer.push(), so a partial line waits for the rest of it) or an
+    # iterable of tokens, and parses as far as the tokens given allow.
+    # end() marks the end of the input and returns the result of the parse,
+    # as parse() does; the next feed() starts a new parse.  The stacks
+    # don't grow with the input for a left recursive list of statements, so
+    # a parser can take an unbounded stream.
+    #
+    # flush() ends a sentence where the input fed so far could end (the
+    # end of a line typed in an interpreter, say): the reductions that
+    # the end of the input would make are made, and the parse goes on with
+    # the next feed() as if the end were a separator.  If the input can't
+    # end there, the parse waits for more input, unless it is recovering
+    # from a syntax error (errorcount > 0, and errok() was not called): the
+    # stacks are then emptied, as if a new parse started.  Either way the
+    # error recovery is over.
+    #
+    # The parse is done as by parseopt_notrack(), without debugging and
+    # tracking, in a PushParse.  p_error() can't read tokens ahead with
+    # parser.token().
+
+    def feed(self, input, lexer=None):
+        if self.pushing is None or self.pushing.pushing is None:
+            self.pushing = PushParse(self, lexer)
+        self.pushing.feed(input)
+
+    def flush(self):
+        if self.pushing is not None:
+            self.pushing.flush()
+
+    def end(self):
+        if self.pushing is None:
+            return None
+        pushing, self.pushing = self.pushing, None
+        return pushing.end()
+
+    # A push parse of its own (see PushParse), for streams parsed at the
+    # same time with the same parser (one per thread, say).  feed(),
+    # flush() and end() of the parser use a single one.
+    def push_parse(self, lexer=None):
+        return PushParse(self, lexer)
+
+    # True if the end of the input, read now, would be accepted: the
+    # reductions that it makes (only looking at the states) end in an accept
+    def _end_accepted(self, statestack):
+        actions = self.action
+        rules = self.rules
+        defaulted_states = self.defaulted_states
+        states = statestack[:]
+        while True:
+            state = states[-1]
+            if state in defaulted_states:
+                t = defaulted_states[state]
+            else:
+                t = actions[state].get('$end')
+            if t is None or t > 0:
+                return False
+            if t == 0:
+                return True
+            plen, gotos = rules[-t][1], rules[-t][3]
+            if plen:
+                del states[-plen:]
+            states.append(gotos[states[-1]])
+
+    # _push().
+    #
+    # The loop of parseopt_notrack() as a generator, which is sent the
+    # tokens one at a time (None for the end of the input, _flush for
+    # flush()) and returns the result of the parse.
+    #
+    # Generated from the template in ygen.py, with the other parsing loops.
+    # Don't edit it here: change the template and run python ply/ygen.py.
+
+    #--! push-start
+    def _push(self, lexer):
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local references to the tables
+        rules   = self.rules
+        defaulted_states = self.defaulted_states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        context = self._start()                  # State of this parse (see ParseContext)
+        errorcount = 0                           # Used during error recovery
+        pool    = self._symbol_pool()            # Free YaccSymbols (see enable_symbol_pool())
+        flushing = False                         # The lookahead is the end of a flush()
+
+        pslice.lexer = lexer
+        pslice.parser = context
+        context.token = None
+
+        statestack = context.statestack = [0]  # Stack of parsing states
+        symstack = context.symstack = []       # Stack of grammar symbols
+        pslice.stack = symstack
+        spush = statestack.append
+        ypush = symstack.append
+
+        # The start state is assumed to be (0,$end)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        ypush(sym)
+        state = 0
+        while True:
+            if state not in defaulted_states:
+                if lookahead is None:
+                    if not lookaheadstack:
+                        lookahead = yield           # Get the next token
+                        while lookahead is _flush:
+                            if self._end_accepted(statestack):
+                                flushing = True
+                                lookahead = None
+                                break
+                            if errorcount and not context.errorok:
+                                del statestack[1:]
+                                del symstack[1:]
+                                state = 0
+                                errorcount = context.errorcount = 0
+                            lookahead = yield
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                t = actions[state].get(lookahead.type)
+            else:
+                t = defaulted_states[state]
+
+            if t is not None:
+                if t > 0:
+                    # Shift
+                    spush(t)
+                    state = t
+                    ypush(lookahead)
+                    lookahead = None
+                    if errorcount:
+                        errorcount = context.errorcount = errorcount - 1
+                    continue
+
+                if t < 0:
+                    # Reduce
+                    func, plen, pname, gotos, direct = rules[-t]
+
+                    if pool:
+                        sym = pool.pop()
+                        sym.lineno = sym.lexpos = 0
+                        sym.endlineno = sym.endlexpos = None
+                    else:
+                        sym = YaccSymbol()
+                    sym.type = pname
+
+                    if direct:
+                        # The function takes the values of the right hand
+                        # side (passed one by one for the short rules, which
+                        # is faster than building a list) and returns the
+                        # value of the left hand side.  It runs before the
+                        # stacks are changed, so on an error they are left
+                        # as by the other rules.
+                        try:
+                            context.state = state
+                            if plen == 1:
+                                sym.value = func(symstack[-1].value)
+                            elif plen == 2:
+                                sym.value = func(symstack[-2].value, symstack[-1].value)
+                            elif plen == 3:
+                                sym.value = func(symstack[-3].value, symstack[-2].value, symstack[-1].value)
+                            elif plen == 4:
+                                sym.value = func(symstack[-4].value, symstack[-3].value, symstack[-2].value,
+                                                 symstack[-1].value)
+                            elif plen:
+                                sym.value = func(*[_s.value for _s in symstack[-plen:]])
+                            else:
+                                sym.value = func()
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            if plen:
+                                symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                            continue
+                        if plen:
+                            if pool is not None:
+                                for _s in symstack[-plen:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                        ypush(sym)
+                        state = gotos[statestack[-1]]
+                        spush(state)
+                        continue
+
+                    # The other functions take the production (p) and set
+                    # p[0].  The stacks are restored if they raise SyntaxError.
+                    sym.value = None
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
+                        pslice.slice = targ
+                        try:
+                            del symstack[-plen:]
+                            context.state = state
+                            func(pslice)
+                            del statestack[-plen:]
+                            if pool is not None:
+                                for _s in targ[1:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            ypush(sym)
+                            state = gotos[statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            symstack.extend(targ[1:-1])
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    else:
+                        targ = [sym]
+                        pslice.slice = targ
+                        try:
+                            context.state = state
+                            func(pslice)
+                            ypush(sym)
+                            state = gotos[statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    continue
+
+                # Accept.  At the end of a flush() the parse goes on.
+                if flushing:
+                    flushing = False
+                    lookahead = None
+                    errorcount = context.errorcount = 0
+                    continue
+                return getattr(symstack[-1], 'value', None)
+
+            # Syntax error (see _recover())
+            recovered = self._recover(context, lookahead, state, errorcount, lookaheadstack, lexer)
+            if recovered is None:
+                return
+            lookahead, state, errorcount = recovered
+    #--! push-end
+
+    # parsedebug().
+    #
+    # The parsing loop with all of the options.
+    #
+    # Generated from the template in ygen.py, with the other parsing loops.
+    # Don't edit it here: change the template and run python ply/ygen.py.
+
+    #--! parsedebug-start
+    def parsedebug(self, input=None, lexer=None, debug=False, tracking=False):
         # If debugging has been specified as a flag, turn it into a logging object
         if isinstance(debug, int) and debug:
             debug = PlyLogger(sys.stderr)
 
         lookahead = None                         # Current lookahead symbol
         lookaheadstack = []                      # Stack of lookahead symbols
-        actions = self.action                    # Local reference to action table (to avoid lookup on self.)
-        goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
-        prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
-        defaulted_states = self.defaulted_states # Local reference to defaulted states
+        actions = self.action                    # Local references to the tables
+        rules   = self.rules
+        prod    = self.productions               # For the debugging output
+        defaulted_states = self.defaulted_states
         pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        context = self._start()                  # State of this parse (see ParseContext)
         errorcount = 0                           # Used during error recovery
+        pool    = None if tracking else self._symbol_pool()  # Free YaccSymbols (see enable_symbol_pool())
 
         if debug:
             debug.info('PLY: PARSE DEBUG START')
@@ -292,40 +859,35 @@ class LRParser:
             from . import lex
             lexer = lex.lexer
 
-        # Set up the lexer and parser objects on pslice
         pslice.lexer = lexer
-        pslice.parser = self
+        pslice.parser = context
 
-        # If input was supplied, pass to lexer
-        if input is not None:
-            lexer.input(input)
-
-        # Set the token function
-        get_token = self.token = lexer.token
+        # Input already tokenized (by Lexer.tokenize_all() or given to
+        # parse_tokens()) is read straight from the tokens
+        if isinstance(input, (TokenColumns, _TokenInput)):
+            get_token = context.token = input.reader()
+        else:
+            if input is not None:
+                lexer.input(input)
+            get_token = context.token = lexer.token
 
-        # Set up the state and symbol stacks
-        statestack = self.statestack = []   # Stack of parsing states
-        symstack = self.symstack = []       # Stack of grammar symbols
-        pslice.stack = symstack             # Put in the production
-        errtoken   = None                   # Err token
+        statestack = context.statestack = [0]  # Stack of parsing states
+        symstack = context.symstack = []       # Stack of grammar symbols
+        pslice.stack = symstack
+        spush = statestack.append
+        ypush = symstack.append
 
         # The start state is assumed to be (0,$end)
-
-        statestack.append(0)
         sym = YaccSymbol()
         sym.type = '$end'
-        symstack.append(sym)
+        ypush(sym)
         state = 0
         while True:
-            # Get the next symbol on the input.  If a lookahead symbol
-            # is already set, we just use that. Otherwise, we'll pull
-            # the next token off of the lookaheadstack or from the lexer
-
             if debug:
                 debug.debug('State  : %s', state)
 
             if state not in defaulted_states:
-                if not lookahead:
+                if lookahead is None:
                     if not lookaheadstack:
                         lookahead = get_token()     # Get the next token
                     else:
@@ -333,10 +895,7 @@ class LRParser:
                     if not lookahead:
                         lookahead = YaccSymbol()
                         lookahead.type = '$end'
-
-                # Check the action table
-                ltype = lookahead.type
-                t = actions[state].get(ltype)
+                t = actions[state].get(lookahead.type)
             else:
                 t = defaulted_states[state]
                 if debug:
@@ -348,237 +907,1140 @@ class LRParser:
 
             if t is not None:
                 if t > 0:
-                    # shift a symbol on the stack
-                    statestack.append(t)
+                    # Shift
+                    spush(t)
                     state = t
-
                     if debug:
                         debug.debug('Action : Shift and goto state %s', t)
-
-                    symstack.append(lookahead)
+                    ypush(lookahead)
                     lookahead = None
-
-                    # Decrease error count on successful shift
                     if errorcount:
-                        errorcount -= 1
+                        errorcount = context.errorcount = errorcount - 1
                     continue
 
                 if t < 0:
-                    # reduce a symbol on the stack, emit a production
-                    p = prod[-t]
-                    pname = p.name
-                    plen  = p.len
-
-                    # Get production function
-                    sym = YaccSymbol()
-                    sym.type = pname       # Production name
-                    sym.value = None
-
+                    # Reduce
+                    func, plen, pname, gotos, direct = rules[-t]
                     if debug:
+                        debug.info('Action : Reduce rule [%s] with %s and goto state %d', prod[-t].str,
+                                   '['+','.join([format_stack_entry(_v.value) for _v in symstack[-plen:]])+']'
+                                   if plen else [],
+                                   gotos[statestack[-1-plen]])
+
+                    if pool:
+                        sym = pool.pop()
+                        sym.lineno = sym.lexpos = 0
+                        sym.endlineno = sym.endlexpos = None
+                    else:
+                        sym = YaccSymbol()
+                    sym.type = pname
+                    if tracking:
                         if plen:
-                            debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str,
-                                       '['+','.join([format_stack_entry(_v.value) for _v in symstack[-plen:]])+']',
-                                       goto[statestack[-1-plen]][pname])
-                        else:
-                            debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str, [],
-                                       goto[statestack[-1]][pname])
-
-                    if plen:
-                        targ = symstack[-plen-1:]
-                        targ[0] = sym
-
-                        if tracking:
-                            t1 = targ[1]
+                            t1 = symstack[-plen]
                             sym.lineno = t1.lineno
                             sym.lexpos = t1.lexpos
-                            t1 = targ[-1]
+                            t1 = symstack[-1]
                             sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
                             sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                        else:
+                            sym.lineno = getattr(lexer, 'lineno', 0)
+                            sym.lexpos = getattr(lexer, 'lexpos', 0)
+
+                    if direct:
+                        # The function takes the values of the right hand
+                        # side (passed one by one for the short rules, which
+                        # is faster than building a list) and returns the
+                        # value of the left hand side.  It runs before the
+                        # stacks are changed, so on an error they are left
+                        # as by the other rules.
+                        try:
+                            context.state = state
+                            if plen == 1:
+                                sym.value = func(symstack[-1].value)
+                            elif plen == 2:
+                                sym.value = func(symstack[-2].value, symstack[-1].value)
+                            elif plen == 3:
+                                sym.value = func(symstack[-3].value, symstack[-2].value, symstack[-1].value)
+                            elif plen == 4:
+                                sym.value = func(symstack[-4].value, symstack[-3].value, symstack[-2].value,
+                                                 symstack[-1].value)
+                            elif plen:
+                                sym.value = func(*[_s.value for _s in symstack[-plen:]])
+                            else:
+                                sym.value = func()
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            if plen:
+                                symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                            continue
+                        if debug:
+                            debug.info('Result : %s', format_result(sym.value))
+                        if plen:
+                            if pool is not None:
+                                for _s in symstack[-plen:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                        ypush(sym)
+                        state = gotos[statestack[-1]]
+                        spush(state)
+                        continue
 
-                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-                        # The code enclosed in this section is duplicated
-                        # below as a performance optimization.  Make sure
-                        # changes get made in both locations.
-
+                    # The other functions take the production (p) and set
+                    # p[0].  The stacks are restored if they raise SyntaxError.
+                    sym.value = None
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
                         pslice.slice = targ
-
                         try:
-                            # Call the grammar rule with our special slice object
                             del symstack[-plen:]
-                            self.state = state
-                            p.callable(pslice)
+                            context.state = state
+                            func(pslice)
                             del statestack[-plen:]
                             if debug:
                                 debug.info('Result : %s', format_result(pslice[0]))
-                            symstack.append(sym)
-                            state = goto[statestack[-1]][pname]
-                            statestack.append(state)
+                            if pool is not None:
+                                for _s in targ[1:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            ypush(sym)
+                            state = gotos[statestack[-1]]
+                            spush(state)
                         except SyntaxError:
-                            # If an error was set. Enter error recovery state
-                            lookaheadstack.append(lookahead)    # Save the current lookahead token
-                            symstack.extend(targ[1:-1])         # Put the production slice back on the stack
-                            statestack.pop()                    # Pop back one state (before the reduce)
+                            lookaheadstack.append(lookahead)
+                            symstack.extend(targ[1:-1])
+                            statestack.pop()
                             state = statestack[-1]
                             sym.type = 'error'
                             sym.value = 'error'
                             lookahead = sym
-                            errorcount = error_count
-                            self.errorok = False
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    else:
+                        targ = [sym]
+                        pslice.slice = targ
+                        try:
+                            context.state = state
+                            func(pslice)
+                            if debug:
+                                debug.info('Result : %s', format_result(pslice[0]))
+                            ypush(sym)
+                            state = gotos[statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    continue
 
-                        continue
+                # Accept
+                result = getattr(symstack[-1], 'value', None)
+                if debug:
+                    debug.info('Done   : Returning %s', format_result(result))
+                    debug.info('PLY: PARSE DEBUG END')
+                return result
 
+            # Syntax error (see _recover())
+            if debug:
+                debug.error('Error  : %s',
+                            ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+            recovered = self._recover(context, lookahead, state, errorcount, lookaheadstack, lexer, tracking)
+            if recovered is None:
+                return
+            lookahead, state, errorcount = recovered
+    #--! parsedebug-end
+
+    # parseopt_notrack().
+    #
+    # The parsing loop of parse() without debugging and position tracking.
+    # The tables are in local variables, a reduction takes its function,
+    # length, name and gotos from a single tuple (see set_rules()) and the
+    # error recovery is done out of the loop, in _recover().
+    #
+    # Generated from the template in ygen.py, with the other parsing loops.
+    # Don't edit it here: change the template and run python ply/ygen.py.
+
+    #--! parseopt_notrack-start
+    def parseopt_notrack(self, input=None, lexer=None):
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local references to the tables
+        rules   = self.rules
+        defaulted_states = self.defaulted_states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        context = self._start()                  # State of this parse (see ParseContext)
+        errorcount = 0                           # Used during error recovery
+        pool    = self._symbol_pool()            # Free YaccSymbols (see enable_symbol_pool())
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        pslice.lexer = lexer
+        pslice.parser = context
+
+        # Input already tokenized (by Lexer.tokenize_all() or given to
+        # parse_tokens()) is read straight from the tokens
+        if isinstance(input, (TokenColumns, _TokenInput)):
+            get_token = context.token = input.reader()
+        else:
+            if input is not None:
+                lexer.input(input)
+            get_token = context.token = lexer.token
+
+        statestack = context.statestack = [0]  # Stack of parsing states
+        symstack = context.symstack = []       # Stack of grammar symbols
+        pslice.stack = symstack
+        spush = statestack.append
+        ypush = symstack.append
+
+        # The start state is assumed to be (0,$end)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        ypush(sym)
+        state = 0
+        while True:
+            if state not in defaulted_states:
+                if lookahead is None:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
                     else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                t = actions[state].get(lookahead.type)
+            else:
+                t = defaulted_states[state]
 
-                        if tracking:
-                            sym.lineno = lexer.lineno
-                            sym.lexpos = lexer.lexpos
+            if t is not None:
+                if t > 0:
+                    # Shift
+                    spush(t)
+                    state = t
+                    ypush(lookahead)
+                    lookahead = None
+                    if errorcount:
+                        errorcount = context.errorcount = errorcount - 1
+                    continue
 
-                        targ = [sym]
+                if t < 0:
+                    # Reduce
+                    func, plen, pname, gotos, direct = rules[-t]
 
-                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-                        # The code enclosed in this section is duplicated
-                        # above as a performance optimization.  Make sure
-                        # changes get made in both locations.
+                    if pool:
+                        sym = pool.pop()
+                        sym.lineno = sym.lexpos = 0
+                        sym.endlineno = sym.endlexpos = None
+                    else:
+                        sym = YaccSymbol()
+                    sym.type = pname
+
+                    if direct:
+                        # The function takes the values of the right hand
+                        # side (passed one by one for the short rules, which
+                        # is faster than building a list) and returns the
+                        # value of the left hand side.  It runs before the
+                        # stacks are changed, so on an error they are left
+                        # as by the other rules.
+                        try:
+                            context.state = state
+                            if plen == 1:
+                                sym.value = func(symstack[-1].value)
+                            elif plen == 2:
+                                sym.value = func(symstack[-2].value, symstack[-1].value)
+                            elif plen == 3:
+                                sym.value = func(symstack[-3].value, symstack[-2].value, symstack[-1].value)
+                            elif plen == 4:
+                                sym.value = func(symstack[-4].value, symstack[-3].value, symstack[-2].value,
+                                                 symstack[-1].value)
+                            elif plen:
+                                sym.value = func(*[_s.value for _s in symstack[-plen:]])
+                            else:
+                                sym.value = func()
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            if plen:
+                                symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                            continue
+                        if plen:
+                            if pool is not None:
+                                for _s in symstack[-plen:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                        ypush(sym)
+                        state = gotos[statestack[-1]]
+                        spush(state)
+                        continue
 
+                    # The other functions take the production (p) and set
+                    # p[0].  The stacks are restored if they raise SyntaxError.
+                    sym.value = None
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
                         pslice.slice = targ
-
                         try:
-                            # Call the grammar rule with our special slice object
-                            self.state = state
-                            p.callable(pslice)
-                            if debug:
-                                debug.info('Result : %s', format_result(pslice[0]))
-                            symstack.append(sym)
-                            state = goto[statestack[-1]][pname]
-                            statestack.append(state)
+                            del symstack[-plen:]
+                            context.state = state
+                            func(pslice)
+                            del statestack[-plen:]
+                            if pool is not None:
+                                for _s in targ[1:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            ypush(sym)
+                            state = gotos[statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            symstack.extend(targ[1:-1])
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    else:
+                        targ = [sym]
+                        pslice.slice = targ
+                        try:
+                            context.state = state
+                            func(pslice)
+                            ypush(sym)
+                            state = gotos[statestack[-1]]
+                            spush(state)
                         except SyntaxError:
-                            # If an error was set. Enter error recovery state
-                            lookaheadstack.append(lookahead)    # Save the current lookahead token
-                            statestack.pop()                    # Pop back one state (before the reduce)
+                            lookaheadstack.append(lookahead)
+                            statestack.pop()
                             state = statestack[-1]
                             sym.type = 'error'
                             sym.value = 'error'
                             lookahead = sym
-                            errorcount = error_count
-                            self.errorok = False
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    continue
 
-                        continue
+                # Accept
+                return getattr(symstack[-1], 'value', None)
+
+            # Syntax error (see _recover())
+            recovered = self._recover(context, lookahead, state, errorcount, lookaheadstack, lexer)
+            if recovered is None:
+                return
+            lookahead, state, errorcount = recovered
+    #--! parseopt_notrack-end
+
+    # _recover().
+    #
+    # Error recovery, for a syntax error on lookahead in state.  The stacks
+    # are changed in place.  Returns the new (lookahead, state, errorcount),
+    # or None if the parse has to end (parse() then returns None).
+    #
+    # We have some kind of parsing error here.  To handle this, we are going
+    # to push the current token onto the tokenstack and replace it with an
+    # 'error' token.  If there are any synchronization rules, they may catch it.
+    #
+    # In addition to pushing the error token, we call call the user defined
+    # p_error() function if this is the first syntax error.  This function is
+    # only called if errorcount == 0.
+
+    def _recover(self, context, lookahead, state, errorcount, lookaheadstack, lexer, tracking=False):
+        statestack = context.statestack
+        symstack = context.symstack
+        if errorcount == 0 or context.errorok:
+            errorcount = context.errorcount = error_count
+            context.errorok = False
+            errtoken = lookahead
+            if errtoken.type == self._end:
+                errtoken = None               # End of file!
+            if self.errorfunc:
+                if errtoken and not hasattr(errtoken, 'lexer'):
+                    errtoken.lexer = lexer
+                context.state = state
+                self._local.context = context
+                tok = self.errorfunc(errtoken)
+                if context.errorok:
+                    # User must have done some kind of panic
+                    # mode recovery on their own.  The
+                    # returned token is the next lookahead
+                    return tok, state, errorcount
+            else:
+                if errtoken:
+                    name = errtoken.type
+                    if name.__class__ is int:
+                        name = self.symbols[name]    # Terminal id (LRIntParser)
+                    if hasattr(errtoken, 'lineno'):
+                        lineno = lookahead.lineno
+                    else:
+                        lineno = 0
+                    if lineno:
+                        sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, name))
+                    else:
+                        sys.stderr.write('yacc: Syntax error, token=%s' % name)
+                else:
+                    sys.stderr.write('yacc: Parse error in input. EOF\n')
+                    return None
+
+        else:
+            errorcount = context.errorcount = error_count
+
+        # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+        # entire parse has been rolled back and we're completely hosed.   The token is
+        # discarded and we just keep going.
+
+        if len(statestack) <= 1 and lookahead.type != self._end:
+            # Nuke the pushback stack
+            del lookaheadstack[:]
+            return None, 0, errorcount
+
+        # case 2: the statestack has a couple of entries on it, but we're
+        # at the end of the file. nuke the top entry and generate an error token
+
+        # Start nuking entries on the stack
+        if lookahead.type == self._end:
+            # Whoa. We're really hosed here. Bail out
+            return None
+
+        if lookahead.type != self._error:
+            sym = symstack[-1]
+            if sym.type == self._error:
+                # Hmmm. Error is on top of stack, we'll just nuke input
+                # symbol and continue
+                if tracking:
+                    sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                    sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                return None, state, errorcount
+
+            # Create the error symbol for the first time and make it the new lookahead symbol
+            t = YaccSymbol()
+            t.type = self._error
+
+            if hasattr(lookahead, 'lineno'):
+                t.lineno = t.endlineno = lookahead.lineno
+            if hasattr(lookahead, 'lexpos'):
+                t.lexpos = t.endlexpos = lookahead.lexpos
+            t.value = lookahead
+            lookaheadstack.append(lookahead)
+            return t, state, errorcount
+
+        sym = symstack.pop()
+        if tracking:
+            lookahead.lineno = sym.lineno
+            lookahead.lexpos = sym.lexpos
+        statestack.pop()
+        return lookahead, statestack[-1], errorcount
+
+# -----------------------------------------------------------------------------
+#                              == LRIntParser ==
+#
+# Version of LRParser working on integer symbol ids instead of names.  The
+# terminals are numbered from 0 ('$end') and the lexer is switched to hand out
+# these ids as token types (see Lexer.settypeids()).  The action table is kept
+# as one array per state indexed by terminal id, identical rows being shared,
+# or with compress=True, comb-compressed into a single array (row displacement
+# with a check array).  The goto table is always comb-compressed by
+# nonterminal: a goto entry that is looked up is always defined, so it doesn't
+# need a check array.
+#
+# Grammar rules and p_error() are called exactly as with LRParser, except that
+# the type of a token is the id of its terminal (its name is parser.symbols[type]).
+# Nonterminal symbols keep their names as type.
+# -----------------------------------------------------------------------------
+
+ACTION_ERROR = 0x7fffffff      # Action table entry for a syntax error
+END_ID       = 0               # Terminal id of '$end'
+ERROR_ID     = 1               # Terminal id of 'error'
+
+# -----------------------------------------------------------------------------
+# comb_compress()
+#
+# Compress a table given as a list of rows, each row being a dictionary
+# {column: value} with columns in range(width).  Returns (base, table, check)
+# where the entry at row r and column c is table[base[r] + c] provided that
+# check[base[r] + c] == r.  Unused entries of table are set to fill.
+# -----------------------------------------------------------------------------
+
+def comb_compress(rows, width, fill):
+    base  = [0] * len(rows)
+    table = array('i')
+    check = array('i')
+    used  = bytearray()     # Bitmap of the entries of table already taken
+    first_free = 0          # First byte of used with a free entry
+    tried = {}              # Last displacement used for each set of columns
+    nbytes = (width >> 3) + 2
+
+    # Bits of used from position i on (at least width of them)
+    def window(i):
+        return int.from_bytes(used[i >> 3:(i >> 3) + nbytes], 'little') >> (i & 7)
+
+    # Rows with more entries are the hardest to place, so they go first
+    for r in sorted(range(len(rows)), key=lambda r: -len(rows[r])):
+        row = rows[r]
+        if not row:
+            continue
+        mask = 0
+        for c in row:
+            mask |= 1 << c
+
+        # First displacement where none of the entries of the row is taken.
+        # The search starts at the first free entry of table, or after the
+        # place of the last row with the same columns (entries are never
+        # freed, so the displacements before it still conflict).
+        b = max(0, first_free * 8 - min(row), tried.get(mask, -1) + 1)
+        while True:
+            conflict = window(b) & mask
+            if not conflict:
+                break
+            # Move the first conflicting column past the taken entries after it
+            k = (conflict & -conflict).bit_length() - 1
+            taken = window(b + k)
+            b += (~taken & (taken + 1)).bit_length() - 1
+        tried[mask] = b
+        base[r] = b
+
+        if len(check) < b + width:
+            table.extend([fill] * (b + width - len(table)))
+            check.extend([-1] * (b + width - len(check)))
+            used.extend(bytes(((b + width) >> 3) + nbytes - len(used)))
+        for c, value in row.items():
+            table[b + c] = value
+            check[b + c] = r
+            used[(b + c) >> 3] |= 1 << ((b + c) & 7)
+        while used[first_free] == 0xff:
+            first_free += 1
+
+    return base, table, check
+
+# Wrap the token() function of a lexer that doesn't support settypeids()
+def _typeid_tokens(token, typeids):
+    def get_token():
+        tok = token()
+        if tok:
+            tok.type = typeids[tok.type]
+        return tok
+    return get_token
+
+class LRIntParser:
+    _end = END_ID                                # Type of the end symbol
+    _error = ERROR_ID                            # Type of the error symbol
+
+    def __init__(self, lrtab, errorf, terminals=(), compress=False):
+        self.productions = lrtab.lr_productions
+        self.errorfunc = errorf
+        self._local = threading.local()          # State kept by thread
+
+        action = lrtab.lr_action
+        goto   = lrtab.lr_goto
+        nstates = len(action)
+
+        # Number the terminals.  terminals lists the tokens that the lexer may
+        # return even if the grammar doesn't use them.
+        typeids = {'$end': END_ID, 'error': ERROR_ID}
+        for t in terminals:
+            typeids.setdefault(t, len(typeids))
+        for st in range(nstates):
+            for t in action[st]:
+                typeids.setdefault(t, len(typeids))
+        self.typeids = typeids
+        self.symbols = list(typeids)
+
+        # Action table
+        width = len(typeids)
+        rowids = {}
+        rowid  = []
+        for st in range(nstates):
+            row = tuple(sorted((typeids[a], ACTION_ERROR if t is None else t) for a, t in action[st].items()))
+            rowid.append(rowids.setdefault(row, len(rowids)))
+        rows = [dict(row) for row in rowids]
+
+        if compress:
+            base, self.action_table, self.action_check = comb_compress(rows, width, ACTION_ERROR)
+            self.action_base  = array('i', [base[r] for r in rowid])
+            self.action_rowid = array('i', rowid)
+            self.action_rows  = None
+        else:
+            arrays = []
+            for row in rows:
+                a = array('i', [ACTION_ERROR]) * width
+                for c, t in row.items():
+                    a[c] = t
+                arrays.append(a)
+            self.action_rows  = [arrays[r] for r in rowid]
+            self.action_table = self.action_check = self.action_base = self.action_rowid = None
+
+        # Goto table, one row per nonterminal
+        ntids = {}
+        for p in self.productions[1:]:
+            ntids.setdefault(p.name, len(ntids))
+        rows = [{} for _ in ntids]
+        for st, gotos in goto.items():
+            for n, j in gotos.items():
+                rows[ntids[n]][st] = j
+        base, self.goto_table, _ = comb_compress(rows, nstates, -1)
+        self.goto_base = array('i', base)
+        self.prodlhs = array('i', [ntids.get(p.name, -1) for p in self.productions])
+
+        self.set_defaulted_states(action)
+        self.pooling = False
+        self.set_rules()
+
+    # The (function, length, name, goto base, direct) of each production,
+    # used by parseopt_notrack() (see LRParser.set_rules()).  The state to
+    # go to after a reduction is goto_table[goto base + uncovered state].
+    def set_rules(self):
+        self.rules = [None]
+        for p, lhs in zip(self.productions[1:], self.prodlhs[1:]):
+            self.rules.append((p.callable, p.len, p.name, self.goto_base[lhs], p.direct))
+
+    # The state of the parse (see LRParser.context())
+    statestack = LRParser.statestack
+    symstack   = LRParser.symstack
+    state      = LRParser.state
+    token      = LRParser.token
+    errorcount = LRParser.errorcount
+    errorok    = LRParser.errorok
+    context    = LRParser.context
+    _start     = LRParser._start
+    errok      = LRParser.errok
+    restart    = LRParser.restart
+
+    # Terminal ids that can be shifted in a state (see LRParser.shifted_tokens())
+    def shifted_tokens(self, state=0):
+        if self.action_rows is not None:
+            row = self.action_rows[state]
+            return [c for c, t in enumerate(row) if 0 < t < ACTION_ERROR]
+        base = self.action_base[state]
+        rowid = self.action_rowid[state]
+        return [c for c in range(len(self.symbols))
+                if self.action_check[base + c] == rowid and 0 < self.action_table[base + c] < ACTION_ERROR]
+
+    # Defaulted states are kept as an array with the reduce action of each
+    # state (0 if the state isn't defaulted).  See LRParser.set_defaulted_states().
+    def set_defaulted_states(self, action):
+        self.defaulted_states = array('i', [0]) * len(action)
+        for state, actions in action.items():
+            rules = list(actions.values())
+            if len(rules) == 1 and rules[0] is not None and rules[0] < 0:
+                self.defaulted_states[state] = rules[0]
+
+    def disable_defaulted_states(self):
+        self.defaulted_states = array('i', [0]) * len(self.defaulted_states)
+
+    # See LRParser.enable_symbol_pool()
+    enable_symbol_pool  = LRParser.enable_symbol_pool
+    disable_symbol_pool = LRParser.disable_symbol_pool
+    _symbol_pool        = LRParser._symbol_pool
+
+    # Return the name of a grammar symbol for the debugging output
+    def symbol_name(self, sym):
+        if isinstance(sym.type, int):
+            return self.symbols[sym.type]
+        return sym.type
+
+    # See LRParser.parse_tokens().  The tokens keep their type names (the
+    # parser hands out copies with the ids).
+    def parse_tokens(self, tokens, lexer=None, debug=False, tracking=False):
+        return self.parse(_TokenInput(tokens), lexer, debug, tracking)
+
+    # parse().
+    #
+    # Same as LRParser.parse(), using the integer tables.  The lexer hands
+    # out terminal ids during the parse (see _token_function()) and is given
+    # back the token types it had when the parse ends.
 
-                if t == 0:
-                    n = symstack[-1]
-                    result = getattr(n, 'value', None)
+    def parse(self, input=None, lexer=None, debug=False, tracking=False):
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+        saved = getattr(lexer, 'lextypeids', None)
+        try:
+            if debug or tracking:
+                return self.parsedebug(input, lexer, debug, tracking)
+            return self.parseopt_notrack(input, lexer)
+        finally:
+            if getattr(lexer, 'lextypeids', None) is not saved:
+                lexer.settypeids(saved)
+
+    # The token function of a parse.  Input already tokenized (by
+    # Lexer.tokenize_all() or given to parse_tokens()) is read straight from
+    # the tokens; otherwise the lexer must hand out terminal ids.
+    def _token_function(self, input, lexer):
+        if isinstance(input, (TokenColumns, _TokenInput)):
+            return input.reader(self.typeids)
+        if input is not None:
+            lexer.input(input)
+        if hasattr(lexer, 'settypeids'):
+            if lexer.lextypeids is not self.typeids:
+                lexer.settypeids(self.typeids)
+            return lexer.token
+        return _typeid_tokens(lexer.token, self.typeids)
+
+    # parsedebug().
+    #
+    # The parsing loop with debugging and position tracking.
+    #
+    # Generated from the template in ygen.py, with the other parsing loops.
+    # Don't edit it here: change the template and run python ply/ygen.py.
+
+    #--! int-parsedebug-start
+    def parsedebug(self, input=None, lexer=None, debug=False, tracking=False):
+        # If debugging has been specified as a flag, turn it into a logging object
+        if isinstance(debug, int) and debug:
+            debug = PlyLogger(sys.stderr)
+
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        rows    = self.action_rows               # Local references to the tables
+        abase   = self.action_base
+        arowid  = self.action_rowid
+        atable  = self.action_table
+        acheck  = self.action_check
+        gtable  = self.goto_table
+        rules   = self.rules
+        prod    = self.productions               # For the debugging output
+        defaulted_states = self.defaulted_states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        context = self._start()                  # State of this parse (see ParseContext)
+        errorcount = 0                           # Used during error recovery
+        pool    = None if tracking else self._symbol_pool()  # Free YaccSymbols (see enable_symbol_pool())
+
+        if debug:
+            debug.info('PLY: PARSE DEBUG START')
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        pslice.lexer = lexer
+        pslice.parser = context
+        get_token = context.token = self._token_function(input, lexer)
+
+        statestack = context.statestack = [0]  # Stack of parsing states
+        symstack = context.symstack = []       # Stack of grammar symbols
+        pslice.stack = symstack
+        spush = statestack.append
+        ypush = symstack.append
+
+        # The start state is assumed to be (0,$end)
+        sym = YaccSymbol()
+        sym.type = END_ID
+        ypush(sym)
+        state = 0
+        while True:
+            if debug:
+                debug.debug('State  : %s', state)
 
+            t = defaulted_states[state]
+            if not t:
+                if lookahead is None:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = END_ID
+                if rows is None:
+                    i = abase[state] + lookahead.type
+                    t = atable[i] if acheck[i] == arowid[state] else ACTION_ERROR
+                else:
+                    t = rows[state][lookahead.type]
+            elif debug:
+                debug.debug('Defaulted state %s: Reduce using %d', state, -t)
+
+            if debug:
+                debug.debug('Stack  : %s',
+                            ('%s . %s' % (' '.join([self.symbol_name(xx) for xx in symstack][1:]),
+                                          self.symbol_name(lookahead) if lookahead else 'None')).lstrip())
+
+            if t != ACTION_ERROR:
+                if t > 0:
+                    # Shift
+                    spush(t)
+                    state = t
                     if debug:
-                        debug.info('Done   : Returning %s', format_result(result))
-                        debug.info('PLY: PARSE DEBUG END')
+                        debug.debug('Action : Shift and goto state %s', t)
+                    ypush(lookahead)
+                    lookahead = None
+                    if errorcount:
+                        errorcount = context.errorcount = errorcount - 1
+                    continue
 
-                    return result
+                if t < 0:
+                    # Reduce
+                    func, plen, pname, gbase, direct = rules[-t]
+                    if debug:
+                        debug.info('Action : Reduce rule [%s] with %s and goto state %d', prod[-t].str,
+                                   '['+','.join([format_stack_entry(_v.value) for _v in symstack[-plen:]])+']'
+                                   if plen else [],
+                                   gtable[gbase + statestack[-1-plen]])
+
+                    if pool:
+                        sym = pool.pop()
+                        sym.lineno = sym.lexpos = 0
+                        sym.endlineno = sym.endlexpos = None
+                    else:
+                        sym = YaccSymbol()
+                    sym.type = pname
+                    if tracking:
+                        if plen:
+                            t1 = symstack[-plen]
+                            sym.lineno = t1.lineno
+                            sym.lexpos = t1.lexpos
+                            t1 = symstack[-1]
+                            sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                            sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                        else:
+                            sym.lineno = getattr(lexer, 'lineno', 0)
+                            sym.lexpos = getattr(lexer, 'lexpos', 0)
+
+                    if direct:
+                        # The function takes the values of the right hand
+                        # side (passed one by one for the short rules, which
+                        # is faster than building a list) and returns the
+                        # value of the left hand side.  It runs before the
+                        # stacks are changed, so on an error they are left
+                        # as by the other rules.
+                        try:
+                            context.state = state
+                            if plen == 1:
+                                sym.value = func(symstack[-1].value)
+                            elif plen == 2:
+                                sym.value = func(symstack[-2].value, symstack[-1].value)
+                            elif plen == 3:
+                                sym.value = func(symstack[-3].value, symstack[-2].value, symstack[-1].value)
+                            elif plen == 4:
+                                sym.value = func(symstack[-4].value, symstack[-3].value, symstack[-2].value,
+                                                 symstack[-1].value)
+                            elif plen:
+                                sym.value = func(*[_s.value for _s in symstack[-plen:]])
+                            else:
+                                sym.value = func()
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            if plen:
+                                symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = ERROR_ID
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                            continue
+                        if debug:
+                            debug.info('Result : %s', format_result(sym.value))
+                        if plen:
+                            if pool is not None:
+                                for _s in symstack[-plen:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                        ypush(sym)
+                        state = gtable[gbase + statestack[-1]]
+                        spush(state)
+                        continue
 
-            if t is None:
+                    # The other functions take the production (p) and set
+                    # p[0].  The stacks are restored if they raise SyntaxError.
+                    sym.value = None
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
+                        pslice.slice = targ
+                        try:
+                            del symstack[-plen:]
+                            context.state = state
+                            func(pslice)
+                            del statestack[-plen:]
+                            if debug:
+                                debug.info('Result : %s', format_result(pslice[0]))
+                            if pool is not None:
+                                for _s in targ[1:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            ypush(sym)
+                            state = gtable[gbase + statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            symstack.extend(targ[1:-1])
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = ERROR_ID
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    else:
+                        targ = [sym]
+                        pslice.slice = targ
+                        try:
+                            context.state = state
+                            func(pslice)
+                            if debug:
+                                debug.info('Result : %s', format_result(pslice[0]))
+                            ypush(sym)
+                            state = gtable[gbase + statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = ERROR_ID
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    continue
 
+                # Accept
+                result = getattr(symstack[-1], 'value', None)
                 if debug:
-                    debug.error('Error  : %s',
-                                ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
-
-                # We have some kind of parsing error here.  To handle
-                # this, we are going to push the current token onto
-                # the tokenstack and replace it with an 'error' token.
-                # If there are any synchronization rules, they may
-                # catch it.
-                #
-                # In addition to pushing the error token, we call call
-                # the user defined p_error() function if this is the
-                # first syntax error.  This function is only called if
-                # errorcount == 0.
-                if errorcount == 0 or self.errorok:
-                    errorcount = error_count
-                    self.errorok = False
-                    errtoken = lookahead
-                    if errtoken.type == '$end':
-                        errtoken = None               # End of file!
-                    if self.errorfunc:
-                        if errtoken and not hasattr(errtoken, 'lexer'):
-                            errtoken.lexer = lexer
-                        self.state = state
-                        tok = self.errorfunc(errtoken)
-                        if self.errorok:
-                            # User must have done some kind of panic
-                            # mode recovery on their own.  The
-                            # returned token is the next lookahead
-                            lookahead = tok
-                            errtoken = None
+                    debug.info('Done   : Returning %s', format_result(result))
+                    debug.info('PLY: PARSE DEBUG END')
+                return result
+
+            # Syntax error (see _recover())
+            if debug:
+                debug.error('Error  : %s',
+                            ('%s . %s' % (' '.join([self.symbol_name(xx) for xx in symstack][1:]),
+                                          self.symbol_name(lookahead))).lstrip())
+            recovered = self._recover(context, lookahead, state, errorcount, lookaheadstack, lexer, tracking)
+            if recovered is None:
+                return
+            lookahead, state, errorcount = recovered
+    #--! int-parsedebug-end
+
+    # parseopt_notrack().
+    #
+    # LRParser.parseopt_notrack() on the integer tables: the loop of
+    # parsedebug() without debugging and position tracking, with the
+    # reductions taken from set_rules() and the error recovery done by
+    # LRParser._recover().
+    #
+    # Generated from the template in ygen.py, with the other parsing loops.
+    # Don't edit it here: change the template and run python ply/ygen.py.
+
+    #--! int-parseopt_notrack-start
+    def parseopt_notrack(self, input=None, lexer=None):
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        rows    = self.action_rows               # Local references to the tables
+        abase   = self.action_base
+        arowid  = self.action_rowid
+        atable  = self.action_table
+        acheck  = self.action_check
+        gtable  = self.goto_table
+        rules   = self.rules
+        defaulted_states = self.defaulted_states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        context = self._start()                  # State of this parse (see ParseContext)
+        errorcount = 0                           # Used during error recovery
+        pool    = self._symbol_pool()            # Free YaccSymbols (see enable_symbol_pool())
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        pslice.lexer = lexer
+        pslice.parser = context
+        get_token = context.token = self._token_function(input, lexer)
+
+        statestack = context.statestack = [0]  # Stack of parsing states
+        symstack = context.symstack = []       # Stack of grammar symbols
+        pslice.stack = symstack
+        spush = statestack.append
+        ypush = symstack.append
+
+        # The start state is assumed to be (0,$end)
+        sym = YaccSymbol()
+        sym.type = END_ID
+        ypush(sym)
+        state = 0
+        while True:
+            t = defaulted_states[state]
+            if not t:
+                if lookahead is None:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = END_ID
+                if rows is None:
+                    i = abase[state] + lookahead.type
+                    t = atable[i] if acheck[i] == arowid[state] else ACTION_ERROR
+                else:
+                    t = rows[state][lookahead.type]
+
+            if t != ACTION_ERROR:
+                if t > 0:
+                    # Shift
+                    spush(t)
+                    state = t
+                    ypush(lookahead)
+                    lookahead = None
+                    if errorcount:
+                        errorcount = context.errorcount = errorcount - 1
+                    continue
+
+                if t < 0:
+                    # Reduce
+                    func, plen, pname, gbase, direct = rules[-t]
+
+                    if pool:
+                        sym = pool.pop()
+                        sym.lineno = sym.lexpos = 0
+                        sym.endlineno = sym.endlexpos = None
+                    else:
+                        sym = YaccSymbol()
+                    sym.type = pname
+
+                    if direct:
+                        # The function takes the values of the right hand
+                        # side (passed one by one for the short rules, which
+                        # is faster than building a list) and returns the
+                        # value of the left hand side.  It runs before the
+                        # stacks are changed, so on an error they are left
+                        # as by the other rules.
+                        try:
+                            context.state = state
+                            if plen == 1:
+                                sym.value = func(symstack[-1].value)
+                            elif plen == 2:
+                                sym.value = func(symstack[-2].value, symstack[-1].value)
+                            elif plen == 3:
+                                sym.value = func(symstack[-3].value, symstack[-2].value, symstack[-1].value)
+                            elif plen == 4:
+                                sym.value = func(symstack[-4].value, symstack[-3].value, symstack[-2].value,
+                                                 symstack[-1].value)
+                            elif plen:
+                                sym.value = func(*[_s.value for _s in symstack[-plen:]])
+                            else:
+                                sym.value = func()
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            if plen:
+                                symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = ERROR_ID
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
                             continue
+                        if plen:
+                            if pool is not None:
+                                for _s in symstack[-plen:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                        ypush(sym)
+                        state = gtable[gbase + statestack[-1]]
+                        spush(state)
+                        continue
+
+                    # The other functions take the production (p) and set
+                    # p[0].  The stacks are restored if they raise SyntaxError.
+                    sym.value = None
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
+                        pslice.slice = targ
+                        try:
+                            del symstack[-plen:]
+                            context.state = state
+                            func(pslice)
+                            del statestack[-plen:]
+                            if pool is not None:
+                                for _s in targ[1:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            ypush(sym)
+                            state = gtable[gbase + statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            symstack.extend(targ[1:-1])
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = ERROR_ID
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
                     else:
-                        if errtoken:
-                            if hasattr(errtoken, 'lineno'):
-                                lineno = lookahead.lineno
-                            else:
-                                lineno = 0
-                            if lineno:
-                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
-                            else:
-                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
-                        else:
-                            sys.stderr.write('yacc: Parse error in input. EOF\n')
-                            return
-
-                else:
-                    errorcount = error_count
-
-                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
-                # entire parse has been rolled back and we're completely hosed.   The token is
-                # discarded and we just keep going.
-
-                if len(statestack) <= 1 and lookahead.type != '$end':
-                    lookahead = None
-                    errtoken = None
-                    state = 0
-                    # Nuke the pushback stack
-                    del lookaheadstack[:]
+                        targ = [sym]
+                        pslice.slice = targ
+                        try:
+                            context.state = state
+                            func(pslice)
+                            ypush(sym)
+                            state = gtable[gbase + statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = ERROR_ID
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
                     continue
 
-                # case 2: the statestack has a couple of entries on it, but we're
-                # at the end of the file. nuke the top entry and generate an error token
-
-                # Start nuking entries on the stack
-                if lookahead.type == '$end':
-                    # Whoa. We're really hosed here. Bail out
-                    return
-
-                if lookahead.type != 'error':
-                    sym = symstack[-1]
-                    if sym.type == 'error':
-                        # Hmmm. Error is on top of stack, we'll just nuke input
-                        # symbol and continue
-                        if tracking:
-                            sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
-                            sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
-                        lookahead = None
-                        continue
-
-                    # Create the error symbol for the first time and make it the new lookahead symbol
-                    t = YaccSymbol()
-                    t.type = 'error'
-
-                    if hasattr(lookahead, 'lineno'):
-                        t.lineno = t.endlineno = lookahead.lineno
-                    if hasattr(lookahead, 'lexpos'):
-                        t.lexpos = t.endlexpos = lookahead.lexpos
-                    t.value = lookahead
-                    lookaheadstack.append(lookahead)
-                    lookahead = t
-                else:
-                    sym = symstack.pop()
-                    if tracking:
-                        lookahead.lineno = sym.lineno
-                        lookahead.lexpos = sym.lexpos
-                    statestack.pop()
-                    state = statestack[-1]
+                # Accept
+                return getattr(symstack[-1], 'value', None)
 
-                continue
+            # Syntax error (see _recover())
+            recovered = self._recover(context, lookahead, state, errorcount, lookaheadstack, lexer)
+            if recovered is None:
+                return
+            lookahead, state, errorcount = recovered
+    #--! int-parseopt_notrack-end
 
-            # If we'r here, something really bad happened
-            raise RuntimeError('yacc: internal parser error!!!\n')
+    _recover = LRParser._recover
 
 # -----------------------------------------------------------------------------
 #                          === Grammar Representation ===
@@ -622,6 +2084,7 @@ class Production(object):
         self.number   = number
         self.func     = func
         self.callable = None
+        self.direct   = False
         self.file     = file
         self.line     = line
         self.prec     = precedence
@@ -681,6 +2144,38 @@ class Production(object):
     def bind(self, pdict):
         if self.func:
             self.callable = pdict[self.func]
+            self.direct = getattr(self.callable, 'direct', False)
+
+# -----------------------------------------------------------------------------
+# class MiniProduction:
+#
+# This class is a stripped down version of Production that is recreated when
+# the parsing tables are read back from the table cache.  It only carries the
+# attributes needed by the parsing engine.
+# -----------------------------------------------------------------------------
+
+class MiniProduction(object):
+    def __init__(self, str, name, len, func, file, line):
+        self.name     = name
+        self.len      = len
+        self.func     = func
+        self.callable = None
+        self.direct   = False
+        self.file     = file
+        self.line     = line
+        self.str      = str
+
+    def __str__(self):
+        return self.str
+
+    def __repr__(self):
+        return 'MiniProduction(%s)' % self.str
+
+    # Bind the production function name to a callable
+    def bind(self, pdict):
+        if self.func:
+            self.callable = pdict[self.func]
+            self.direct = getattr(self.callable, 'direct', False)
 
 # -----------------------------------------------------------------------------
 # class LRItem
@@ -930,17 +2425,18 @@ class Grammar(object):
 
     def find_unreachable(self):
 
-        # Mark all symbols that are reachable from a symbol s
-        def mark_reachable_from(s):
-            if s in reachable:
-                return
-            reachable.add(s)
+        # Mark all symbols that are reachable from the start symbol.  An explicit
+        # stack is used so that long chains of rules don't hit the recursion limit.
+        start = self.Productions[0].prod[0]
+        reachable = {start}
+        stack = [start]
+        while stack:
+            s = stack.pop()
             for p in self.Prodnames.get(s, []):
                 for r in p.prod:
-                    mark_reachable_from(r)
-
-        reachable = set()
-        mark_reachable_from(self.Productions[0].prod[0])
+                    if r not in reachable:
+                        reachable.add(r)
+                        stack.append(r)
         return [s for s in self.Nonterminals if s not in reachable]
 
     # -----------------------------------------------------------------------------
@@ -1297,6 +2793,64 @@ def traverse(x, N, stack, F, X, R, FP):
             F[stack[-1]] = F[x]
             element = stack.pop()
 
+# -----------------------------------------------------------------------------
+# digraph_bits()
+#
+# Same computation as digraph(), used by LRIntTable.  The elements of X are the
+# integers 0 .. len(FP)-1, R is a list giving the related elements of each
+# element and FP is a list with the initial value of F(x) as a pair
+# [mask, terms]: the set of terminal numbers as an integer bitmask and the
+# same numbers as a list, in the order in which digraph() would have appended
+# them.  The values of F are updated in place and shared between the elements
+# of a strongly connected component, like the lists of digraph(), so that the
+# order of the terms (which shows in the debugging output) is the same.  The
+# traversal is done without recursion so that large grammars don't hit the
+# recursion limit.  Returns the list of values of F.
+# -----------------------------------------------------------------------------
+
+def _union_bits(fx, fy):
+    new = fy[0] & ~fx[0]
+    if new:
+        fx[0] |= new
+        fx[1].extend([a for a in fy[1] if new >> a & 1])
+
+def digraph_bits(R, FP):
+    F = list(FP)
+    N = [0] * len(F)
+    stack = []
+    for x in range(len(F)):
+        if N[x]:
+            continue
+        stack.append(x)
+        N[x] = len(stack)
+        work = [(x, len(stack), iter(R[x]))]
+        while work:
+            x, d, rel = work[-1]
+            for y in rel:
+                if N[y] == 0:
+                    stack.append(y)
+                    N[y] = len(stack)
+                    work.append((y, len(stack), iter(R[y])))
+                    break
+                if N[y] < N[x]:
+                    N[x] = N[y]
+                _union_bits(F[x], F[y])
+            else:
+                work.pop()
+                if N[x] == d:
+                    while True:
+                        element = stack.pop()
+                        N[element] = MAXINT
+                        F[element] = F[x]
+                        if element == x:
+                            break
+                if work:
+                    p = work[-1][0]
+                    if N[x] < N[p]:
+                        N[p] = N[x]
+                    _union_bits(F[p], F[x])
+    return F
+
 class LALRError(YaccError):
     pass
 
@@ -1335,6 +2889,9 @@ class LRTable:
         self.rr_conflicts  = []
 
         # Build the tables
+        self.build_tables()
+
+    def build_tables(self):
         self.grammar.build_lritems()
         self.grammar.compute_first()
         self.grammar.compute_follow()
@@ -1436,6 +2993,12 @@ class LRTable:
 
         return C
 
+    # Return the number of the state reached from state st (item set I) on
+    # symbol x or -1 if there is no such transition
+    def lr0_transition(self, st, I, x):
+        g = self.lr0_goto(I, x)
+        return self.lr0_cidhash.get(id(g), -1)
+
     # -----------------------------------------------------------------------------
     #                       ==== LALR(1) Parsing ====
     #
@@ -1751,6 +3314,9 @@ class LRTable:
 
         actionp = {}                  # Action production array (temporary)
 
+        # The list of actions of each state is only kept for the debugging output
+        verbose = not isinstance(log, NullLogger)
+
         # Step 1: Construct C = { I0, I1, ... IN}, collection of LR(0) items
         # This determines the number of states
 
@@ -1782,7 +3348,8 @@ class LRTable:
                             # We are at the end of a production.  Reduce!
                             laheads = p.lookaheads[st]
                             for a in laheads:
-                                actlist.append((a, p, 'reduce using rule %d (%s)' % (p.number, p)))
+                                if verbose:
+                                    actlist.append((a, p, 'reduce using rule %d (%s)' % (p.number, p)))
                                 r = st_action.get(a)
                                 if r is not None:
                                     # Whoa. Have a shift/reduce or reduce/reduce conflict
@@ -1838,11 +3405,11 @@ class LRTable:
                         i = p.lr_index
                         a = p.prod[i+1]       # Get symbol right after the "."
                         if a in self.grammar.Terminals:
-                            g = self.lr0_goto(I, a)
-                            j = self.lr0_cidhash.get(id(g), -1)
+                            j = self.lr0_transition(st, I, a)
                             if j >= 0:
                                 # We are in a shift state
-                                actlist.append((a, p, 'shift and go to state %d' % j))
+                                if verbose:
+                                    actlist.append((a, p, 'shift and go to state %d' % j))
                                 r = st_action.get(a)
                                 if r is not None:
                                     # Whoa have a shift/reduce or shift/shift conflict
@@ -1911,8 +3478,7 @@ class LRTable:
                     if s in self.grammar.Nonterminals:
                         nkeys[s] = None
             for n in nkeys:
-                g = self.lr0_goto(I, n)
-                j = self.lr0_cidhash.get(id(g), -1)
+                j = self.lr0_transition(st, I, n)
                 if j >= 0:
                     st_goto[n] = j
                     log.info('    %-30s shift and go to state %d', n, j)
@@ -1922,6 +3488,653 @@ class LRTable:
             goto[st] = st_goto
             st += 1
 
+# -----------------------------------------------------------------------------
+#                             == LRIntTable ==
+#
+# Faster version of LRTable.  The LR(0) items are numbered and handled as
+# integers, item sets are tuples of item numbers and the LALR(1) lookahead sets
+# are bitmasks over the terminals.  The states are numbered in the same order
+# as in LRTable and the generated tables are identical, including the extra
+# INCLUDES relations that LRTable derives from kernel items.  The lookaheads
+# of each rule are listed in the same order as well (see digraph_bits()), so
+# the actions are added in the same order and the debugging output is the
+# same.
+# -----------------------------------------------------------------------------
+
+class LRIntTable(LRTable):
+
+    # The FIRST and FOLLOW sets of the grammar aren't used by the LALR(1)
+    # computation, so they aren't computed here
+    def build_tables(self):
+        self.grammar.build_lritems()
+        self.lr_parse_table()
+
+    # Number all of the LR items of the grammar
+    def number_items(self):
+        Productions = self.grammar.Productions
+        Prodnames   = self.grammar.Prodnames
+
+        self.terminals = list(self.grammar.Terminals)
+        if '$end' not in self.grammar.Terminals:
+            self.terminals.append('$end')
+        self.term_numbers = {t: n for n, t in enumerate(self.terminals)}
+
+        self.lr_items   = []          # LRItem object of each item number
+        self.first_item = []          # Number of the item 'A -> . alpha' of each production
+        for p in Productions:
+            self.first_item.append(len(self.lr_items))
+            self.lr_items.extend(p.lr_items)
+
+        # For each item, the symbol after the '.' (None for final items) and
+        # the numbers of the items added by the closure
+        self.item_next  = []
+        self.item_after = []
+        for p in Productions:
+            for n in range(p.len):
+                x = p.prod[n]
+                self.item_next.append(x)
+                self.item_after.append(tuple(self.first_item[q.number] for q in Prodnames.get(x, ())))
+            self.item_next.append(None)
+            self.item_after.append(())
+
+    # Compute the LR(0) closure of the kernel items K.  The result is a tuple of
+    # item numbers in the same order as LRTable.lr0_closure().
+    def lr0_closure_int(self, K):
+        after = self.item_after
+        J = list(K)
+        added = set()
+        for i in J:
+            for n in after[i]:
+                if n not in added:
+                    added.add(n)
+                    J.append(n)
+        return tuple(J)
+
+    # Compute the LR(0) sets of items and the transitions between them.  Returns
+    # the item sets as lists of LRItem objects for lr_parse_table().
+    def lr0_items(self):
+        self.number_items()
+        lr_items  = self.lr_items
+        item_next = self.item_next
+
+        states  = [self.lr0_closure_int((self.first_item[0],))]
+        kernels = {}
+        self.lr0_states  = states
+        self.transitions = transitions = []
+
+        i = 0
+        while i < len(states):
+            I = states[i]
+            i += 1
+
+            # Kernels of the goto(I,X) sets for each symbol X
+            gotos = {}
+            for n in I:
+                x = item_next[n]
+                if x is not None:
+                    k = gotos.get(x)
+                    if k is None:
+                        gotos[x] = [n+1]
+                    else:
+                        k.append(n+1)
+
+            # New states are created in the order in which LRTable visits the symbols
+            trans = {}
+            for n in I:
+                for x in lr_items[n].usyms:
+                    if x in gotos and x not in trans:
+                        k = tuple(gotos[x])
+                        j = kernels.get(k)
+                        if j is None:
+                            j = kernels[k] = len(states)
+                            states.append(self.lr0_closure_int(k))
+                        trans[x] = j
+                if len(trans) == len(gotos):
+                    break
+            transitions.append(trans)
+
+        return [[lr_items[n] for n in I] for I in states]
+
+    def lr0_transition(self, st, I, x):
+        return self.transitions[st].get(x, -1)
+
+    # Compute the LALR(1) lookaheads of the final items.  This is the same
+    # computation as LRTable.add_lalr_lookaheads() with terminal sets as bitmasks.
+    def add_lalr_lookaheads(self, C):
+        Productions  = self.grammar.Productions
+        Nonterminals = self.grammar.Nonterminals
+        nullable     = self.compute_nullable_nonterminals()
+        states       = self.lr0_states
+        transitions  = self.transitions
+        lr_items     = self.lr_items
+        item_next    = self.item_next
+        first_item   = self.first_item
+        term_numbers = self.term_numbers
+
+        # Number the non-terminal transitions (state, N), in the order of
+        # LRTable.find_nonterminal_transitions()
+        ntrans = {}
+        for st, I in enumerate(states):
+            for n in I:
+                x = item_next[n]
+                if x in Nonterminals and (st, x) not in ntrans:
+                    ntrans[(st, x)] = len(ntrans)
+
+        # DR() and READS relations
+        drsets = []
+        reads  = []
+        start  = Productions[0].prod[0]
+        for st, N in ntrans:
+            j = transitions[st][N]
+            mask = 0
+            terms = []
+            rel = []
+            for n in states[j]:
+                a = item_next[n]
+                if a in term_numbers:
+                    a = term_numbers[a]
+                    if not mask >> a & 1:
+                        mask |= 1 << a
+                        terms.append(a)
+                elif a in nullable:
+                    rel.append(ntrans[(j, a)])
+            if st == 0 and N == start:
+                mask |= 1 << term_numbers['$end']
+                terms.append(term_numbers['$end'])
+            drsets.append([mask, terms])
+            reads.append(rel)
+        readsets = digraph_bits(reads, drsets)
+
+        # For each production, whether the symbols from position i on can all
+        # derive the empty string
+        nullable_tail = []
+        for p in Productions:
+            tail = [True] * (p.len + 1)
+            for i in range(p.len - 1, -1, -1):
+                tail[i] = tail[i+1] and p.prod[i] in nullable
+            nullable_tail.append(tail)
+
+        # INCLUDES and LOOKBACK relations
+        includes = [[] for _ in ntrans]
+        lookback = {}
+        for t, (st, N) in enumerate(ntrans):
+            for n in states[st]:
+                p = lr_items[n]
+                if p.name != N:
+                    continue
+                tail = nullable_tail[p.number]
+                prod = Productions[p.number].prod
+                j = st
+                for i in range(n - first_item[p.number], len(prod)):
+                    x = prod[i]
+                    u = ntrans.get((j, x))
+                    if u is not None and tail[i+1]:
+                        includes[u].append(t)
+                    j = transitions[j][x]
+                if p.lr_index == 0:
+                    lookback.setdefault((j, p.number), []).append(t)
+        followsets = digraph_bits(includes, readsets)
+
+        # Attach the lookaheads to the final items, in the order of
+        # LRTable.add_lookaheads()
+        terminals = self.terminals
+        for (j, number), lb in lookback.items():
+            laheads = [0, []]
+            for t in lb:
+                _union_bits(laheads, followsets[t])
+            Productions[number].lr_items[-1].lookaheads[j] = [terminals[a] for a in laheads[1]]
+
+# -----------------------------------------------------------------------------
+#                            === Table Cache ===
+#
+# Building the LALR tables is the most expensive part of yacc().  The following
+# functions save the finished tables of a parser to a file and read them back
+# on later runs.  A cache file is only accepted if it was written with the same
+# table format, the same version of PLY and for the same grammar signature.
+# Anything else (missing file, stale or corrupt contents) simply causes the
+# tables to be rebuilt and the file to be rewritten.
+# -----------------------------------------------------------------------------
+
+# Compute the key under which tables are cached for a grammar signature
+def table_signature(signature):
+    return hashlib.sha256(('%s:%s' % (__version__, signature)).encode('utf-8')).hexdigest()
+
+# -----------------------------------------------------------------------------
+# class LRCachedTable
+#
+# Holds parsing tables read back from the table cache.  It provides the same
+# attributes as LRTable for the purpose of building an LRParser.
+# -----------------------------------------------------------------------------
+
+class LRCachedTable:
+    def __init__(self, productions, action, goto, defaulted_states):
+        self.lr_productions   = productions
+        self.lr_action        = action
+        self.lr_goto          = goto
+        self.defaulted_states = defaulted_states
+
+    # Bind all production function names to callable objects in pdict
+    def bind_callables(self, pdict):
+        for p in self.lr_productions:
+            p.bind(pdict)
+
+# -----------------------------------------------------------------------------
+# read_table()
+#
+# Reads the parsing tables stored in filename.  Returns an LRCachedTable or
+# None if the file is missing or doesn't match the given signature.
+# -----------------------------------------------------------------------------
+
+def read_table(filename, signature):
+    try:
+        with open(filename, 'rb') as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+    if (not isinstance(data, dict) or data.get('tabversion') != __tabversion__ or
+        data.get('signature') != table_signature(signature)):
+        return None
+
+    productions = [MiniProduction(*p) for p in data['productions']]
+    return LRCachedTable(productions, data['action'], data['goto'], data['defaulted_states'])
+
+# -----------------------------------------------------------------------------
+# write_table()
+#
+# Writes the parsing tables of parser to filename.  The tables are first
+# written to a temporary file in the same directory which then replaces the
+# old file in one step.  Concurrent readers therefore either see the old file
+# or the complete new one, never a partially written file.  The temporary
+# file is given the mode of a newly created file (see _file_mode()).
+# -----------------------------------------------------------------------------
+
+def write_table(filename, signature, parser):
+    data = {
+        'tabversion'       : __tabversion__,
+        'signature'        : table_signature(signature),
+        'productions'      : [(p.str, p.name, p.len, p.func, p.file, p.line) for p in parser.productions],
+        'action'           : parser.action,
+        'goto'             : parser.goto,
+        'defaulted_states' : parser.defaulted_states,
+    }
+
+    dirname = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(filename))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.chmod(tmpname, _file_mode())
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.unlink(tmpname)
+        raise
+
+# -----------------------------------------------------------------------------
+#                        === Standalone Parser Modules ===
+#
+# write_module() turns a built parser into a Python module that holds the
+# parsing tables as literals together with a parse loop specialized for them.
+# Importing the module (normally from its cached bytecode) gives a parser
+# without any reflection or table construction.  The grammar rule functions
+# are looked up by name in the grammar module when a Parser is created.
+# -----------------------------------------------------------------------------
+
+_module_header = """\
+# -----------------------------------------------------------------------------
+# %(filename)s
+#
+# Parser generated by PLY %(version)s for the grammar in module %(module)r.
+# Do not edit.  Regenerate it with ply.yacc.write_module() whenever the
+# grammar changes.
+# -----------------------------------------------------------------------------
+
+import threading
+from ply.lex import TokenColumns
+from ply.yacc import YaccSymbol, YaccProduction, LRParser, error_count, _TokenInput
+
+module    = %(module)r
+signature = %(signature)r
+plyversion = %(plyversion)r
+
+"""
+
+_module_parser = ("""
+# -----------------------------------------------------------------------------
+# Parser
+#
+# Same interface and behavior as ply.yacc.LRParser (without the debug and
+# tracking options).  The grammar rule functions are taken from the module
+# object given (the grammar module is imported if none is given).
+# -----------------------------------------------------------------------------
+
+class Parser:
+    def __init__(self, rules=None):
+        if rules is None:
+            import importlib
+            rules = importlib.import_module(module)
+        self.rules = [None]
+        for name, plen, func, file, line in productions[1:]:
+            func = getattr(rules, func)
+            self.rules.append((func, plen, name, goto[name], getattr(func, 'direct', False)))
+        self.errorfunc = getattr(rules, 'p_error', None)
+        self.action = action
+        self.defaulted_states = defaulted_states
+        self.pooling = False
+        self.pushing = None
+        self._local = threading.local()
+
+    _end = '$end'
+    _error = 'error'
+
+    # The state of the parse (see LRParser.context())
+    statestack = LRParser.statestack
+    symstack = LRParser.symstack
+    state = LRParser.state
+    token = LRParser.token
+    errorcount = LRParser.errorcount
+    errorok = LRParser.errorok
+    context = LRParser.context
+    _start = LRParser._start
+    errok = LRParser.errok
+    restart = LRParser.restart
+
+    def shifted_tokens(self, state=0):
+        return [t for t, a in action[state].items() if a is not None and a > 0]
+
+    # Push parsing (see LRParser.feed())
+    feed = LRParser.feed
+    flush = LRParser.flush
+    end = LRParser.end
+    push_parse = LRParser.push_parse
+    _end_accepted = LRParser._end_accepted
+    _push = LRParser._push
+    _recover = LRParser._recover
+
+    # See LRParser.enable_symbol_pool()
+    enable_symbol_pool = LRParser.enable_symbol_pool
+    disable_symbol_pool = LRParser.disable_symbol_pool
+    _symbol_pool = LRParser._symbol_pool
+
+    def parse_tokens(self, tokens, lexer=None):
+        return self.parse(_TokenInput(tokens), lexer)
+
+"""
+# Parser.parse(), the loop of LRParser.parseopt_notrack() generated from the
+# template in ygen.py.  Don't edit it here: run python ply/ygen.py.
+#--! module-parse-start
+"""\
+    def parse(self, input=None, lexer=None):
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        actions = self.action                    # Local references to the tables
+        rules   = self.rules
+        defaulted_states = self.defaulted_states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        context = self._start()                  # State of this parse (see ParseContext)
+        errorcount = 0                           # Used during error recovery
+        pool    = self._symbol_pool()            # Free YaccSymbols (see enable_symbol_pool())
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from ply import lex
+            lexer = lex.lexer
+
+        pslice.lexer = lexer
+        pslice.parser = context
+
+        # Input already tokenized (by Lexer.tokenize_all() or given to
+        # parse_tokens()) is read straight from the tokens
+        if isinstance(input, (TokenColumns, _TokenInput)):
+            get_token = context.token = input.reader()
+        else:
+            if input is not None:
+                lexer.input(input)
+            get_token = context.token = lexer.token
+
+        statestack = context.statestack = [0]  # Stack of parsing states
+        symstack = context.symstack = []       # Stack of grammar symbols
+        pslice.stack = symstack
+        spush = statestack.append
+        ypush = symstack.append
+
+        # The start state is assumed to be (0,$end)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        ypush(sym)
+        state = 0
+        while True:
+            if state not in defaulted_states:
+                if lookahead is None:
+                    if not lookaheadstack:
+                        lookahead = get_token()     # Get the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+                t = actions[state].get(lookahead.type)
+            else:
+                t = defaulted_states[state]
+
+            if t is not None:
+                if t > 0:
+                    # Shift
+                    spush(t)
+                    state = t
+                    ypush(lookahead)
+                    lookahead = None
+                    if errorcount:
+                        errorcount = context.errorcount = errorcount - 1
+                    continue
+
+                if t < 0:
+                    # Reduce
+                    func, plen, pname, gotos, direct = rules[-t]
+
+                    if pool:
+                        sym = pool.pop()
+                        sym.lineno = sym.lexpos = 0
+                        sym.endlineno = sym.endlexpos = None
+                    else:
+                        sym = YaccSymbol()
+                    sym.type = pname
+
+                    if direct:
+                        # The function takes the values of the right hand
+                        # side (passed one by one for the short rules, which
+                        # is faster than building a list) and returns the
+                        # value of the left hand side.  It runs before the
+                        # stacks are changed, so on an error they are left
+                        # as by the other rules.
+                        try:
+                            context.state = state
+                            if plen == 1:
+                                sym.value = func(symstack[-1].value)
+                            elif plen == 2:
+                                sym.value = func(symstack[-2].value, symstack[-1].value)
+                            elif plen == 3:
+                                sym.value = func(symstack[-3].value, symstack[-2].value, symstack[-1].value)
+                            elif plen == 4:
+                                sym.value = func(symstack[-4].value, symstack[-3].value, symstack[-2].value,
+                                                 symstack[-1].value)
+                            elif plen:
+                                sym.value = func(*[_s.value for _s in symstack[-plen:]])
+                            else:
+                                sym.value = func()
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            if plen:
+                                symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                            continue
+                        if plen:
+                            if pool is not None:
+                                for _s in symstack[-plen:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                        ypush(sym)
+                        state = gotos[statestack[-1]]
+                        spush(state)
+                        continue
+
+                    # The other functions take the production (p) and set
+                    # p[0].  The stacks are restored if they raise SyntaxError.
+                    sym.value = None
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
+                        pslice.slice = targ
+                        try:
+                            del symstack[-plen:]
+                            context.state = state
+                            func(pslice)
+                            del statestack[-plen:]
+                            if pool is not None:
+                                for _s in targ[1:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            ypush(sym)
+                            state = gotos[statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            symstack.extend(targ[1:-1])
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    else:
+                        targ = [sym]
+                        pslice.slice = targ
+                        try:
+                            context.state = state
+                            func(pslice)
+                            ypush(sym)
+                            state = gotos[statestack[-1]]
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    continue
+
+                # Accept
+                return getattr(symstack[-1], 'value', None)
+
+            # Syntax error (see _recover())
+            recovered = self._recover(context, lookahead, state, errorcount, lookaheadstack, lexer)
+            if recovered is None:
+                return
+            lookahead, state, errorcount = recovered
+"""
+#--! module-parse-end
+)
+
+# Version of the generated modules.  They use internals of ply.yacc, so a
+# module only works with the version of PLY (and of the template above)
+# that wrote it.
+_module_version = table_signature('%s:%s%s' % (__tabversion__, _module_header, _module_parser))
+
+# -----------------------------------------------------------------------------
+# write_module()
+#
+# Write the parser as a standalone module to filename.  module is the name
+# of the module that defines the grammar rule functions.  signature is any
+# string that the caller wants to record in the module (for instance, to
+# detect that the grammar changed since the module was written).  The file
+# is replaced in one step and gets the mode of a new file, like the table
+# cache (see write_table()).
+# -----------------------------------------------------------------------------
+
+def write_module(parser, filename, module, signature=''):
+    # The goto table is written by nonterminal so that a reduction needs a
+    # single lookup
+    gotocols = {}
+    for state, gotos in parser.goto.items():
+        for name, j in gotos.items():
+            gotocols.setdefault(name, {})[state] = j
+
+    parts = [_module_header % {
+        'filename': os.path.basename(filename),
+        'version': __version__,
+        'module': module,
+        'signature': signature,
+        'plyversion': _module_version,
+    }]
+
+    parts.append('# Productions: (name, length, function name, file, line)\n')
+    parts.append('productions = [\n')
+    for p in parser.productions:
+        parts.append('    %r,\n' % ((p.name, p.len, p.func, p.file, p.line),))
+    parts.append(']\n\n')
+
+    parts.append('# Action table: action[state][token] (> 0 shift, < 0 reduce, 0 accept)\n')
+    parts.append('action = {\n')
+    for state, actions in parser.action.items():
+        parts.append('    %d: %r,\n' % (state, actions))
+    parts.append('}\n\n')
+
+    parts.append('# Goto table: goto[nonterminal][state]\n')
+    parts.append('goto = {\n')
+    for name, gotos in gotocols.items():
+        parts.append('    %r: %r,\n' % (name, gotos))
+    parts.append('}\n\n')
+
+    parts.append('# States where the only action is a reduction\n')
+    parts.append('defaulted_states = %r\n' % (parser.defaulted_states,))
+    parts.append(_module_parser)
+
+    dirname = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(filename))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(''.join(parts))
+        os.chmod(tmpname, _file_mode())
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.unlink(tmpname)
+        raise
+
+# -----------------------------------------------------------------------------
+# read_module()
+#
+# Imports the parser module written by write_module() under the given module
+# name.  Returns None if there is no such module, or if it was written for
+# another signature or by another version of PLY (its Parser would call
+# internals of ply.yacc that may have changed).
+# -----------------------------------------------------------------------------
+
+def read_module(name, signature=''):
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return None
+    if (getattr(module, 'plyversion', None) != _module_version or
+        getattr(module, 'signature', None) != signature):
+        return None
+    return module
+
 # -----------------------------------------------------------------------------
 #                            === INTROSPECTION ===
 #
@@ -2023,6 +4236,25 @@ class ParserReflect(object):
         self.validate_modules()
         return self.error
 
+    # Collect the precedence table and the grammar rules without any of the
+    # checks made by validate_all().  This is used in optimized mode where the
+    # grammar is assumed to have been validated during development.
+    def get_grammar(self):
+        preclist = []
+        if self.prec:
+            for level, p in enumerate(self.prec):
+                for term in p[1:]:
+                    preclist.append((term, p[0], level+1))
+        self.preclist = preclist
+
+        grammar = []
+        for line, module, name, doc in self.pfuncs:
+            if doc:
+                file = self.pdict[name].__code__.co_filename
+                for g in parse_grammar(doc, file, line):
+                    grammar.append((name, g))
+        self.grammar = grammar
+
     # Compute a signature over the grammar
     def signature(self):
         parts = []
@@ -2033,8 +4265,11 @@ class ParserReflect(object):
                 parts.append(''.join([''.join(p) for p in self.prec]))
             if self.tokens:
                 parts.append(' '.join(self.tokens))
+            # The name of each function too: the cached productions are
+            # bound to the functions by name
             for f in self.pfuncs:
                 if f[3]:
+                    parts.append(f[2])
                     parts.append(f[3])
         except (TypeError, ValueError):
             pass
@@ -2217,10 +4452,12 @@ class ParserReflect(object):
                 reqargs = 2
             else:
                 reqargs = 1
-            if func.__code__.co_argcount > reqargs:
+            # The arguments of @direct rules are checked against each production
+            direct = getattr(func, 'direct', False)
+            if not direct and func.__code__.co_argcount > reqargs:
                 self.log.error('%s:%d: Rule %r has too many arguments', file, line, func.__name__)
                 self.error = True
-            elif func.__code__.co_argcount < reqargs:
+            elif not direct and func.__code__.co_argcount < reqargs:
                 self.log.error('%s:%d: Rule %r requires an argument', file, line, func.__name__)
                 self.error = True
             elif not func.__doc__:
@@ -2231,6 +4468,8 @@ class ParserReflect(object):
                     parsed_g = parse_grammar(doc, file, line)
                     for g in parsed_g:
                         grammar.append((name, g))
+                        if direct:
+                            self.validate_direct(func, g)
                 except SyntaxError as e:
                     self.log.error(str(e))
                     self.error = True
@@ -2262,15 +4501,33 @@ class ParserReflect(object):
 
         self.grammar = grammar
 
+    # Check that a @direct rule can be called with the values of production g
+    def validate_direct(self, func, g):
+        file, dline, prodname, syms = g
+        if '%prec' in syms:
+            syms = syms[:syms.index('%prec')]
+        try:
+            inspect.signature(func).bind(*syms)
+        except TypeError:
+            self.log.error('%s:%d: Rule %r does not take the %d values of %s',
+                           file, dline, func.__name__, len(syms), ' '.join([prodname, ':'] + syms))
+            self.error = True
+
 # -----------------------------------------------------------------------------
 # yacc(module)
 #
-# Build a parser
+# Build a parser.  tables selects the representation of the parsing tables:
+# 'dict' (an LRParser with dictionaries keyed by symbol name), 'array' or
+# 'comb' (an LRIntParser with integer symbol ids, 'comb' compressing the
+# action table into a single array).  'array' parses about as fast as 'dict'
+# (1.0x on tatico.py, 1.2x on a synthetic grammar of 1000 productions) with
+# tables 1.5x to 9x smaller; 'comb' has the smallest tables of small grammars
+# but parses them at about 0.9x (see benchmarks/tabelas_int.py).
 # -----------------------------------------------------------------------------
 
 def yacc(*, debug=yaccdebug, module=None, start=None,
          check_recursion=True, optimize=False, debugfile=debug_file,
-         debuglog=None, errorlog=None):
+         debuglog=None, errorlog=None, tabfile=tab_file, tables='dict'):
 
     # Reference to the parsing method of the last built parser
     global parse
@@ -2303,6 +4560,27 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
     if pinfo.error:
         raise YaccError('Unable to build parser')
 
+    if tables not in ('dict', 'array', 'comb'):
+        raise YaccError(f'Unknown table representation {tables!r}')
+
+    # Try to reuse the tables from the table cache.  Debugging output is
+    # produced while the tables are built, so the cache isn't used in debug mode.
+    signature = pinfo.signature()
+    if tabfile and not debug:
+        try:
+            lr = read_table(tabfile, signature)
+            if lr:
+                lr.bind_callables(pinfo.pdict)
+                if tables == 'dict':
+                    parser = LRParser(lr, pinfo.error_func)
+                    parser.defaulted_states = lr.defaulted_states
+                else:
+                    parser = LRIntParser(lr, pinfo.error_func, pinfo.tokens, compress=(tables == 'comb'))
+                parse = parser.parse
+                return parser
+        except Exception as e:
+            errorlog.warning('There was a problem loading the table file %r: %r', tabfile, e)
+
     if debuglog is None:
         if debug:
             try:
@@ -2317,12 +4595,17 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
 
     errors = False
 
-    # Validate the parser information
-    if pinfo.validate_all():
-        raise YaccError('Unable to build parser')
+    # Validate the parser information.  In optimized mode, the grammar is
+    # simply collected.  None of the checks below that only produce warnings
+    # or diagnose a malformed grammar are made either.
+    if optimize:
+        pinfo.get_grammar()
+    else:
+        if pinfo.validate_all():
+            raise YaccError('Unable to build parser')
 
-    if not pinfo.error_func:
-        errorlog.warning('no p_error() function is defined')
+        if not pinfo.error_func:
+            errorlog.warning('no p_error() function is defined')
 
     # Create a grammar object
     grammar = Grammar(pinfo.tokens)
@@ -2362,6 +4645,11 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
         errorlog.error('%s:%d: Symbol %r used, but not defined as a token or a rule', prod.file, prod.line, sym)
         errors = True
 
+    if optimize:
+        if errors:
+            raise YaccError('Unable to build parser')
+        return _build_parser(grammar, pinfo, debug, debuglog, errorlog, tabfile, signature, tables)
+
     unused_terminals = grammar.unused_terminals()
     if unused_terminals:
         debuglog.info('')
@@ -2430,8 +4718,21 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
     if errors:
         raise YaccError('Unable to build parser')
 
+    return _build_parser(grammar, pinfo, debug, debuglog, errorlog, tabfile, signature, tables)
+
+# -----------------------------------------------------------------------------
+# _build_parser()
+#
+# Final step of yacc(): builds the LR tables for a grammar that has been
+# checked, reports conflicts and creates the parser.
+# -----------------------------------------------------------------------------
+
+def _build_parser(grammar, pinfo, debug, debuglog, errorlog, tabfile, signature, tables='dict'):
+    # Reference to the parsing method of the last built parser
+    global parse
+
     # Run the LRTable on the grammar
-    lr = LRTable(grammar, debuglog)
+    lr = LRIntTable(grammar, debuglog)
 
     if debug:
         num_sr = len(lr.sr_conflicts)
@@ -2478,5 +4779,17 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
     lr.bind_callables(pinfo.pdict)
     parser = LRParser(lr, pinfo.error_func)
 
+    # Save the tables for the next run
+    if tabfile:
+        try:
+            write_table(tabfile, signature, parser)
+        except OSError as e:
+            errorlog.warning("Couldn't create %r. %s" % (tabfile, e))
+
+    # Switch to the integer tables.  The table cache always stores the
+    # dictionaries, so it is shared by all the table representations.
+    if tables != 'dict':
+        parser = LRIntParser(lr, pinfo.error_func, pinfo.tokens, compress=(tables == 'comb'))
+
     parse = parser.parse
     return parser
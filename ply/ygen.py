@@ -0,0 +1,484 @@
+# -----------------------------------------------------------------------------
+# ply: ygen.py
+#
+# Generates the parsing loops of yacc.py from a single template.
+#
+# The LR engine is run by several copies of the same loop, each specialized
+# for speed: LRParser.parsedebug() and parseopt_notrack(), the generator
+# LRParser._push() used for push parsing, the same two loops of LRIntParser
+# on the integer tables, and Parser.parse() of the modules written by
+# yacc.write_module() (a string in yacc.py).  They are all written here,
+# once, in TEMPLATE.  A line
+#
+#     #--! <expression>
+#
+# keeps the lines that follow (up to the next such line) in the variants
+# where the expression, evaluated with the tags of the variant, is true.
+# #--! end keeps the lines that follow in every variant.  The tags are:
+#
+#     dict     LRParser tables (dictionaries, symbols named by strings)
+#     int      LRIntParser tables (arrays, terminals numbered)
+#     debug    debugging output and position tracking
+#     push     tokens sent to a generator (see LRParser.feed())
+#     module   the loop of the generated modules
+#
+# In yacc.py each variant sits between the lines #--! <name>-start and
+# #--! <name>-end.  Run
+#
+#     python ply/ygen.py
+#
+# after changing TEMPLATE to rewrite them, never edit them by hand.
+# python ply/ygen.py --check only tells whether they are up to date.
+# -----------------------------------------------------------------------------
+
+import os
+import re
+import sys
+
+TEMPLATE = '''\
+    #--! debug
+    def parsedebug(self, input=None, lexer=None, debug=False, tracking=False):
+        # If debugging has been specified as a flag, turn it into a logging object
+        if isinstance(debug, int) and debug:
+            debug = PlyLogger(sys.stderr)
+
+    #--! not debug and not push and not module
+    def parseopt_notrack(self, input=None, lexer=None):
+    #--! push
+    def _push(self, lexer):
+    #--! module
+    def parse(self, input=None, lexer=None):
+    #--! end
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+    #--! dict
+        actions = self.action                    # Local references to the tables
+    #--! int
+        rows    = self.action_rows               # Local references to the tables
+        abase   = self.action_base
+        arowid  = self.action_rowid
+        atable  = self.action_table
+        acheck  = self.action_check
+        gtable  = self.goto_table
+    #--! end
+        rules   = self.rules
+    #--! debug
+        prod    = self.productions               # For the debugging output
+    #--! end
+        defaulted_states = self.defaulted_states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        context = self._start()                  # State of this parse (see ParseContext)
+        errorcount = 0                           # Used during error recovery
+    #--! debug
+        pool    = None if tracking else self._symbol_pool()  # Free YaccSymbols (see enable_symbol_pool())
+    #--! not debug
+        pool    = self._symbol_pool()            # Free YaccSymbols (see enable_symbol_pool())
+    #--! push
+        flushing = False                         # The lookahead is the end of a flush()
+    #--! debug
+
+        if debug:
+            debug.info('PLY: PARSE DEBUG START')
+    #--! not push
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+    #--! not push and not module
+            from . import lex
+    #--! module
+            from ply import lex
+    #--! not push
+            lexer = lex.lexer
+    #--! end
+
+        pslice.lexer = lexer
+        pslice.parser = context
+    #--! dict and not push
+
+        # Input already tokenized (by Lexer.tokenize_all() or given to
+        # parse_tokens()) is read straight from the tokens
+        if isinstance(input, (TokenColumns, _TokenInput)):
+            get_token = context.token = input.reader()
+        else:
+            if input is not None:
+                lexer.input(input)
+            get_token = context.token = lexer.token
+    #--! int
+        get_token = context.token = self._token_function(input, lexer)
+    #--! push
+        context.token = None
+    #--! end
+
+        statestack = context.statestack = [0]  # Stack of parsing states
+        symstack = context.symstack = []       # Stack of grammar symbols
+        pslice.stack = symstack
+        spush = statestack.append
+        ypush = symstack.append
+
+        # The start state is assumed to be (0,$end)
+        sym = YaccSymbol()
+    #--! dict
+        sym.type = '$end'
+    #--! int
+        sym.type = END_ID
+    #--! end
+        ypush(sym)
+        state = 0
+        while True:
+    #--! debug
+            if debug:
+                debug.debug('State  : %s', state)
+
+    #--! dict
+            if state not in defaulted_states:
+    #--! int
+            t = defaulted_states[state]
+            if not t:
+    #--! end
+                if lookahead is None:
+                    if not lookaheadstack:
+    #--! not push
+                        lookahead = get_token()     # Get the next token
+    #--! push
+                        lookahead = yield           # Get the next token
+                        while lookahead is _flush:
+                            if self._end_accepted(statestack):
+                                flushing = True
+                                lookahead = None
+                                break
+                            if errorcount and not context.errorok:
+                                del statestack[1:]
+                                del symstack[1:]
+                                state = 0
+                                errorcount = context.errorcount = 0
+                            lookahead = yield
+    #--! end
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+    #--! dict
+                        lookahead.type = '$end'
+                t = actions[state].get(lookahead.type)
+            else:
+                t = defaulted_states[state]
+    #--! dict and debug
+                if debug:
+                    debug.debug('Defaulted state %s: Reduce using %d', state, -t)
+    #--! int
+                        lookahead.type = END_ID
+                if rows is None:
+                    i = abase[state] + lookahead.type
+                    t = atable[i] if acheck[i] == arowid[state] else ACTION_ERROR
+                else:
+                    t = rows[state][lookahead.type]
+    #--! int and debug
+            elif debug:
+                debug.debug('Defaulted state %s: Reduce using %d', state, -t)
+    #--! dict and debug
+
+            if debug:
+                debug.debug('Stack  : %s',
+                            ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+    #--! int and debug
+
+            if debug:
+                debug.debug('Stack  : %s',
+                            ('%s . %s' % (' '.join([self.symbol_name(xx) for xx in symstack][1:]),
+                                          self.symbol_name(lookahead) if lookahead else 'None')).lstrip())
+    #--! end
+
+    #--! dict
+            if t is not None:
+    #--! int
+            if t != ACTION_ERROR:
+    #--! end
+                if t > 0:
+                    # Shift
+                    spush(t)
+                    state = t
+    #--! debug
+                    if debug:
+                        debug.debug('Action : Shift and goto state %s', t)
+    #--! end
+                    ypush(lookahead)
+                    lookahead = None
+                    if errorcount:
+                        errorcount = context.errorcount = errorcount - 1
+                    continue
+
+                if t < 0:
+                    # Reduce
+    #--! dict
+                    func, plen, pname, gotos, direct = rules[-t]
+    #--! int
+                    func, plen, pname, gbase, direct = rules[-t]
+    #--! debug
+                    if debug:
+                        debug.info('Action : Reduce rule [%s] with %s and goto state %d', prod[-t].str,
+                                   '['+','.join([format_stack_entry(_v.value) for _v in symstack[-plen:]])+']'
+                                   if plen else [],
+    #--! dict and debug
+                                   gotos[statestack[-1-plen]])
+    #--! int and debug
+                                   gtable[gbase + statestack[-1-plen]])
+    #--! end
+
+                    if pool:
+                        sym = pool.pop()
+                        sym.lineno = sym.lexpos = 0
+                        sym.endlineno = sym.endlexpos = None
+                    else:
+                        sym = YaccSymbol()
+                    sym.type = pname
+    #--! debug
+                    if tracking:
+                        if plen:
+                            t1 = symstack[-plen]
+                            sym.lineno = t1.lineno
+                            sym.lexpos = t1.lexpos
+                            t1 = symstack[-1]
+                            sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                            sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                        else:
+                            sym.lineno = getattr(lexer, 'lineno', 0)
+                            sym.lexpos = getattr(lexer, 'lexpos', 0)
+    #--! end
+
+                    if direct:
+                        # The function takes the values of the right hand
+                        # side (passed one by one for the short rules, which
+                        # is faster than building a list) and returns the
+                        # value of the left hand side.  It runs before the
+                        # stacks are changed, so on an error they are left
+                        # as by the other rules.
+                        try:
+                            context.state = state
+                            if plen == 1:
+                                sym.value = func(symstack[-1].value)
+                            elif plen == 2:
+                                sym.value = func(symstack[-2].value, symstack[-1].value)
+                            elif plen == 3:
+                                sym.value = func(symstack[-3].value, symstack[-2].value, symstack[-1].value)
+                            elif plen == 4:
+                                sym.value = func(symstack[-4].value, symstack[-3].value, symstack[-2].value,
+                                                 symstack[-1].value)
+                            elif plen:
+                                sym.value = func(*[_s.value for _s in symstack[-plen:]])
+                            else:
+                                sym.value = func()
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            if plen:
+                                symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+    #--! dict
+                            sym.type = 'error'
+    #--! int
+                            sym.type = ERROR_ID
+    #--! end
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                            continue
+    #--! debug
+                        if debug:
+                            debug.info('Result : %s', format_result(sym.value))
+    #--! end
+                        if plen:
+                            if pool is not None:
+                                for _s in symstack[-plen:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                        ypush(sym)
+    #--! dict
+                        state = gotos[statestack[-1]]
+    #--! int
+                        state = gtable[gbase + statestack[-1]]
+    #--! end
+                        spush(state)
+                        continue
+
+                    # The other functions take the production (p) and set
+                    # p[0].  The stacks are restored if they raise SyntaxError.
+                    sym.value = None
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
+                        pslice.slice = targ
+                        try:
+                            del symstack[-plen:]
+                            context.state = state
+                            func(pslice)
+                            del statestack[-plen:]
+    #--! debug
+                            if debug:
+                                debug.info('Result : %s', format_result(pslice[0]))
+    #--! end
+                            if pool is not None:
+                                for _s in targ[1:]:
+                                    if _s.__class__ is YaccSymbol:
+                                        _s.value = None
+                                        pool.append(_s)
+                            ypush(sym)
+    #--! dict
+                            state = gotos[statestack[-1]]
+    #--! int
+                            state = gtable[gbase + statestack[-1]]
+    #--! end
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            symstack.extend(targ[1:-1])
+                            statestack.pop()
+                            state = statestack[-1]
+    #--! dict
+                            sym.type = 'error'
+    #--! int
+                            sym.type = ERROR_ID
+    #--! end
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    else:
+                        targ = [sym]
+                        pslice.slice = targ
+                        try:
+                            context.state = state
+                            func(pslice)
+    #--! debug
+                            if debug:
+                                debug.info('Result : %s', format_result(pslice[0]))
+    #--! end
+                            ypush(sym)
+    #--! dict
+                            state = gotos[statestack[-1]]
+    #--! int
+                            state = gtable[gbase + statestack[-1]]
+    #--! end
+                            spush(state)
+                        except SyntaxError:
+                            lookaheadstack.append(lookahead)
+                            statestack.pop()
+                            state = statestack[-1]
+    #--! dict
+                            sym.type = 'error'
+    #--! int
+                            sym.type = ERROR_ID
+    #--! end
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = context.errorcount = error_count
+                            context.errorok = False
+                    continue
+
+    #--! not push
+                # Accept
+    #--! push
+                # Accept.  At the end of a flush() the parse goes on.
+                if flushing:
+                    flushing = False
+                    lookahead = None
+                    errorcount = context.errorcount = 0
+                    continue
+    #--! not debug
+                return getattr(symstack[-1], 'value', None)
+    #--! debug
+                result = getattr(symstack[-1], 'value', None)
+                if debug:
+                    debug.info('Done   : Returning %s', format_result(result))
+                    debug.info('PLY: PARSE DEBUG END')
+                return result
+    #--! end
+
+            # Syntax error (see _recover())
+    #--! dict and debug
+            if debug:
+                debug.error('Error  : %s',
+                            ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+    #--! int and debug
+            if debug:
+                debug.error('Error  : %s',
+                            ('%s . %s' % (' '.join([self.symbol_name(xx) for xx in symstack][1:]),
+                                          self.symbol_name(lookahead))).lstrip())
+    #--! debug
+            recovered = self._recover(context, lookahead, state, errorcount, lookaheadstack, lexer, tracking)
+    #--! not debug
+            recovered = self._recover(context, lookahead, state, errorcount, lookaheadstack, lexer)
+    #--! end
+            if recovered is None:
+                return
+            lookahead, state, errorcount = recovered
+'''
+
+# The variants: (name in yacc.py, tags, written as a string literal)
+VARIANTS = [
+    ('push',                 {'dict', 'push'}, False),
+    ('parsedebug',           {'dict', 'debug'}, False),
+    ('parseopt_notrack',     {'dict'}, False),
+    ('int-parsedebug',       {'int', 'debug'}, False),
+    ('int-parseopt_notrack', {'int'}, False),
+    ('module-parse',         {'dict', 'module'}, True),
+]
+
+TAGS = ('dict', 'int', 'debug', 'push', 'module')
+
+_directive = re.compile(r'^\s*#--!\s*(.*?)\s*$')
+
+# The lines of TEMPLATE kept for the given tags
+def generate(tags):
+    env = {tag: tag in tags for tag in TAGS}
+    keep = True
+    lines = []
+    for line in TEMPLATE.splitlines(True):
+        m = _directive.match(line)
+        if m:
+            expr = m.group(1)
+            keep = expr == 'end' or eval(expr, {'__builtins__': {}}, env)
+        elif keep:
+            lines.append(line)
+    return ''.join(lines)
+
+# The text of a variant as it appears in yacc.py
+def variant_text(tags, literal):
+    text = generate(tags)
+    if not literal:
+        return text
+    if '\\' in text or '"""' in text:
+        raise ValueError('The module loop must be written without backslashes or """')
+    return '"""\\\n' + text + '"""\n'
+
+# Replace every variant of the source of yacc.py with the one generated
+def update(source):
+    for name, tags, literal in VARIANTS:
+        pattern = re.compile(r'(^[ \t]*#--! %s-start\n)(.*?)(^[ \t]*#--! %s-end\n)' %
+                             (re.escape(name), re.escape(name)), re.M | re.S)
+        if len(pattern.findall(source)) != 1:
+            raise ValueError(f'yacc.py must have one {name!r} region')
+        text = variant_text(tags, literal)
+        source = pattern.sub(lambda m: m.group(1) + text + m.group(3), source)
+    return source
+
+def main(argv):
+    filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yacc.py')
+    with open(filename, encoding='utf-8') as f:
+        source = f.read()
+    new = update(source)
+    if '--check' in argv:
+        if new != source:
+            sys.stderr.write(f'{filename} is out of date, run ygen.py\n')
+            return 1
+        return 0
+    if new != source:
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(new)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
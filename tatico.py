@@ -1,8 +1,25 @@
-import ply.lex as lex
-import ply.yacc as yacc
 import json
 import sys
 
+from compilador import Compilador
+from ply.lex import TokenRule
+from ply.yacc import direct
+
+# O lexer e o parser são construídos sob demanda pelo compilador (veja
+# compilador.py).  Para usar como biblioteca:
+#
+#     import tatico
+#     tatico.warm_up()                      # opcional: constrói em segundo plano
+#     resultado = tatico.compile_text(texto)
+#
+#     doc = tatico.incremental(texto)       # para editores: só o trecho editado
+#     resultado = doc.editar(inicio, fim, novo)   # é compilado de novo
+compilador = Compilador(sys.modules[__name__], 'tatico')
+compile_text = compilador.compile_text
+incremental = compilador.incremental
+warm_up = compilador.warm_up
+emitir = compilador.emitir
+
 # -----------------------------------------------------------------------------
 # 1. ANÁLISE LÉXICA
 # Definição dos tokens que nossa linguagem entende
@@ -36,37 +53,24 @@ t_PONTO_VIRGULA = r';'
 t_ABRE_PAR = r'\('
 t_FECHA_PAR = r'\)'
 
-# Ignorar espaços e tabs
-t_ignore = " \t"
+# Ignorar espaços, tabs e quebras de linha (as linhas só são contadas quando
+# uma mensagem de erro precisa da posição, veja Compilador.erro())
+t_ignore = " \t\n"
 
 # Regex para identificar a formação tática (Ex: 4-4-2)
 def t_CODIGO_FORMACAO(t):
     r'\d-\d-\d(-\d)?'
     return t
 
-# Regex para nomes (jogadores ou time)
-def t_NOME(t):
-    r'[a-zA-Z_\u00C0-\u00FF][a-zA-Z0-9_\-\u00C0-\u00FF]*'
-    # Verifica se é uma palavra reservada (TIME, GOL, etc.)
-    t.type = reserved.get(t.value, 'NOME') 
-    return t
+# Regex para nomes (jogadores ou time).  As palavras reservadas (TIME, GOL,
+# etc.) recebem o tipo indicado em reserved.
+t_NOME = TokenRule(r'[a-zA-Z_\u00C0-\u00FF][a-zA-Z0-9_\-\u00C0-\u00FF]*', keywords=reserved)
 
 # Regex para números (camisa)
-def t_NUMERO(t):
-    r'\d+'
-    t.value = int(t.value)
-    return t
-
-def t_newline(t):
-    r'\n+'
-    t.lexer.lineno += t.value.count("\n")
+t_NUMERO = TokenRule(r'\d+', convert=int)
 
 def t_error(t):
-    print(f"Caractere ilegal '{t.value[0]}'")
-    t.lexer.skip(1)
-
-# Constrói o lexer
-lexer = lex.lex()
+    compilador.erro_lexico(t)
 
 # -----------------------------------------------------------------------------
 # 2. ESTRUTURA DE DADOS (MEMÓRIA SEMÂNTICA)
@@ -86,12 +90,19 @@ def novo_time_struct():
 # Memória Global
 match_data = {
     'casa': novo_time_struct(),
-    'fora': novo_time_struct()
+    'fora': novo_time_struct(),
+    'descartado': False # O bloco teve um erro de sintaxe (veja p_command_error)
 }
 
 def limpar_dados():
     match_data['casa'] = novo_time_struct()
     match_data['fora'] = novo_time_struct()
+    match_data['descartado'] = False
+
+# Memória semântica atual (a compilação incremental compara com a memória
+# limpa para saber se um bloco terminou; veja compilador.py)
+def dados():
+    return match_data
 
 # -----------------------------------------------------------------------------
 # 3. ANÁLISE SINTÁTICA E SEMÂNTICA
@@ -107,41 +118,46 @@ def p_statement_list(p):
 # --- NOVA REGRA DO STOP ---
 def p_command_stop(p):
     'command : STOP'
-    print("\nEncerrando Analisador Tático... Até logo!")
-    sys.exit() # Encerra o script Python
+    emitir("\nEncerrando Analisador Tático... Até logo!")
+    compilador.resultado['parar'] = True
 
-def p_nome_composto_simples(p):
+@direct
+def p_nome_composto_simples(nome):
     'nome_composto : NOME'
-    p[0] = p[1]
+    return nome
 
-def p_nome_composto_recursivo(p):
+@direct
+def p_nome_composto_recursivo(nome_composto, nome):
     'nome_composto : nome_composto NOME'
-    # Pega o nome acumulado (p[1]) e junta com o novo (p[2]) usando espaço
-    p[0] = f"{p[1]} {p[2]}"
+    # Pega o nome acumulado e junta com o novo usando espaço
+    return f"{nome_composto} {nome}"
 
-# Comando 1: Definir Nome do Time
+# Comando 1: Definir Nome do Time.  Depois de um erro de sintaxe, o TIME
+# começa um bloco novo.
 def p_command_time_simples(p):
     'command : TIME nome_composto'
+    if match_data['descartado']: limpar_dados()
     match_data['casa']['nome'] = p[2]
     match_data['casa']['ativo'] = True
     # Garante que o "fora" está desligado
     match_data['fora']['ativo'] = False 
-    print(f"-> Time definido: {p[2]}")
+    emitir(f"-> Time definido: {p[2]}")
 
 def p_command_time_duplo(p):
     'command : TIME nome_composto PONTO_VIRGULA nome_composto'
+    if match_data['descartado']: limpar_dados()
     match_data['casa']['nome'] = p[2]
     match_data['casa']['ativo'] = True
     match_data['fora']['nome'] = p[4]
     match_data['fora']['ativo'] = True
-    print(f"-> Confronto definido: {p[2]} (Casa) vs {p[4]} (Fora)")
+    emitir(f"-> Confronto definido: {p[2]} (Casa) vs {p[4]} (Fora)")
 
 # Comando 2: Definir Formação (Ação Semântica: Parsear a string "4-4-2")
 def p_command_formacao_simples(p):
     'command : FORMACAO CODIGO_FORMACAO'
     partes = p[2].split('-')
     match_data['casa']['formacao'] = [int(x) for x in partes]
-    print(f"-> Tática: {p[2]}")
+    emitir(f"-> Tática: {p[2]}")
     
 def p_command_formacao_duplo(p):
     'command : FORMACAO CODIGO_FORMACAO PONTO_VIRGULA CODIGO_FORMACAO'
@@ -151,7 +167,7 @@ def p_command_formacao_duplo(p):
     # Fora
     partes_fora = p[4].split('-')
     match_data['fora']['formacao'] = [int(x) for x in partes_fora]
-    print(f"-> Táticas: {p[2]} vs {p[4]}")
+    emitir(f"-> Táticas: {p[2]} vs {p[4]}")
 
 
 def processar_lista(lista, time_key, posicao):
@@ -172,19 +188,20 @@ def p_command_posicao_duplo(p):
 
 # Regra Auxiliar: Lista Recursiva de Jogadores
 # Ex: 1 (Rossi), 2 (Varela)
-def p_lista_jogadores(p):
+@direct
+def p_lista_jogadores(jogador, virgula=None, resto=None):
     '''lista_jogadores : jogador
                        | jogador VIRGULA lista_jogadores'''
-    if len(p) == 2:
-        p[0] = [p[1]] # Retorna lista com 1 jogador
-    else:
-        p[0] = [p[1]] + p[3] # Concatena jogador atual com o resto da lista
+    if resto is None:
+        return [jogador] # Retorna lista com 1 jogador
+    return [jogador] + resto # Concatena jogador atual com o resto da lista
 
 # Regra Auxiliar: Estrutura de um único jogador
 # Ex: 1 (Rossi)
-def p_jogador(p):
+@direct
+def p_jogador(numero, abre_par, nome, fecha_par):
     'jogador : NUMERO ABRE_PAR nome_composto FECHA_PAR'
-    p[0] = (p[1], p[3]) # Retorna tupla (Numero, Nome)
+    return (numero, nome) # Retorna tupla (Numero, Nome)
 
 # Comando 4: VALIDAR (Aqui acontece a mágica Semântica pedida no trabalho)
 def validar_time(dados, label):
@@ -192,12 +209,12 @@ def validar_time(dados, label):
     if not dados['ativo']: 
         return True 
         
-    print(f"\n--- Validando {label}: {dados['nome']} ---")
+    emitir(f"\n--- Validando {label}: {dados['nome']} ---")
     erros = []
     fmt = dados['formacao']
     
     if not fmt:
-        print(f"ERRO: Formação não definida para {label}.")
+        compilador.erro(f"ERRO: Formação não definida para {label}.")
         return False
 
     qtd_def = len(dados['elenco']['DEF'])
@@ -220,14 +237,26 @@ def validar_time(dados, label):
         erros.append("Numeração duplicada detectada")
 
     if not erros:
-        print("-> OK! Time válido.")
+        emitir("-> OK! Time válido.")
         return True
     else:
-        for e in erros: print(f"-> [X] {e}")
+        for e in erros: compilador.erro(f"-> [X] {e}")
         return False
 
 def p_command_validar(p):
     'command : VALIDAR'
+
+    # Um bloco com erro de sintaxe não é validado nem traduzido
+    if match_data['descartado']:
+        emitir("-> Bloco descartado por erro de sintaxe: nada a validar.")
+        limpar_dados()
+        return
+
+    # Sem TIME nem FORMACAO não há o que traduzir
+    if not match_data['casa']['ativo'] and match_data['casa']['formacao'] is None:
+        emitir("Aviso: Nenhum time para validar.")
+        limpar_dados()
+        return
     
     # --- ETAPA 1: VALIDAÇÃO (O que você já tinha) ---
     erros = []
@@ -243,7 +272,7 @@ def p_command_validar(p):
     # --- ETAPA 2: GERAÇÃO DE CÓDIGO (A TRADUÇÃO) ---
     # Se não houver erros, nós TRADUZIMOS a entrada para JSON
     if ok_casa and ok_fora:
-        print("\n--- INÍCIO DA TRADUÇÃO (OUTPUT) ---\n")
+        emitir("\n--- INÍCIO DA TRADUÇÃO (OUTPUT) ---\n")
         
         # Montamos o objeto final de saída (A estrutura transformada)
         saida_compilada = {
@@ -267,39 +296,49 @@ def p_command_validar(p):
         # Imprime o JSON formatado
         # Isso é equivalente a gerar o código de montagem ou resultado final
         json_output = json.dumps(saida_compilada, indent=4, ensure_ascii=False)
-        print(json_output)
+        emitir(json_output)
+        compilador.resultado['saidas'].append(saida_compilada)
         
-        print("\n--- FIM DA TRADUÇÃO ---")
+        emitir("\n--- FIM DA TRADUÇÃO ---")
         
     else:
-        print("ERRO DE COMPILAÇÃO: As regras semânticas foram violadas.")
+        compilador.erro("ERRO DE COMPILAÇÃO: As regras semânticas foram violadas.")
     
     limpar_dados()
 
+# Recuperação de erros: o comando com erro de sintaxe é descartado até o
+# começo do próximo comando (TIME, VALIDAR, etc.: cada linha começa com
+# um), e a análise continua dali.  O time do bloco é limpo e o bloco fica
+# descartado até o VALIDAR ou o próximo TIME.  O bloco já é marcado em
+# p_error(): um comando completo antes do erro (FORMACAO 4-4-2 em
+# "FORMACAO 4-4-2 ; ;") é reduzido antes desta regra.
+def p_command_error(p):
+    'command : error'
+    limpar_dados()
+    match_data['descartado'] = True
+    compilador.recuperar(p)
+
 def p_error(p):
+    match_data['descartado'] = True
     if p:
-        print(f"Erro de sintaxe no token '{p.value}'")
+        compilador.erro_sintaxe(f"Erro de sintaxe no token '{p.value}'", p)
     else:
-        print("Erro de sintaxe no final do arquivo")
-
-# Build the parser
-parser = yacc.yacc()
+        compilador.erro_sintaxe("Erro de sintaxe no final do arquivo")
 
 # -----------------------------------------------------------------------------
 # EXECUÇÃO INTERATIVA
 # -----------------------------------------------------------------------------
-print("Analista Tático v1.0 (Digite as linhas do time e termine com VALIDAR)")
-print("Exemplo:\nTIME Fla\nFORMACAO 4-4-2\nGOL: 1(Rossi)\nDEF: 2(Varela), 3(Leo)\nVALIDAR\n")
-
-buffer_texto = ""
-while True:
-    try:
-        s = input('tatica > ')
-    except EOFError:
-        break
-    if not s: continue
-    
-    # Acumula as linhas até encontrar "VALIDAR" para processar o bloco (opcional, 
-    # mas facilita colar o texto inteiro) ou processa linha a linha se a gramática permitir.
-    # Como nossa gramática aceita 'statement command', podemos passar linha a linha.
-    parser.parse(s)
\ No newline at end of file
+def main():
+    # Arquivos passados na linha de comando são compilados sem o modo interativo
+    if len(sys.argv) > 1:
+        compilador.compile_files(sys.argv[1:])
+        return
+
+    # As tabelas são construídas enquanto o usuário lê o banner
+    warm_up()
+    print("Analista Tático v1.0 (Digite as linhas do time e termine com VALIDAR)")
+    print("Exemplo:\nTIME Fla\nFORMACAO 4-4-2\nGOL: 1(Rossi)\nDEF: 2(Varela), 3(Leo)\nVALIDAR\n")
+    compilador.repl('tatica > ')
+
+if __name__ == '__main__':
+    main()
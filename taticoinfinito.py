@@ -1,8 +1,17 @@
-import ply.lex as lex
-import ply.yacc as yacc
 import json
 import sys
 
+from compilador import Compilador
+from ply.lex import TokenRule
+from ply.yacc import direct
+
+# Lexer e parser construídos sob demanda (veja compilador.py)
+compilador = Compilador(sys.modules[__name__], 'taticoinfinito')
+compile_text = compilador.compile_text
+incremental = compilador.incremental
+warm_up = compilador.warm_up
+emitir = compilador.emitir
+
 # -----------------------------------------------------------------------------
 # 1. ANÁLISE LÉXICA
 # -----------------------------------------------------------------------------
@@ -25,31 +34,18 @@ t_VIRGULA = r','
 t_PONTO_VIRGULA = r';'
 t_ABRE_PAR = r'\('
 t_FECHA_PAR = r'\)'
-t_ignore = " \t"
+t_ignore = " \t\n"
 
 def t_CODIGO_FORMACAO(t):
     r'\d+-\d+-\d+(-\d+)?'
     return t
 
-def t_NOME(t):
-    r'[a-zA-Z_\u00C0-\u00FF][a-zA-Z0-9_\-\u00C0-\u00FF]*'
-    t.type = reserved.get(t.value, 'NOME') 
-    return t
-
-def t_NUMERO(t):
-    r'\d+'
-    t.value = int(t.value)
-    return t
+t_NOME = TokenRule(r'[a-zA-Z_\u00C0-\u00FF][a-zA-Z0-9_\-\u00C0-\u00FF]*', keywords=reserved)
 
-def t_newline(t):
-    r'\n+'
-    t.lexer.lineno += t.value.count("\n")
+t_NUMERO = TokenRule(r'\d+', convert=int)
 
 def t_error(t):
-    print(f"Caractere ilegal '{t.value[0]}'")
-    t.lexer.skip(1)
-
-lexer = lex.lex()
+    compilador.erro_lexico(t)
 
 # -----------------------------------------------------------------------------
 # 2. ESTRUTURA DE DADOS (LISTA DINÂMICA)
@@ -57,6 +53,8 @@ lexer = lex.lex()
 
 # Nossa memória agora é uma lista de objetos de times
 teams_db = []
+# O bloco teve um erro de sintaxe (veja p_command_error)
+bloco_descartado = False
 
 def criar_time(nome):
     return {
@@ -67,8 +65,13 @@ def criar_time(nome):
     }
 
 def limpar_dados():
-    global teams_db
+    global teams_db, bloco_descartado
     teams_db = []
+    bloco_descartado = False
+
+# Memória semântica atual (para a compilação incremental, veja compilador.py)
+def dados():
+    return teams_db, bloco_descartado
 
 # -----------------------------------------------------------------------------
 # 3. ANÁLISE SINTÁTICA (GRAMÁTICA RECURSIVA PARA LISTAS)
@@ -81,17 +84,19 @@ def p_statement_list(p):
 
 def p_command_stop(p):
     'command : STOP'
-    print("\nEncerrando Compilador... Até logo!")
-    sys.exit()
+    emitir("\nEncerrando Compilador... Até logo!")
+    compilador.resultado['parar'] = True
 
 # --- REGRAS AUXILIARES DE NOMES ---
-def p_nome_composto_simples(p):
+@direct
+def p_nome_composto_simples(nome):
     'nome_composto : NOME'
-    p[0] = p[1]
+    return nome
 
-def p_nome_composto_recursivo(p):
+@direct
+def p_nome_composto_recursivo(nome_composto, nome):
     'nome_composto : nome_composto NOME'
-    p[0] = f"{p[1]} {p[2]}"
+    return f"{nome_composto} {nome}"
 
 # --- REGRAS DE "SUPER LISTAS" (Separadas por ;) ---
 
@@ -124,55 +129,60 @@ def p_super_lista_jogadores_multi(p):
     p[0] = p[1] + [p[3]] # Concatena a nova lista de jogadores
 
 # Regra base de lista de jogadores (Separada por vírgula)
-def p_lista_jogadores(p):
+@direct
+def p_lista_jogadores(jogador, virgula=None, resto=None):
     '''lista_jogadores : jogador
                        | jogador VIRGULA lista_jogadores'''
-    if len(p) == 2:
-        p[0] = [p[1]]
-    else:
-        p[0] = [p[1]] + p[3]
+    if resto is None:
+        return [jogador]
+    return [jogador] + resto
 
-def p_jogador(p):
+@direct
+def p_jogador(numero, abre_par, nome, fecha_par):
     'jogador : NUMERO ABRE_PAR nome_composto FECHA_PAR'
-    p[0] = (p[1], p[3])
+    return (numero, nome)
 
 # --- COMANDOS PRINCIPAIS ---
 
-# Comando TIME: Inicializa N times
+# Comando TIME: Inicializa N times (e começa um bloco novo depois de um erro
+# de sintaxe)
 def p_command_time(p):
     'command : TIME lista_nomes_times'
-    global teams_db
+    global teams_db, bloco_descartado
     names = p[2] # Recebe lista ['Fla', 'Flu', 'Vasco']
     
     teams_db = [] # Reseta DB
+    bloco_descartado = False
     for n in names:
         teams_db.append(criar_time(n))
         
-    print(f"-> Inicializando {len(teams_db)} times: {', '.join(names)}")
+    emitir(f"-> Inicializando {len(teams_db)} times: {', '.join(names)}")
 
 # Comando FORMACAO: Distribui táticas para os N times
 def p_command_formacao(p):
     'command : FORMACAO lista_formacoes'
     codes = p[2] # Recebe lista ['4-4-2', '4-3-3'...]
+    if bloco_descartado: return
     
     if len(codes) != len(teams_db):
-        print(f"ERRO SEMÂNTICO: Você definiu {len(teams_db)} times, mas forneceu {len(codes)} formações.")
+        compilador.erro(f"ERRO SEMÂNTICO: Você definiu {len(teams_db)} times, mas forneceu {len(codes)} formações.")
         return
 
     for i, code in enumerate(codes):
         partes = code.split('-')
         teams_db[i]['formacao'] = [int(x) for x in partes]
     
-    print(f"-> Táticas atribuídas para {len(teams_db)} times.")
+    emitir(f"-> Táticas atribuídas para {len(teams_db)} times.")
 
 # Comando POSICAO: Distribui jogadores para os N times
 def p_command_posicao(p):
     'command : POSICAO DOIS_PONTOS super_lista_jogadores'
     posicao = p[1] # GOL, DEF...
     listas_recebidas = p[3] # Lista de listas
+    if bloco_descartado: return
     
     if len(listas_recebidas) != len(teams_db):
-        print(f"ERRO SEMÂNTICO ({posicao}): Esperado dados para {len(teams_db)} times, recebido para {len(listas_recebidas)}.")
+        compilador.erro(f"ERRO SEMÂNTICO ({posicao}): Esperado dados para {len(teams_db)} times, recebido para {len(listas_recebidas)}.")
         return
 
     # Distribui cada lista para seu respectivo time
@@ -216,11 +226,16 @@ def validar_unico(dados):
 def p_command_validar(p):
     'command : VALIDAR'
     
+    if bloco_descartado:
+        emitir("Aviso: Bloco descartado por erro de sintaxe, nada a validar.")
+        limpar_dados()
+        return
+
     if not teams_db:
-        print("Aviso: Nenhum time para validar.")
+        emitir("Aviso: Nenhum time para validar.")
         return
 
-    print(f"\n--- PROCESSANDO {len(teams_db)} TIMES ---")
+    emitir(f"\n--- PROCESSANDO {len(teams_db)} TIMES ---")
     
     todos_erros = []
     
@@ -230,13 +245,13 @@ def p_command_validar(p):
         todos_erros.extend(erros_time)
     
     if todos_erros:
-        print("ERROS DE COMPILAÇÃO ENCONTRADOS:")
+        emitir("ERROS DE COMPILAÇÃO ENCONTRADOS:")
         for e in todos_erros:
-            print(f" [X] {e}")
-        print("Falha na tradução. Corrija os erros acima.")
+            compilador.erro(f" [X] {e}")
+        emitir("Falha na tradução. Corrija os erros acima.")
     else:
         # 2. Tradução para JSON (Formato Campeonato)
-        print("Validação OK! Gerando saída traduzida (JSON)...\n")
+        emitir("Validação OK! Gerando saída traduzida (JSON)...\n")
         
         torneio_output = {
             "tournament_data": {
@@ -253,28 +268,46 @@ def p_command_validar(p):
             }
             torneio_output["tournament_data"]["teams"].append(team_obj)
             
-        print(json.dumps(torneio_output, indent=4, ensure_ascii=False))
-        print("\n--- FIM DA TRADUÇÃO ---")
+        emitir(json.dumps(torneio_output, indent=4, ensure_ascii=False))
+        compilador.resultado['saidas'].append(torneio_output)
+        emitir("\n--- FIM DA TRADUÇÃO ---")
     
     limpar_dados()
 
-def p_error(p):
-    if p: print(f"Erro de sintaxe no token '{p.value}'")
-    else: print("Erro no fim do arquivo")
+# --- RECUPERAÇÃO DE ERROS ---
+
+# O comando com erro de sintaxe é descartado até o começo do próximo comando
+# (cada linha começa com um), e a análise continua dali.  Os times do bloco
+# são descartados até o VALIDAR ou o próximo TIME.  O bloco já é marcado em
+# p_error(), para os comandos completos antes do erro, reduzidos antes desta
+# regra.
+def p_command_error(p):
+    'command : error'
+    global bloco_descartado
+    limpar_dados()
+    bloco_descartado = True
+    compilador.recuperar(p)
 
-parser = yacc.yacc()
+def p_error(p):
+    global bloco_descartado
+    bloco_descartado = True
+    if p: compilador.erro_sintaxe(f"Erro de sintaxe no token '{p.value}'", p)
+    else: compilador.erro_sintaxe("Erro no fim do arquivo")
 
 # -----------------------------------------------------------------------------
 # LOOP PRINCIPAL
 # -----------------------------------------------------------------------------
-print("Compilador de Campeonatos v3.0 (Multi-Times)")
-print("Sintaxe: DADOS_TIME_1 ; DADOS_TIME_2 ; DADOS_TIME_3 ...")
-print("Digite STOP para sair.")
-
-while True:
-    try:
-        s = input('>>> ')
-    except EOFError:
-        break
-    if not s: continue
-    parser.parse(s)
\ No newline at end of file
+def main():
+    # Arquivos passados na linha de comando são compilados sem o modo interativo
+    if len(sys.argv) > 1:
+        compilador.compile_files(sys.argv[1:])
+        return
+
+    warm_up()
+    print("Compilador de Campeonatos v3.0 (Multi-Times)")
+    print("Sintaxe: DADOS_TIME_1 ; DADOS_TIME_2 ; DADOS_TIME_3 ...")
+    print("Digite STOP para sair.")
+    compilador.repl('>>> ')
+
+if __name__ == '__main__':
+    main()
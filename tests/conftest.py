@@ -0,0 +1,40 @@
+# -----------------------------------------------------------------------------
+# tests/conftest.py
+#
+# Configuração comum dos testes: a raiz do projeto no sys.path (para ply,
+# tatico.py e compilador.py) e a fixture carregar, que grava o código de um
+# módulo (uma gramática, por exemplo) em um diretório temporário e o importa.
+# -----------------------------------------------------------------------------
+
+import importlib.util
+import itertools
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+_numeros = itertools.count()
+
+@pytest.fixture
+def carregar(tmp_path):
+    modulos = []
+
+    # Cada versão do código é um módulo de nome novo, para que o ply veja as
+    # funções do código dado e não as de uma versão anterior
+    def carregar(fonte, nome='gramatica'):
+        nome = f'{nome}_{next(_numeros)}'
+        caminho = tmp_path / f'{nome}.py'
+        caminho.write_text(fonte, encoding='utf-8')
+        spec = importlib.util.spec_from_file_location(nome, caminho)
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules[nome] = modulo
+        modulos.append(nome)
+        spec.loader.exec_module(modulo)
+        return modulo
+
+    yield carregar
+    for nome in modulos:
+        sys.modules.pop(nome, None)
@@ -0,0 +1,153 @@
+# -----------------------------------------------------------------------------
+# tests/test_alimentacao.py
+#
+# Análise de uma entrada que chega aos poucos: parser.feed(), flush() e
+# end(), parser.push_parse() e Compilador.alimentar().  O resultado deve ser
+# o da análise da entrada inteira, como quer que ela seja cortada.
+# -----------------------------------------------------------------------------
+
+import pytest
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+
+# Atribuições 'nome = numero' sem separador: uma atribuição só é reduzida
+# quando o token seguinte (ou o fim da entrada) é lido
+GRAMATICA = '''
+tokens = ('NOME', 'NUMERO', 'IGUAL')
+
+t_NOME = r'[a-z]+'
+t_NUMERO = r'\\d+'
+t_IGUAL = r'='
+t_ignore = ' \\n'
+
+def t_error(t):
+    t.lexer.skip(1)
+
+feitas = []
+erros = []
+
+def p_lista(p):
+    \'\'\'lista : lista atrib
+             | atrib\'\'\'
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_atrib(p):
+    'atrib : NOME IGUAL NUMERO'
+    p[0] = (p[1], int(p[3]), p.lexpos(3))
+    feitas.append(p[1])
+
+def p_error(p):
+    erros.append(p and p.value)
+'''
+
+TEXTO = 'a = 1\nbc = 23\n  d = 456 e\n= 7\n'
+
+@pytest.fixture
+def gramatica(carregar):
+    return carregar(GRAMATICA)
+
+def construir(modulo):
+    lexer = lex.lex(module=modulo, lextab=None, errorlog=yacc.NullLogger())
+    parser = yacc.yacc(module=modulo, tabfile=None, errorlog=yacc.NullLogger())
+    return lexer, parser
+
+@pytest.mark.parametrize('tamanho', [1, 2, 3, 7, len(TEXTO)])
+def test_pedacos(gramatica, tamanho):
+    lexer, parser = construir(gramatica)
+    esperado = parser.parse(TEXTO, lexer.clone())
+    assert [posicao for _, _, posicao in esperado] == [4, 11, 20, 28]
+    for i in range(0, len(TEXTO), tamanho):
+        parser.feed(TEXTO[i:i + tamanho], lexer.clone() if i == 0 else None)
+    assert parser.end() == esperado
+
+def test_tokens(gramatica):
+    lexer, parser = construir(gramatica)
+    esperado = parser.parse(TEXTO, lexer.clone())
+    lexer.input(TEXTO)
+    tokens = list(lexer)
+    parser.feed(tokens[:4])
+    parser.feed(iter(tokens[4:]))
+    assert parser.end() == esperado
+
+def test_end_e_nova_analise(gramatica):
+    lexer, parser = construir(gramatica)
+    assert parser.end() is None
+    parser.feed('a = 1\n', lexer.clone())
+    assert parser.end() == [('a', 1, 4)]
+    parser.feed('b = 2', lexer.clone())
+    assert parser.end() == [('b', 2, 4)]
+
+def test_flush(gramatica):
+    lexer, parser = construir(gramatica)
+    parser.feed('a = 1\n', lexer.clone())
+    assert gramatica.feitas == []
+    parser.flush()
+    assert gramatica.feitas == ['a']
+    # Um comando incompleto espera pelo resto
+    parser.feed('b =\n')
+    parser.flush()
+    assert gramatica.feitas == ['a']
+    parser.feed('2\n')
+    parser.flush()
+    assert gramatica.feitas == ['a', 'b']
+    assert parser.end() == [('a', 1, 4), ('b', 2, 10)]
+    assert gramatica.erros == []
+
+# Depois de um erro, flush() encerra a recuperação: a análise recomeça com
+# a próxima entrada, cujos erros são informados
+def test_flush_depois_de_erro(gramatica):
+    lexer, parser = construir(gramatica)
+    parser.feed('a = = 1\n', lexer.clone())
+    parser.flush()
+    assert gramatica.erros == ['=']
+    parser.feed('b 2\nc = 3\n')
+    parser.flush()
+    assert gramatica.erros == ['=', '2']
+    parser.feed('d = 4\n')
+    assert parser.end() == [('c', 3, 16), ('d', 4, 22)]
+    assert gramatica.feitas == ['c', 'd']
+
+def test_push_parse(gramatica):
+    lexer, parser = construir(gramatica)
+    esperado = parser.parse(TEXTO, lexer.clone())
+    analises = [parser.push_parse(lexer.clone()) for _ in range(3)]
+    # As análises intercaladas, cada uma com o seu lexer
+    for i in range(0, len(TEXTO), 5):
+        for analise in analises:
+            analise.feed(TEXTO[i:i + 5])
+    assert [analise.end() for analise in analises] == [esperado] * 3
+    assert parser.pushing is None
+
+PARTIDA = '''TIME Flamengo
+FORMACAO 4-4-2
+GOL: 1(Rossi)
+DEF: 2(Varela), 3(Leo), 4(Ortiz), 6(Ayrton)
+MEI: 5(Pulgar), 8(Gerson), 7(Luiz), 14(Arrascaeta)
+ATA: 9(Pedro), 27(BH)
+VALIDAR
+'''
+
+# Partidas cortadas no meio das linhas e dos tokens, uma delas com erro
+def test_compilador_alimentar():
+    texto = PARTIDA + PARTIDA.replace('DEF:', 'DEF') + PARTIDA
+    esperado = tatico.compile_text(texto)
+    mensagens = []
+    saidas = []
+    for i in range(0, len(texto), 37):
+        resultado = tatico.compilador.alimentar(texto[i:i + 37])
+        mensagens += resultado['mensagens']
+        saidas += resultado['saidas']
+    resultado = tatico.compilador.terminar()
+    assert mensagens + resultado['mensagens'] == esperado['mensagens']
+    assert saidas + resultado['saidas'] == esperado['saidas']
+    assert len(saidas + resultado['saidas']) == 2
+
+# No modo interativo cada linha é compilada assim que termina
+def test_compilador_linha_a_linha():
+    saidas = []
+    for linha in PARTIDA.splitlines():
+        saidas.append(tatico.compilador.alimentar(linha + '\n', fim_de_linha=True)['saidas'])
+    assert saidas[:-1] == [[]] * 6 and len(saidas[-1]) == 1
+    assert tatico.compilador.terminar()['mensagens'] == []
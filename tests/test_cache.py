@@ -0,0 +1,205 @@
+# -----------------------------------------------------------------------------
+# tests/test_cache.py
+#
+# Invalidação dos caches de tabelas: uma mudança que altera o resultado da
+# construção deve refazer o cache, e o cache deve ser usado quando nada mudou.
+# -----------------------------------------------------------------------------
+
+import os
+import stat
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+# Gramática com duas regras cujas funções devolvem o próprio nome; {um} e
+# {dois} são os nomes das funções, nas regras 'x : A' e 'y : B'
+GRAMATICA = '''
+tokens = ('A', 'B')
+
+t_A = r'a'
+t_B = r'b'
+t_ignore = ' '
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def p_s(p):
+    's : x y'
+    p[0] = p[1] + ' ' + p[2]
+
+def {um}(p):
+    'x : A'
+    p[0] = '{um}'
+
+def {dois}(p):
+    'y : B'
+    p[0] = '{dois}'
+
+def p_error(p):
+    pass
+'''
+
+def analisar(modulo, tabfile):
+    lexer = lex.lex(module=modulo, lextab=None, errorlog=yacc.NullLogger())
+    parser = yacc.yacc(module=modulo, tabfile=str(tabfile), errorlog=yacc.NullLogger())
+    return parser.parse('a b', lexer)
+
+def test_cache_usado_sem_mudancas(carregar, tmp_path):
+    tabfile = tmp_path / 'parser.tab'
+    fonte = GRAMATICA.format(um='p_x', dois='p_y')
+    assert analisar(carregar(fonte), tabfile) == 'p_x p_y'
+    gravado = os.stat(tabfile).st_mtime_ns
+    assert analisar(carregar(fonte), tabfile) == 'p_x p_y'
+    assert os.stat(tabfile).st_mtime_ns == gravado
+
+# O cache é gravado com o modo de um arquivo novo (0o666 menos a umask),
+# para que outros usuários da gramática possam lê-lo
+def modo_de_arquivo_novo():
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def test_cache_legivel_por_outros(carregar, tmp_path):
+    tabfile = tmp_path / 'parser.tab'
+    analisar(carregar(GRAMATICA.format(um='p_x', dois='p_y')), tabfile)
+    assert stat.S_IMODE(os.stat(tabfile).st_mode) == modo_de_arquivo_novo()
+
+def test_cache_refeito_ao_trocar_os_nomes(carregar, tmp_path):
+    tabfile = tmp_path / 'parser.tab'
+    assert analisar(carregar(GRAMATICA.format(um='p_x', dois='p_y')), tabfile) == 'p_x p_y'
+    # As mesmas regras na mesma ordem, com os nomes das funções trocados
+    assert analisar(carregar(GRAMATICA.format(um='p_y', dois='p_x')), tabfile) == 'p_y p_x'
+
+def test_cache_refeito_ao_renomear(carregar, tmp_path):
+    tabfile = tmp_path / 'parser.tab'
+    assert analisar(carregar(GRAMATICA.format(um='p_x', dois='p_y')), tabfile) == 'p_x p_y'
+    assert analisar(carregar(GRAMATICA.format(um='p_x_novo', dois='p_y')), tabfile) == 'p_x_novo p_y'
+
+# Lexer com duas regras de primeiros caracteres disjuntos, cuja ordem segue a
+# amostra dada a lex(profile=...)
+LEXER = '''
+tokens = ('NUMERO', 'NOME', 'MAIS')
+
+t_MAIS = r'\\+'
+t_ignore = ' '
+
+def t_NUMERO(t):
+    r'\\d+'
+    return t
+
+def t_NOME(t):
+    r'[a-z]+'
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+'''
+
+def ordem(modulo, lextab, amostra):
+    lexer = lex.lex(module=modulo, lextab=str(lextab), profile=amostra, errorlog=yacc.NullLogger())
+    return lexer.lexstaterenames['INITIAL'][0]
+
+def test_cache_do_lexer_refeito_com_outra_amostra(carregar, tmp_path):
+    modulo = carregar(LEXER)
+    lextab = tmp_path / 'lexer.tab'
+    assert ordem(modulo, lextab, '1 2 3 4 a') == [None, 't_NUMERO', 't_NOME', 't_MAIS']
+    assert ordem(modulo, lextab, 'a b c d 1') == [None, 't_NOME', 't_NUMERO', 't_MAIS']
+    # Uma lista de textos vale pelo mesmo texto, e a mesma amostra usa o cache
+    gravado = os.stat(lextab).st_mtime_ns
+    assert ordem(modulo, lextab, iter(['a b c d 1'])) == [None, 't_NOME', 't_NUMERO', 't_MAIS']
+    assert os.stat(lextab).st_mtime_ns == gravado
+
+def test_cache_do_lexer_legivel_por_outros(carregar, tmp_path):
+    lextab = tmp_path / 'lexer.tab'
+    ordem(carregar(LEXER), lextab, '1 a')
+    assert stat.S_IMODE(os.stat(lextab).st_mode) == modo_de_arquivo_novo()
+
+# Gramática de um Compilador (compilador.py): cada 'NOME = NUMERO' emite o
+# nome e o valor.  {numero} é a expressão regular de NUMERO e {regra} a
+# regra da atribuição.
+COMPILADOR = '''
+import sys
+from compilador import Compilador
+
+compilador = Compilador(sys.modules[__name__], 'gramatica')
+
+tokens = ('NOME', 'NUMERO', 'IGUAL')
+
+t_NOME = r'[a-z]+'
+t_NUMERO = r'{numero}'
+t_IGUAL = r'='
+t_ignore = ' \\n'
+
+def t_error(t):
+    compilador.erro_lexico(t)
+
+def limpar_dados():
+    pass
+
+def dados():
+    return None
+
+def p_lista(p):
+    \'\'\'lista : lista atrib
+             | atrib\'\'\'
+
+def p_atrib(p):
+    '{regra}'
+    compilador.emitir(f'{{p[1]}} {{p[len(p) - 1]}}')
+
+def p_error(p):
+    compilador.erro_sintaxe(f"Erro de sintaxe no token '{{p and p.value}}'", p)
+'''
+
+def compilador(carregar, numero=r'\d+', regra='atrib : NOME IGUAL NUMERO'):
+    return carregar(COMPILADOR.format(numero=numero, regra=regra)).compilador
+
+# Os arquivos do cache do Compilador e a data de cada um
+def caches(tmp_path):
+    return {f.name: f.stat().st_mtime_ns for f in (tmp_path / '__pycache__').glob('gramatica.*')}
+
+def test_compilador_constroi_na_primeira_compilacao(carregar, tmp_path):
+    c = compilador(carregar)
+    assert c.parser is None and not (tmp_path / '__pycache__').exists()
+    assert c.compile_text('a = 1 b = 2')['mensagens'] == ['a 1', 'b 2']
+    assert c.parser is not None
+    assert len(caches(tmp_path)) == 2
+
+def test_compilador_warm_up(carregar, tmp_path):
+    c = compilador(carregar)
+    c.warm_up().join()
+    assert c.parser is not None
+    assert c.warm_up() is not None
+    assert c.compile_text('a = 1')['mensagens'] == ['a 1']
+
+def test_compilador_usa_o_cache(carregar, tmp_path):
+    compilador(carregar).construir()
+    gravados = caches(tmp_path)
+    assert compilador(carregar).compile_text('a = 1')['mensagens'] == ['a 1']
+    assert caches(tmp_path) == gravados
+
+def test_compilador_refaz_o_cache_da_gramatica(carregar, tmp_path):
+    compilador(carregar).construir()
+    gravados = caches(tmp_path)
+    c = compilador(carregar, regra='atrib : NOME IGUAL IGUAL NUMERO')
+    assert c.compile_text('a == 1')['mensagens'] == ['a 1']
+    assert c.compile_text('a = 1')['erros'] == ["Erro de sintaxe no token '1'"]
+    assert caches(tmp_path)['gramatica.parsetab'] != gravados['gramatica.parsetab']
+
+def test_compilador_refaz_o_cache_do_lexer(carregar, tmp_path):
+    compilador(carregar).construir()
+    gravados = caches(tmp_path)
+    c = compilador(carregar, numero=r'\d+|@')
+    assert c.compile_text('a = @')['mensagens'] == ['a @']
+    assert caches(tmp_path)['gramatica.lextab'] != gravados['gramatica.lextab']
+
+def test_compilador_refaz_o_cache_com_outro_perfil(carregar, tmp_path):
+    c = compilador(carregar)
+    c.perfil = 'a = 1'
+    c.construir()
+    gravados = caches(tmp_path)
+    c = compilador(carregar)
+    c.perfil = '= = = 1 1 1'
+    c.construir()
+    assert caches(tmp_path)['gramatica.lextab'] != gravados['gramatica.lextab']
+    assert caches(tmp_path)['gramatica.parsetab'] == gravados['gramatica.parsetab']
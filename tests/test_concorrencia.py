@@ -0,0 +1,141 @@
+# -----------------------------------------------------------------------------
+# tests/test_concorrencia.py
+#
+# Um parser usado por várias threads ao mesmo tempo: cada análise tem o seu
+# contexto (yacc.ParseContext), que é o p.parser das regras.  As regras e o
+# p_error() leem e mudam o estado da análise da sua thread.
+# -----------------------------------------------------------------------------
+
+import concurrent.futures
+import random
+import sys
+import threading
+
+import pytest
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+# Comandos 'nome = numero ;'; um comando malformado é descartado até o ';'
+# seguinte pela regra 'comando : error PONTO'
+GRAMATICA = '''
+import threading
+
+tokens = ('NOME', 'NUMERO', 'IGUAL', 'PONTO')
+
+t_NOME = r'[a-z]+'
+t_NUMERO = r'\\d+'
+t_IGUAL = r'='
+t_PONTO = r';'
+t_ignore = ' '
+
+def t_error(t):
+    t.lexer.skip(1)
+
+por_thread = threading.local()
+
+def p_programa(p):
+    \'\'\'programa : programa comando
+                | comando\'\'\'
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_comando(p):
+    'comando : NOME IGUAL NUMERO PONTO'
+    p[0] = (p[1], int(p[3]), len(p.parser.symstack))
+
+def p_comando_error(p):
+    'comando : error PONTO'
+    p.parser.errok()
+    p[0] = ('erro', p.parser.errorcount)
+
+def p_error(p):
+    parser = por_thread.parser
+    por_thread.erros.append((p and p.value, p and p.lexpos, parser.state, len(parser.symstack)))
+'''
+
+@pytest.fixture
+def gramatica(carregar):
+    return carregar(GRAMATICA)
+
+def construir(modulo, **opcoes):
+    lexer = lex.lex(module=modulo, lextab=None, errorlog=yacc.NullLogger())
+    parser = yacc.yacc(module=modulo, tabfile=None, errorlog=yacc.NullLogger(), **opcoes)
+    return lexer, parser
+
+# Textos de 1 a 20 comandos, alguns malformados
+def gerar_textos(quantos):
+    aleatorio = random.Random(1)
+    textos = []
+    for _ in range(quantos):
+        comandos = []
+        for i in range(aleatorio.randint(1, 20)):
+            comando = f'v{"abc"[i % 3]} = {i} ;'
+            if aleatorio.random() < 0.2:
+                comando = comando.replace('=', aleatorio.choice(['', '= =', 'x']))
+            comandos.append(comando)
+        textos.append(' '.join(comandos))
+    return textos
+
+def analisar(modulo, forma, parser, lexer_base, texto):
+    modulo.por_thread.parser = parser
+    modulo.por_thread.erros = []
+    lexer = lexer_base.clone()
+    if forma == 'alimentar':
+        analise = parser.push_parse(lexer)
+        for i in range(0, len(texto), 7):
+            analise.feed(texto[i:i + 7])
+        resultado = analise.end()
+    else:
+        resultado = parser.parse(texto, lexer, tracking=forma == 'rastreamento')
+    return resultado, modulo.por_thread.erros
+
+@pytest.mark.parametrize('forma, opcoes', [
+    ('parse', {}),
+    ('rastreamento', {}),
+    ('alimentar', {}),
+    ('parse', {'tables': 'array'}),
+])
+def test_analises_simultaneas(gramatica, forma, opcoes):
+    lexer, parser = construir(gramatica, **opcoes)
+    textos = gerar_textos(300)
+    esperado = [analisar(gramatica, forma, parser, lexer, texto) for texto in textos]
+    assert any(erros for _, erros in esperado)
+
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            obtido = list(pool.map(lambda texto: analisar(gramatica, forma, parser, lexer, texto), textos))
+    finally:
+        sys.setswitchinterval(intervalo)
+    assert obtido == esperado
+
+def test_contexto_de_cada_thread(gramatica):
+    lexer, parser = construir(gramatica)
+    resultado, erros = analisar(gramatica, 'parse', parser, lexer, 'a = 1 ; b 2')
+    assert resultado is None and len(erros) == 1
+    assert parser.errorcount == 3
+
+    contextos = []
+    thread = threading.Thread(target=lambda: contextos.append(parser.context()))
+    thread.start()
+    thread.join()
+    assert contextos[0] is not parser.context()
+    assert contextos[0].errorcount == 0
+
+# p.parser é o contexto da análise: os atributos da análise ficam nele, e
+# os outros são lidos e gravados no parser
+def test_atribuir_em_p_parser(carregar):
+    modulo = carregar(GRAMATICA + '''
+def p_comando_contado(p):
+    'comando : NOME PONTO'
+    p.parser.contados = getattr(p.parser, 'contados', 0) + 1
+    p.parser.errorok = True
+    p[0] = (p[1], p.parser.contados, p.parser.parser.contados)
+''')
+    lexer, parser = construir(modulo)
+    assert parser.parse('a ; b ;', lexer) == [('a', 1, 1), ('b', 2, 2)]
+    assert parser.contados == 2
+    assert 'contados' not in type(parser.context()).__slots__
+    del parser.context().contados
+    assert not hasattr(parser, 'contados')
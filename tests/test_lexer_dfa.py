@@ -0,0 +1,103 @@
+# -----------------------------------------------------------------------------
+# tests/test_lexer_dfa.py
+#
+# O backend DFA do lexer (lex.lex(backend='dfa')) produz os mesmos tokens que
+# o backend de expressões regulares.  As regras em que o primeiro casamento
+# do re e o casamento mais longo do DFA podem diferir ficam com as expressões
+# regulares, e lex() avisa.
+# -----------------------------------------------------------------------------
+
+import io
+import random
+
+import pytest
+
+import ply.lex as lex
+import ply.yacc as yacc
+import tatico
+
+# Lexer de uma regra T, a expressão regular dada, e NOME; no estado
+# 'outro' (entre chaves) só a regra U, a outra expressão regular
+LEXER = '''
+tokens = ('T', 'NOME', 'U')
+states = (('outro', 'exclusive'),)
+
+t_T = r'{t}'
+t_NOME = r'[a-z]+'
+t_outro_U = r'{u}'
+t_ANY_ignore = ' '
+
+def t_abre(t):
+    r'\\{{'
+    t.lexer.begin('outro')
+
+def t_outro_fecha(t):
+    r'\\}}'
+    t.lexer.begin('INITIAL')
+
+def t_ANY_error(t):
+    t.lexer.skip(1)
+'''
+
+def construir(carregar, t, u=r'\d+'):
+    modulo = carregar(LEXER.format(t=t, u=u))
+    avisos = io.StringIO()
+    dfa = lex.lex(module=modulo, backend='dfa', errorlog=yacc.PlyLogger(avisos))
+    regex = lex.lex(module=modulo, errorlog=yacc.NullLogger())
+    return dfa, regex, avisos.getvalue()
+
+def tokens(lexer, texto):
+    lexer.input(texto)
+    return [(t.type, t.value, t.lexpos) for t in lexer]
+
+@pytest.mark.parametrize('regra, texto', [
+    (r'\d+(\.\d+)?([eE][+-]?\d+)?', '1.5e3 2 3.25 4e 5.'),
+    (r'"([^"\\]|\\.)*"', r'"a\"b" "c\\" "'),
+    (r'\d{1,3}-\d{2}', '12-34 1234-56 1-2'),
+    (r'(=|<|>)=?', '<= = >== <'),
+])
+def test_regras_com_dfa(carregar, regra, texto):
+    dfa, regex, avisos = construir(carregar, regra)
+    assert dfa.lexstatedfa['INITIAL'] is not None
+    assert avisos == ''
+    assert tokens(dfa, texto) == tokens(regex, texto)
+
+# Regras em que o re para antes do casamento mais longo ('xa' de 'xab' em
+# r'xa?(ab)?'), e outras que o teste não consegue separar delas
+@pytest.mark.parametrize('regra, texto', [
+    (r'xa?(ab)?', 'xab xa xabab'),
+    (r'=|==', '== ='),
+    (r'==|=', '== ='),
+    (r'x(|a)', 'xa x'),
+    (r'x(b*|c)', 'xc xbb'),
+    (r'0x[0-9a-f]+|[0-9]+', '0x1f 12 0x 7'),
+    (r'[0-9]+(?=;)', '12; 3'),
+])
+def test_regras_com_expressoes_regulares(carregar, regra, texto):
+    dfa, regex, avisos = construir(carregar, regra)
+    assert dfa.lexstatedfa['INITIAL'] is None
+    assert dfa.lexstatedfa['outro'] is not None
+    assert "State 'INITIAL' uses the regex backend" in avisos
+    texto = f'{texto} {{ 12 3 }} {texto}'
+    assert tokens(dfa, texto) == tokens(regex, texto)
+
+def test_estado_com_expressoes_regulares(carregar):
+    dfa, regex, avisos = construir(carregar, r'\d+', u=r'a|ab')
+    assert dfa.lexstatedfa['INITIAL'] is not None
+    assert dfa.lexstatedfa['outro'] is None
+    assert "State 'outro' uses the regex backend" in avisos
+    texto = '1 { ab a } ab 2 { a } 3'
+    assert tokens(dfa, texto) == tokens(regex, texto)
+    assert [t[1] for t in tokens(dfa, texto) if t[0] == 'U'] == ['a', 'a', 'a']
+
+PEDACOS = ['TIME', 'VALIDAR', 'Flamengo', 'São', 'x_1', '4-4-2', '4-2-3-1', '4-4-', '27', '007',
+           ':', ',', '(', ')', ' ', '\n', 'ß']
+
+def test_tatico(carregar):
+    dfa = lex.lex(module=tatico, backend='dfa', lextab=None, errorlog=yacc.NullLogger())
+    regex = lex.lex(module=tatico, lextab=None, errorlog=yacc.NullLogger())
+    assert None not in dfa.lexstatedfa.values()
+    gerador = random.Random(1)
+    for _ in range(200):
+        texto = ''.join(gerador.choice(PEDACOS) for _ in range(gerador.randint(1, 50)))
+        assert tokens(dfa, texto) == tokens(regex, texto)
@@ -0,0 +1,115 @@
+# -----------------------------------------------------------------------------
+# tests/test_modulo_gerado.py
+#
+# Módulos de parser gerados por yacc.write_module(): o Compilador só usa um
+# módulo gerado para o fonte atual da gramática e pela versão atual do ply,
+# e gera de novo os que não correspondem.
+# -----------------------------------------------------------------------------
+
+import os
+import stat
+import sys
+
+import pytest
+
+import ply.yacc as yacc
+from compilador import Compilador
+
+GRAMATICA = '''
+tokens = ('NUMERO', 'MAIS')
+
+t_NUMERO = r'\\d+'
+t_MAIS = r'\\+'
+t_ignore = ' '
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def p_soma(p):
+    'expr : expr MAIS NUMERO'
+    p[0] = p[1] + int(p[3])
+
+def p_numero(p):
+    'expr : NUMERO'
+    p[0] = int(p[1])
+
+def p_error(p):
+    pass
+'''
+
+@pytest.fixture
+def compilador(carregar, tmp_path, monkeypatch):
+    # O módulo gerado é importado pelo nome, do diretório da gramática; sem
+    # os .pyc, cada versão gravada do módulo é lida de novo
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, 'dont_write_bytecode', True)
+    modulo = carregar(GRAMATICA)
+    compilador = Compilador(modulo, modulo.__name__)
+    yield compilador
+    sys.modules.pop(compilador.modulo_parser()[0], None)
+
+def reescrever(caminho, antes, depois):
+    with open(caminho, encoding='utf-8') as f:
+        texto = f.read()
+    assert antes in texto
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(texto.replace(antes, depois))
+
+# O parser do módulo gerado, depois de uma carga que o achou desatualizado
+def recarregar(compilador):
+    nome, caminho = compilador.modulo_parser()
+    sys.modules.pop(nome, None)
+    assert compilador.carregar_parser() is None
+    parser = compilador.carregar_parser()
+    assert parser is not None
+    return parser
+
+def test_modulo_atual_usado(compilador):
+    compilador.gerar_parser()
+    parser = compilador.carregar_parser()
+    assert type(parser).__name__ == 'Parser'
+    lexer, _ = compilador.construir()
+    assert parser.parse('1 + 2 + 3', lexer) == 6
+
+def test_sem_modulo(compilador):
+    assert compilador.carregar_parser() is None
+
+def test_gerado_de_novo_para_outra_versao_do_ply(compilador):
+    caminho = compilador.gerar_parser()
+    reescrever(caminho, f'plyversion = {yacc._module_version!r}', "plyversion = 'antiga'")
+    recarregar(compilador)
+    assert yacc.read_module(compilador.modulo_parser()[0], compilador.assinatura()) is not None
+
+def test_gerado_de_novo_sem_os_internos_do_ply(compilador):
+    # Um módulo de uma versão do ply que tinha outros internos nem importa
+    caminho = compilador.gerar_parser()
+    reescrever(caminho, 'from ply.yacc import ', 'from ply.yacc import _inexistente, ')
+    recarregar(compilador)
+
+def test_gerado_de_novo_para_outra_gramatica(compilador):
+    caminho = compilador.gerar_parser()
+    reescrever(caminho, f'signature = {compilador.assinatura()!r}', "signature = 'outra'")
+    recarregar(compilador)
+
+def test_read_module(compilador):
+    nome = compilador.modulo_parser()[0]
+    assert yacc.read_module(nome, compilador.assinatura()) is None
+    compilador.gerar_parser()
+    assert yacc.read_module(nome, compilador.assinatura()) is not None
+    assert yacc.read_module(nome, 'outra') is None
+
+# O módulo tem o modo de um arquivo novo (0o666 menos a umask), para que
+# outros usuários da gramática possam importá-lo
+def test_modulo_legivel_por_outros(compilador):
+    caminho = compilador.gerar_parser()
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(caminho).st_mode) == 0o666 & ~umask
+
+# O laço do módulo gerado é o do LRParser, com o pool de YaccSymbols
+def test_modulo_com_pool(compilador):
+    compilador.gerar_parser()
+    parser = compilador.carregar_parser()
+    parser.enable_symbol_pool()
+    lexer, _ = compilador.construir()
+    assert [parser.parse('1 + 2 + 3', lexer) for _ in range(2)] == [6, 6]
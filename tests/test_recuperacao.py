@@ -0,0 +1,135 @@
+# -----------------------------------------------------------------------------
+# tests/test_recuperacao.py
+#
+# Recuperação de erros de sintaxe: no tatico.py (regra 'command : error') e
+# na compilação incremental, em que um bloco cuja análise termina ainda em
+# recuperação (o yacc espera três tokens antes de informar outro erro) é
+# juntado ao bloco seguinte.
+# -----------------------------------------------------------------------------
+
+import pytest
+
+import tatico
+
+PARTIDA = '''TIME Flamengo
+FORMACAO 4-4-2
+GOL: 1(Rossi)
+DEF: 2(Varela), 3(Leo), 4(Ortiz), 6(Ayrton)
+MEI: 5(Pulgar), 8(Gerson), 7(Luiz), 14(Arrascaeta)
+ATA: 9(Pedro), 27(BH)
+VALIDAR
+'''
+
+# Linhas de PARTIDA e as versões malformadas delas
+MALFORMADAS = [
+    ('DEF: 2(Varela), 3(Leo), 4(Ortiz), 6(Ayrton)\n', 'DEF: 2(Varela), 3 Leo), 4(Ortiz), 6(Ayrton)\n'),
+    ('MEI: 5(Pulgar), 8(Gerson), 7(Luiz), 14(Arrascaeta)\n', 'MEI 5(Pulgar), 8(Gerson), 7(Luiz), 14(Arrascaeta)\n'),
+    ('TIME Flamengo\n', 'TIME Flamengo 3\n'),
+    ('GOL: 1(Rossi)\nDEF:', 'GOL: 1(Rossi\nDEF'),
+]
+
+@pytest.mark.parametrize('linha, malformada', MALFORMADAS)
+def test_bloco_com_erro_descartado(linha, malformada):
+    texto = PARTIDA + PARTIDA.replace(linha, malformada) + PARTIDA
+    resultado = tatico.compile_text(texto)
+    assert len(resultado['saidas']) == 2
+    assert resultado['diagnosticos']
+    assert all(d['recuperado'] for d in resultado['diagnosticos'])
+    assert '-> Bloco descartado por erro de sintaxe: nada a validar.' in resultado['mensagens']
+
+# Gramática com recuperação sem errok(): depois de um erro, os erros dos três
+# tokens seguintes não são informados, mesmo os de depois de um VALIDAR
+GRAMATICA = '''
+import sys
+from compilador import Compilador
+
+compilador = Compilador(sys.modules[__name__], __name__)
+
+tokens = ('NOME', 'NUMERO', 'VALIDAR')
+
+t_ignore = ' \\n'
+
+def t_NOME(t):
+    r'[A-Za-z]+'
+    if t.value == 'VALIDAR':
+        t.type = 'VALIDAR'
+    return t
+
+def t_NUMERO(t):
+    r'\\d+'
+    return t
+
+def t_error(t):
+    compilador.erro_lexico(t)
+
+itens = []
+
+def limpar_dados():
+    del itens[:]
+
+def dados():
+    return list(itens)
+
+def p_lista(p):
+    \'\'\'lista : lista comando
+             | comando\'\'\'
+
+def p_comando_item(p):
+    'comando : NOME NUMERO'
+    itens.append(p[1])
+
+def p_comando_validar(p):
+    'comando : VALIDAR'
+    compilador.emitir(' '.join(itens))
+    limpar_dados()
+
+def p_comando_error(p):
+    'comando : error'
+    limpar_dados()
+
+def p_error(p):
+    if p:
+        compilador.erro_sintaxe(f"Erro de sintaxe no token '{p.value}'", p)
+    else:
+        compilador.erro_sintaxe("Erro de sintaxe no final do arquivo")
+'''
+
+# O erro em '3' é seguido só de dois tokens até o fim do primeiro bloco
+TEXTO = 'a 1\nb 2 3\nVALIDAR\nc 4\nVALIDAR\nd 5\nVALIDAR\n'
+
+@pytest.fixture
+def compilador(carregar):
+    return carregar(GRAMATICA).compilador
+
+def test_bloco_em_recuperacao_juntado(compilador):
+    doc = compilador.incremental(TEXTO)
+    assert [bloco.linhas for bloco in doc.blocos] == [
+        ['a 1\n', 'b 2 3\n', 'VALIDAR\n', 'c 4\n', 'VALIDAR\n'],
+        ['d 5\n', 'VALIDAR\n', ''],
+    ]
+    assert doc.resultado == compilador.compile_text(TEXTO)
+
+# Edições dentro do bloco que termina em recuperação e no seguinte, que é
+# analisado ainda em recuperação: o erro em 'x' só é informado se a
+# recuperação tiver acabado
+@pytest.mark.parametrize('antes, depois', [
+    ('c 4\n', 'x c 4\n'),
+    ('c 4\n', 'c 4 x\n'),
+    ('b 2 3\n', 'b 2\n'),
+    ('b 2 3\n', 'b 2 3 7\n'),
+    ('VALIDAR\nc', 'c'),
+    ('d 5\n', 'd 5 x\n'),
+])
+def test_edicao_em_bloco_em_recuperacao(compilador, antes, depois):
+    doc = compilador.incremental(TEXTO)
+    inicio = TEXTO.index(antes)
+    # O trecho apagado e depois digitado uma tecla por vez, comparando com a
+    # compilação do texto inteiro
+    for n in range(len(depois) + 1):
+        texto = TEXTO[:inicio] + depois[:n] + TEXTO[inicio + len(antes):]
+        if n == 0:
+            resultado = doc.editar(inicio, inicio + len(antes), '')
+        else:
+            resultado = doc.editar(inicio + n - 1, inicio + n - 1, depois[n - 1])
+        assert doc.texto == texto
+        assert resultado == compilador.compile_text(texto)
@@ -0,0 +1,32 @@
+# -----------------------------------------------------------------------------
+# tests/test_regras_invalidas.py
+#
+# Uma regra do lexer com expressão regular inválida: sem optimize, lex()
+# informa a regra e não constrói o lexer; com optimize (que não valida as
+# regras uma a uma) o erro da expressão mestre também diz qual é a regra.
+# -----------------------------------------------------------------------------
+
+import pytest
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+LEXER = '''
+tokens = ('A', 'B', 'C')
+
+t_A = r'a'
+t_B = r'b('
+t_C = r'c'
+
+def t_error(t):
+    t.lexer.skip(1)
+'''
+
+@pytest.mark.parametrize('backend', ['regex', 'dfa'])
+def test_regra_invalida_com_optimize(carregar, backend):
+    with pytest.raises(SyntaxError, match="rule 't_B'"):
+        lex.lex(module=carregar(LEXER), optimize=True, backend=backend, lextab=None)
+
+def test_regra_invalida_sem_optimize(carregar):
+    with pytest.raises(SyntaxError, match="Can't build lexer"):
+        lex.lex(module=carregar(LEXER), lextab=None, errorlog=yacc.NullLogger())
@@ -0,0 +1,131 @@
+# -----------------------------------------------------------------------------
+# tests/test_tabelas.py
+#
+# As três representações das tabelas do parser (yacc.yacc(tables=...)) dão
+# o mesmo resultado, os mesmos erros de sintaxe e a mesma recuperação, no
+# laço sem rastreamento (parseopt_notrack()) e com ele (parsedebug()).  Os
+# dois geradores de tabelas (LRTable e LRIntTable) escrevem o mesmo
+# parser.out.
+# -----------------------------------------------------------------------------
+
+import pytest
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+import calc
+import tatico
+
+# Somas de números separadas por ';', com uma regra @direct e recuperação
+# pela regra 'comando : error PONTOVIRG'.  p_error() guarda o valor do token
+# e o tamanho da pilha; o nome do tipo vem de parser.symbols no LRIntParser.
+GRAMATICA = '''
+from ply.yacc import direct
+
+tokens = ('NUMERO', 'MAIS', 'PONTOVIRG')
+
+t_MAIS = r'\\+'
+t_PONTOVIRG = r';'
+t_ignore = ' '
+
+def t_NUMERO(t):
+    r'\\d+'
+    t.value = int(t.value)
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+erros = []
+
+def p_lista(p):
+    \'\'\'lista : lista comando
+             | comando\'\'\'
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_comando(p):
+    'comando : expr PONTOVIRG'
+    p[0] = (p[1], p.lineno(1), p.lexpos(2))
+
+def p_comando_error(p):
+    'comando : error PONTOVIRG'
+    p.parser.errok()
+    p[0] = 'erro'
+
+@direct
+def p_soma(esquerda, mais, direita):
+    'expr : expr MAIS NUMERO'
+    return esquerda + direita
+
+def p_numero(p):
+    'expr : NUMERO'
+    p[0] = p[1]
+
+def p_error(p):
+    tipo = p and p.type
+    if isinstance(tipo, int):
+        tipo = p.lexer.parser.symbols[tipo]
+    erros.append((tipo, p and p.value, len(p.lexer.parser.symstack) if p else None))
+'''
+
+TEXTOS = [
+    '1 + 2; 3;',
+    '1 + + 2; 3 + 4;',
+    '1 2; 3 4; 5;',
+    '1 + 2',
+    '',
+]
+
+@pytest.fixture
+def analisar(carregar):
+    modulo = carregar(GRAMATICA)
+    log = yacc.NullLogger()
+    parsers = {tables: yacc.yacc(module=modulo, tabfile=None, errorlog=log, tables=tables)
+               for tables in ('dict', 'array', 'comb')}
+
+    def analisar(tables, texto, tracking):
+        lexer = lex.lex(module=modulo, lextab=None, errorlog=log)
+        lexer.parser = parsers[tables]
+        del modulo.erros[:]
+        return parsers[tables].parse(texto, lexer, tracking=tracking), list(modulo.erros)
+    return analisar
+
+@pytest.mark.parametrize('tables', ['array', 'comb'])
+@pytest.mark.parametrize('tracking', [False, True])
+@pytest.mark.parametrize('texto', TEXTOS)
+def test_mesmo_resultado_que_dict(analisar, tables, tracking, texto):
+    assert analisar(tables, texto, tracking) == analisar('dict', texto, tracking)
+
+# O tipo do token no p_error() do LRIntParser é o id do terminal
+def test_erros(analisar):
+    resultado, erros = analisar('array', '1 + + 2; 3 + 4;', False)
+    assert resultado == ['erro', (7, 0, 14)]
+    assert erros == [('MAIS', '+', 3)]
+
+# O LRIntParser devolve ao lexer os tipos que ele tinha: um mesmo lexer
+# serve depois ao LRParser e a quem lê os tokens diretamente
+@pytest.mark.parametrize('tracking', [False, True])
+def test_lexer_volta_aos_nomes(carregar, tracking):
+    modulo = carregar(GRAMATICA)
+    log = yacc.NullLogger()
+    lexer = lex.lex(module=modulo, lextab=None, errorlog=log)
+    lexer.parser = yacc.yacc(module=modulo, tabfile=None, errorlog=log, tables='array')
+    assert lexer.parser.parse('1 + 2;', lexer, tracking=tracking)[0][0] == 3
+    lexer.input('3 + 4;')
+    assert [t.type for t in lexer] == ['NUMERO', 'MAIS', 'NUMERO', 'PONTOVIRG']
+    lexer.parser = yacc.yacc(module=modulo, tabfile=None, errorlog=log)
+    assert lexer.parser.parse('1 + 2;', lexer, tracking=tracking)[0][0] == 3
+
+# O parser.out de yacc(debug=True) com o gerador dado no lugar de LRIntTable
+def parser_out(modulo, gerador, tmp_path, monkeypatch):
+    monkeypatch.setattr(yacc, 'LRIntTable', gerador)
+    debugfile = tmp_path / f'{gerador.__name__}.out'
+    yacc.yacc(module=modulo, debug=True, debugfile=str(debugfile), tabfile=None,
+              errorlog=yacc.NullLogger())
+    return debugfile.read_bytes()
+
+@pytest.mark.parametrize('modulo', [calc, tatico])
+def test_parser_out_igual_ao_do_lrtable(modulo, tmp_path, monkeypatch):
+    lrtable, lrinttable = yacc.LRTable, yacc.LRIntTable
+    original = parser_out(modulo, lrtable, tmp_path, monkeypatch)
+    assert parser_out(modulo, lrinttable, tmp_path, monkeypatch) == original
@@ -0,0 +1,47 @@
+# -----------------------------------------------------------------------------
+# tests/test_valores.py
+#
+# Valores feitos quando são lidos (LexSpanToken): o valor não depende do
+# lexpos, que as regras podem mover (p.set_lexpos()), e o token continua um
+# LexToken, que aceita outros atributos.
+# -----------------------------------------------------------------------------
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+GRAMATICA = '''
+tokens = ('NOME', 'NUM')
+
+t_NOME = r'[a-z]+'
+t_NUM = r'\\d+'
+t_ignore = ' '
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def p_s(p):
+    's : NOME NUM'
+    p.set_lexpos(1, 0)
+    p.set_lexpos(2, 0)
+    p[0] = (p[1], p[2])
+
+def p_error(p):
+    pass
+'''
+
+def lexer(modulo):
+    return lex.lex(module=modulo, lextab=None, errorlog=yacc.NullLogger())
+
+def test_valor_depois_de_set_lexpos(carregar):
+    modulo = carregar(GRAMATICA)
+    parser = yacc.yacc(module=modulo, tabfile=None, errorlog=yacc.NullLogger())
+    assert parser.parse('  abc 42', lexer(modulo)) == ('abc', '42')
+
+def test_token_e_lextoken(carregar):
+    l = lexer(carregar(GRAMATICA))
+    l.input('abc 42')
+    tok = l.token()
+    assert isinstance(tok, lex.LexToken)
+    tok.extra = 1
+    tok.lexpos = 3
+    assert (tok.type, tok.value, tok.lexpos, tok.extra) == ('NOME', 'abc', 3, 1)
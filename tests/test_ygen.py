@@ -0,0 +1,24 @@
+# -----------------------------------------------------------------------------
+# tests/test_ygen.py
+#
+# Os laços de parse de yacc.py são gerados por ply/ygen.py a partir de um
+# único modelo: os que estão em yacc.py devem ser os gerados pelo modelo
+# atual (python ply/ygen.py os grava de novo).
+# -----------------------------------------------------------------------------
+
+import os
+
+import pytest
+
+from ply import ygen
+
+def test_lacos_atualizados():
+    caminho = os.path.join(os.path.dirname(ygen.__file__), 'yacc.py')
+    with open(caminho, encoding='utf-8') as f:
+        fonte = f.read()
+    assert ygen.update(fonte) == fonte
+
+@pytest.mark.parametrize('nome, tags, literal', ygen.VARIANTS)
+def test_variantes_compilam(nome, tags, literal):
+    texto = ygen.generate(tags)
+    compile('class C:\n' + texto, nome, 'exec')